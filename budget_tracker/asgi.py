@@ -2,6 +2,10 @@
 ASGI config for budget_tracker project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests it serves are routed with ``ASGI_URLCONF``, which puts the async
+summary and transaction list views in front of the DRF ones (see
+``budget_tracker.async_views``). Run it with any ASGI server, e.g.
+``uvicorn budget_tracker.asgi:application --workers 4``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -0,0 +1,21 @@
+"""
+URL configuration for requests served by the ASGI application.
+
+The read endpoints with async implementations are served by them at the
+same paths; everything else falls through to ``budget_tracker.urls``.
+Installed per request by ``budget_tracker.middleware.ASGIURLConfMiddleware``.
+"""
+from django.urls import path
+
+from summary import views as summary_views
+from transactions import views as transaction_views
+from .urls import urlpatterns as wsgi_urlpatterns
+
+
+urlpatterns = [
+    path('api/transactions/', transaction_views.transaction_list_async_view, name='transaction_list_async'),
+    path('api/transactions/filter/', transaction_views.transaction_filter_async_view, name='transaction_filter_async'),
+    path('api/summary/', summary_views.financial_summary_async_view, name='financial_summary_async'),
+    path('api/summary/categories/', summary_views.category_summary_async_view, name='category_summary_async'),
+    *wsgi_urlpatterns,
+]
@@ -0,0 +1,119 @@
+"""
+Helpers for the async (ASGI-native) read endpoints.
+
+DRF views are synchronous, so the async endpoints are plain Django views:
+``async_api_view`` authenticates them like the API's default authentication
+classes and renders errors the way DRF does, ``json_response`` renders
+payloads like DRF's ``JSONRenderer`` and ``gather_queries`` runs independent
+database queries concurrently.
+
+Under ASGI, ``budget_tracker.middleware.ASGIURLConfMiddleware`` routes the
+API paths that have async implementations to them (see
+``budget_tracker.asgi_urls``); WSGI servers keep serving the DRF views.
+"""
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.http import JsonResponse
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+
+from users.authentication import CachedTokenAuthentication
+
+
+def json_response(data, status=200, headers=None):
+    """Render ``data`` like DRF's ``JSONRenderer`` (compact, UTF-8, same encoder)."""
+    return JsonResponse(
+        data, status=status, headers=headers, safe=False, encoder=JSONEncoder,
+        json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')},
+    )
+
+
+def _authenticate(request):
+    # Token first, then session, as in REST_FRAMEWORK's authentication classes.
+    header = request.headers.get('Authorization', '').split()
+    if header and header[0].lower() == 'token':
+        if len(header) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+        user, _ = CachedTokenAuthentication().authenticate_credentials(header[1])
+        return user
+    user = request.user
+    return user if user.is_authenticated and user.is_active else None
+
+
+def async_api_view(sync_view=None):
+    """
+    Decorator for async views serving authenticated GET requests.
+
+    Other methods are handed to ``sync_view`` (e.g. the DRF view of the
+    same URL that creates objects), or rejected with 405.
+    ``request.user`` is the authenticated user when the view runs.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                if sync_view is not None:
+                    return await sync_to_async(sync_view)(request, *args, **kwargs)
+                return json_response({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+            try:
+                user = await sync_to_async(_authenticate)(request)
+                if user is None:
+                    raise exceptions.NotAuthenticated()
+                request.user = user
+                return await view_func(request, *args, **kwargs)
+            except exceptions.APIException as exc:
+                headers = None
+                if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+                    headers = {'WWW-Authenticate': 'Token'}
+                detail = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+                return json_response(detail, status=exc.status_code, headers=headers)
+        # Like DRF views: reads need no CSRF token, and ``sync_view`` enforces it for session writes.
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+def drf_request(request):
+    """Wrap an authenticated Django request for DRF paginators and serializers."""
+    wrapped = Request(request, authenticators=())
+    wrapped.user = request.user
+    return wrapped
+
+
+def _call_on_own_connection(function):
+    try:
+        return function()
+    finally:
+        # Worker threads outlive the request; apply CONN_MAX_AGE to their connections.
+        close_old_connections()
+
+
+def _call_in_transaction(functions):
+    if not connection.in_atomic_block:
+        return None
+    return [function() for function in functions]
+
+
+async def gather_queries(*functions):
+    """
+    Run blocking callables that query the database concurrently, each in a
+    worker thread with its own connection, and return their results in order.
+
+    Other connections cannot see the writes of an open transaction (e.g. in
+    tests or with ``ATOMIC_REQUESTS``), so inside one the callables run one
+    after another on the request's own connection. Setting
+    ``ASYNC_CONCURRENT_QUERIES = False`` always runs them that way.
+    """
+    if len(functions) < 2 or not getattr(settings, 'ASYNC_CONCURRENT_QUERIES', True):
+        return [await sync_to_async(function)() for function in functions]
+    results = await sync_to_async(_call_in_transaction)(functions)
+    if results is not None:
+        return results
+    return await asyncio.gather(*(
+        sync_to_async(_call_on_own_connection, thread_sensitive=False)(function) for function in functions
+    ))
@@ -0,0 +1,43 @@
+"""
+Money amounts are stored as integer minor units (cents).
+
+Integer columns sum exactly and quickly in every database, where decimals
+are summed as floats by SQLite and as arbitrary-precision numerics
+elsewhere. Amounts become ``Decimal`` with two places only where they
+leave the application: ``CentsField`` in serializers, and
+``from_cents`` for exports and plain JSON payloads.
+"""
+from decimal import Decimal
+
+from rest_framework import serializers
+
+
+def to_cents(amount):
+    """Convert a decimal amount (or anything ``Decimal`` accepts) to integer cents."""
+    if not isinstance(amount, Decimal):
+        amount = Decimal(str(amount))
+    return int(amount.scaleb(2).to_integral_value())
+
+
+def from_cents(cents):
+    """Convert integer cents to a ``Decimal`` with two places."""
+    return Decimal(cents).scaleb(-2)
+
+
+class CentsField(serializers.DecimalField):
+    """
+    A decimal amount in the API, validated like a ``DecimalField`` with two
+    places, and an integer number of cents internally.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('max_digits', 10)
+        kwargs.setdefault('decimal_places', 2)
+        super().__init__(**kwargs)
+
+    def run_validation(self, data=serializers.empty):
+        value = super().run_validation(data)
+        return None if value is None else to_cents(value)
+
+    def to_representation(self, value):
+        return super().to_representation(from_cents(value))
@@ -0,0 +1,104 @@
+"""
+Calendar periods of transactions, in their owner's time zone.
+
+A transaction's local day, month (``year_month``, ``YYYYMM``) and ISO week
+(``iso_week``, ISO year * 100 + week) are computed once when it is written
+and stored next to its ``date``. Grouping and filtering by calendar period
+then compare plain indexed integers and dates instead of converting every
+row's timestamp in SQL, which no index can serve.
+"""
+import zoneinfo
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+
+@lru_cache(maxsize=None)
+def get_zone(name):
+    return zoneinfo.ZoneInfo(name)
+
+
+def validate_timezone(value):
+    """Model field validator accepting IANA time zone names."""
+    if value not in zoneinfo.available_timezones():
+        raise ValidationError(f'"{value}" is not a known time zone.')
+
+
+def user_timezone(user):
+    """Return the time zone a user's calendar days are counted in."""
+    return get_zone(getattr(user, 'timezone', None) or settings.TIME_ZONE)
+
+
+def local_day(value, tz):
+    """Return the calendar day an aware datetime falls on in ``tz``."""
+    return timezone.localtime(value, tz).date()
+
+
+def day_start(day, tz):
+    """Return the aware datetime at which ``day`` begins in ``tz``."""
+    return timezone.make_aware(datetime.combine(day, time.min), tz)
+
+
+def year_month(day):
+    return day.year * 100 + day.month
+
+
+def iso_week(day):
+    year, week, _ = day.isocalendar()
+    return year * 100 + week
+
+
+def calendar_fields(value, tz):
+    """Return ``(local_date, year_month, iso_week)`` for an aware datetime."""
+    day = local_day(value, tz)
+    return day, year_month(day), iso_week(day)
+
+
+def month_bounds(value):
+    """Return the first and last day of a ``YYYY-MM`` month, or None if it is malformed."""
+    try:
+        first = datetime.strptime(value, '%Y-%m').date()
+    except (TypeError, ValueError):
+        return None
+    following = date(first.year + first.month // 12, first.month % 12 + 1, 1)
+    return first, following - timedelta(days=1)
+
+
+def week_bounds(value):
+    """Return the Monday and Sunday of a ``YYYY-Www`` ISO week, or None if it is malformed."""
+    try:
+        monday = datetime.strptime(f'{value}-1', '%G-W%V-%u').date()
+    except (TypeError, ValueError):
+        return None
+    return monday, monday + timedelta(days=6)
+
+
+def year_bounds(value):
+    """Return the first and last day of a ``YYYY`` year, or None if it is malformed."""
+    try:
+        first = datetime.strptime(value, '%Y').date()
+    except (TypeError, ValueError):
+        return None
+    return first, first.replace(month=12, day=31)
+
+
+def period_bounds(value):
+    """
+    Return the first and last day of a period given as a ``YYYY`` year, a
+    ``YYYY-MM`` month, a ``YYYY-Www`` ISO week or an inclusive
+    ``YYYY-MM-DD..YYYY-MM-DD`` range of days, or None if it is none of them.
+    """
+    if isinstance(value, str) and '..' in value:
+        try:
+            first, last = (date.fromisoformat(part) for part in value.split('..'))
+        except ValueError:
+            return None
+        return (first, last) if first <= last else None
+    for bounds in (year_bounds, month_bounds, week_bounds):
+        result = bounds(value)
+        if result is not None:
+            return result
+    return None
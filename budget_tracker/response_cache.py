@@ -0,0 +1,263 @@
+"""
+Per-user response cache for read-only API endpoints.
+
+Cached payloads are keyed by user, endpoint and normalized query parameters,
+plus a per-user data version that is bumped whenever one of the user's
+transactions is written (and a global version bumped on category writes).
+A write therefore never has to find and delete stale entries: it simply makes
+them unreachable. The same key doubles as a strong ETag, so a client whose
+copy is current gets a ``304 Not Modified`` without the view running at all.
+
+The versions only work if every worker process sees the same cache: in a
+per-process one (``LocMemCache``) a write would only bump the version of the
+process that made it, and the others would keep serving what it replaced.
+Configure a shared backend (Redis, Memcached, database or file-based) with
+``RESPONSE_CACHE_ALIAS``; with a per-process one nothing is cached against
+the versions, unless ``SINGLE_PROCESS`` says there are no other processes.
+``RESPONSE_CACHE_TIMEOUT`` sets the payload lifetime.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseNotModified
+from rest_framework import status
+from rest_framework.response import Response
+
+
+HITS_KEY = 'response-cache:hits'
+MISSES_KEY = 'response-cache:misses'
+CATEGORY_VERSION_KEY = 'data-version:categories'
+
+# Cache backends whose entries only the process that wrote them sees.
+PROCESS_LOCAL_BACKENDS = frozenset({'django.core.cache.backends.locmem.LocMemCache'})
+
+
+def is_shared_cache(alias):
+    """Whether every process serving requests sees the same entries in the cache ``alias``."""
+    if alias is None:
+        return False
+    return getattr(settings, 'SINGLE_PROCESS', False) or settings.CACHES[alias]['BACKEND'] not in PROCESS_LOCAL_BACKENDS
+
+
+def versions_are_shared():
+    """Whether the data versions are kept in a cache every worker shares."""
+    return is_shared_cache(getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default'))
+
+
+def get_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def _user_version_key(user_id):
+    return f'data-version:user:{user_id}'
+
+
+def _get_version(key):
+    cache = get_cache()
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so a version lost to eviction never repeats.
+        version = time.time_ns()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def _bump_version(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def get_data_version(user_id):
+    """Return the current data version of a user's transactions."""
+    return _get_version(_user_version_key(user_id))
+
+
+def bump_data_version(user_id):
+    """Invalidate every cached response derived from a user's transactions."""
+    _bump_version(_user_version_key(user_id))
+
+
+def get_category_version():
+    return _get_version(CATEGORY_VERSION_KEY)
+
+
+def bump_category_version():
+    """Invalidate every cached response that embeds category data."""
+    _bump_version(CATEGORY_VERSION_KEY)
+
+
+def _count(key):
+    cache = get_cache()
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def get_cache_stats():
+    """Return the hit and miss counters of the response cache."""
+    cache = get_cache()
+    return {
+        'hits': cache.get(HITS_KEY, 0),
+        'misses': cache.get(MISSES_KEY, 0),
+    }
+
+
+def reset_cache_stats():
+    get_cache().delete_many([HITS_KEY, MISSES_KEY])
+
+
+def _versions(user_id):
+    return f'{get_data_version(user_id)}.{get_category_version()}'
+
+
+def cached_count(queryset, user_id, *key_parts):
+    """
+    Return ``queryset.count()``, computed at most once per data version for
+    the given user and key parts (e.g. the endpoint and its filter params).
+    """
+    digest = hashlib.sha256(
+        '|'.join(['count', str(user_id), *map(str, key_parts), _versions(user_id)]).encode()
+    ).hexdigest()
+    cache = get_cache()
+    cache_key = f'response-cache:count:{digest}'
+    count = cache.get(cache_key)
+    if count is None:
+        count = queryset.count()
+        cache.set(cache_key, count, getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300))
+    return count
+
+
+def normalized_params(request, exclude=()):
+    """Return the request's query parameters as a canonical string."""
+    params = getattr(request, 'query_params', request.GET)
+    return '&'.join(
+        f'{name}={value}'
+        for name in sorted(params)
+        if name not in exclude
+        for value in sorted(params.getlist(name))
+    )
+
+
+def _response_digest(namespace, request, user_id, kwargs, vary=None):
+    kwarg_part = '&'.join(f'{name}={kwargs[name]}' for name in sorted(kwargs))
+    vary_part = '' if vary is None else vary(request)
+    return hashlib.sha256(
+        f'{namespace}|{user_id}|{kwarg_part}|{normalized_params(request)}|{vary_part}|{_versions(user_id)}'.encode()
+    ).hexdigest()
+
+
+def _response_headers(digest):
+    return {
+        'ETag': f'"{digest}"',
+        'Cache-Control': 'private, no-cache',
+        'Vary': 'Authorization, Cookie',
+    }
+
+
+def _is_not_modified(request, digest):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+    return f'"{digest}"' in [tag.strip() for tag in if_none_match.split(',')]
+
+
+def _timeout(timeout):
+    return timeout if timeout is not None else getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+
+
+def cache_response(namespace, timeout=None, vary=None):
+    """
+    Decorator for read-only API views returning a DRF ``Response``.
+
+    Apply it below ``@api_view`` (or via ``method_decorator`` on a generic
+    view's ``list``/``retrieve``) so the request is already authenticated.
+    Only successful responses to authenticated GET/HEAD requests are cached,
+    and only when the data versions are shared.
+    ``vary`` is an optional callable of the request whose result is added to
+    the key, for payloads that depend on more than the user's data and the
+    query parameters (e.g. the current day).
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            user = request.user
+            if request.method not in ('GET', 'HEAD') or not user.is_authenticated or not versions_are_shared():
+                return view_func(request, *args, **kwargs)
+
+            digest = _response_digest(namespace, request, user.pk, kwargs, vary)
+            cache_key = f'response-cache:{digest}'
+            headers = _response_headers(digest)
+
+            if _is_not_modified(request, digest):
+                _count(HITS_KEY)
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers={**headers, 'X-Cache': 'HIT'})
+
+            cache = get_cache()
+            payload = cache.get(cache_key)
+            if payload is not None:
+                _count(HITS_KEY)
+                return Response(payload, headers={**headers, 'X-Cache': 'HIT'})
+
+            _count(MISSES_KEY)
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                cache.set(cache_key, response.data, _timeout(timeout))
+                for name, value in headers.items():
+                    response[name] = value
+                response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+def _lookup_json(namespace, request, user_id, kwargs):
+    digest = _response_digest(namespace, request, user_id, kwargs)
+    if _is_not_modified(request, digest):
+        _count(HITS_KEY)
+        return digest, True, None
+    body = get_cache().get(f'response-cache:json:{digest}')
+    _count(HITS_KEY if body is not None else MISSES_KEY)
+    return digest, False, body
+
+
+def cache_json_response(namespace, timeout=None):
+    """
+    ``cache_response`` for async views returning a ``JsonResponse``.
+
+    Apply it below ``async_api_view`` so the request is already
+    authenticated. The rendered body is cached; ETags are the same as those
+    of the DRF view cached under the same ``namespace``, so a client keeps
+    its validators whichever server answers.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            user = request.user
+            if request.method not in ('GET', 'HEAD') or not user.is_authenticated or not versions_are_shared():
+                return await view_func(request, *args, **kwargs)
+
+            # One trip to the cache for the data versions and the payload.
+            digest, not_modified, body = await sync_to_async(_lookup_json)(namespace, request, user.pk, kwargs)
+            headers = _response_headers(digest)
+            if not_modified:
+                return HttpResponseNotModified(headers={**headers, 'X-Cache': 'HIT'})
+            if body is not None:
+                return HttpResponse(body, content_type='application/json', headers={**headers, 'X-Cache': 'HIT'})
+
+            response = await view_func(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                await get_cache().aset(f'response-cache:json:{digest}', response.content, _timeout(timeout))
+                for name, value in headers.items():
+                    response[name] = value
+                response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
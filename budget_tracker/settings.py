@@ -38,20 +38,32 @@ INSTALLED_APPS = [
     'categories',
     'transactions',
     'summary',
+    'budgets',
+    'monitoring',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'budget_tracker.middleware.ASGIURLConfMiddleware',
+    'monitoring.middleware.MetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'monitoring.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'budget_tracker.urls'
 
+# Under ASGI (budget_tracker.asgi) the summary and transaction list reads are
+# served by async views, which run their independent queries concurrently on
+# separate connections (set ASYNC_CONCURRENT_QUERIES = False to run them in
+# turn on the request's connection).
+ASGI_URLCONF = 'budget_tracker.asgi_urls'
+ASYNC_CONCURRENT_QUERIES = True
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -80,6 +92,103 @@ DATABASES = {
 }
 
 
+# cache
+# Local memory is per process, so the response, ledger and token caches and the
+# sync cursors' idle shortcut are off with it (see SINGLE_PROCESS). Use a backend
+# every worker shares: Redis or Memcached, or for several workers on one host
+# the file-based backend, e.g.
+#   'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+#   'LOCATION': BASE_DIR / 'cache',
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'budget-tracker',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}
+
+# Set when the app is served by one process only; per-process caches are then
+# as good as shared ones. The benchmark commands set it for their runs.
+SINGLE_PROCESS = False
+
+# Cached API responses are invalidated by data versions, which must be kept in
+# a cache every worker shares; the timeout only bounds how long unreachable
+# entries occupy the cache.
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = 300
+
+# Resolved API tokens are kept in a per-process LRU whose invalidation
+# (logout, password change) is published through the cache named here. It
+# must be shared by every worker, like the response cache's data versions;
+# None, or a per-process backend, disables token caching.
+TOKEN_AUTH_CACHE_SIZE = 1024
+TOKEN_AUTH_CACHE_TIMEOUT = 300
+TOKEN_AUTH_CACHE_ALIAS = 'default'
+
+# Longest series /api/summary/timeseries/ returns, in periods (about ten
+# years of days); longer ranges are rejected so responses stay bounded.
+SUMMARY_TIMESERIES_MAX_PERIODS = 3660
+
+# Most periods /api/summary/compare/ puts side by side in one request.
+SUMMARY_COMPARE_MAX_PERIODS = 12
+
+# Memory the per-process columnar ledgers behind /api/summary/stats/ may take,
+# in bytes (about 37 bytes per transaction); the least recently used users'
+# ledgers are dropped beyond it.
+LEDGER_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# /api/summary/forecast/ looks for recurring transactions in this many past
+# months and fits its trend line through this many trailing days.
+FORECAST_HISTORY_MONTHS = 6
+FORECAST_TREND_DAYS = 90
+
+# Percentages of a budget's limit at which /api/budgets/ raises an alert.
+BUDGET_ALERT_THRESHOLDS = (80, 100)
+
+# Sync cursors older than this ask clients for a full reload, so tombstones
+# of deleted transactions can be pruned after it (prune_transaction_tombstones).
+TRANSACTION_TOMBSTONE_RETENTION_DAYS = 30
+
+# Server-sent events (ASGI only). The in-process broker reaches streams of the
+# same process; multi-worker deployments need a broker shared between them.
+TRANSACTION_EVENTS_BROKER = 'transactions.events.InProcessBroker'
+TRANSACTION_EVENTS_MAX_CONNECTIONS_PER_USER = 5
+TRANSACTION_EVENTS_MAX_PENDING = 100
+TRANSACTION_EVENTS_HEARTBEAT_SECONDS = 15
+TRANSACTION_EVENTS_MAX_STREAM_SECONDS = 300
+# Streams are opened with single-use tickets kept in the default cache.
+TRANSACTION_EVENTS_TICKET_SECONDS = 30
+
+# Request metrics served at /api/metrics/. Each process keeps its own; with a
+# shared directory every process writes a snapshot there at most every
+# METRICS_FLUSH_SECONDS and a scrape sums them. Required with several
+# workers: without it /api/metrics/ and "manage.py slow_queries" only see one
+# process, and say so.
+METRICS_APPS = ['users', 'categories', 'transactions', 'summary', 'budgets']
+METRICS_SHARED_DIR = None
+METRICS_FLUSH_SECONDS = 15
+
+# Staff can profile a request with an "X-Profile: 1" header or "?_profile=1".
+# Captures go to REQUEST_PROFILE_DIR and the admin; only the newest
+# REQUEST_PROFILE_RETENTION are kept.
+REQUEST_PROFILE_DIR = BASE_DIR / 'profiles'
+REQUEST_PROFILE_RETENTION = 50
+REQUEST_PROFILE_MAX_EXPLAINS = 25
+# Query parameters carry other users' data and credentials; only store them
+# with the captures when debugging needs the values.
+REQUEST_PROFILE_STORE_PARAMS = False
+
+# Every query is folded into running totals per SQL fingerprint (kept
+# per process, shared through METRICS_SHARED_DIR like the request metrics);
+# "manage.py slow_queries" prints them. Queries of SLOW_QUERY_THRESHOLD_MS
+# or more are also logged to "budget_tracker.slow_queries" with their call
+# site. Fingerprints beyond QUERY_STATS_MAX_FINGERPRINTS share one row.
+SLOW_QUERY_THRESHOLD_MS = 100
+QUERY_STATS_MAX_FINGERPRINTS = 1000
+
+
 # password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -118,7 +227,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
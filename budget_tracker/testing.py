@@ -0,0 +1,149 @@
+"""
+Shared base class for the apps' query-budget tests.
+
+``QueryBudgetTestCase`` seeds two users from ``transactions.synthetic``: one
+with a small ledger and one with a large ledger. ``assertQueryBudget`` sends
+the same request as each user, starting with cold caches both times, and
+checks three things:
+
+- Both requests run the same number of queries. A count that grows with the
+  data is how an N+1 regression shows up.
+- The count stays within the endpoint's pinned budget.
+- The request on the large ledger finishes under a response-time ceiling.
+"""
+import atexit
+import shutil
+import tempfile
+import time
+
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.db import connection
+from django.test import AsyncClient, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+from summary.ledger import reset_ledger_cache
+from transactions.synthetic import BENCHMARK_PASSWORD, generate_ledger
+from users.authentication import reset_token_cache
+
+
+# The response, ledger and token caches are only used with a cache that every
+# worker shares; a file-based one is the nearest to production the tests get.
+SHARED_CACHE_DIR = tempfile.mkdtemp(prefix='budget-tracker-cache-')
+atexit.register(shutil.rmtree, SHARED_CACHE_DIR, True)
+SHARED_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': SHARED_CACHE_DIR,
+    },
+}
+
+
+# Password hashing is deliberately slow and not what these tests measure.
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    CACHES=SHARED_CACHES,
+)
+class QueryBudgetTestCase(APITestCase):
+    SMALL_LEDGER = 10
+    LARGE_LEDGER = 1000
+    PASSWORD = BENCHMARK_PASSWORD
+    # Seconds, on the large ledger; loose enough for a slow CI runner.
+    DEFAULT_TIME_CEILING = 0.5
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.small_user, = generate_ledger(users=1, transactions_per_user=cls.SMALL_LEDGER, seed=1, prefix='small')
+        cls.large_user, = generate_ledger(users=1, transactions_per_user=cls.LARGE_LEDGER, seed=2, prefix='large')
+
+    @property
+    def ledgers(self):
+        return [(self.SMALL_LEDGER, self.small_user), (self.LARGE_LEDGER, self.large_user)]
+
+    def reset_caches(self):
+        for cache in caches.all():
+            cache.clear()
+        reset_token_cache()
+        reset_ledger_cache()
+
+    def request(self, user, method, path, data=None, authenticate=True, asgi=False, **extra):
+        """
+        Send one request, through the ASGI handler and its async views if
+        ``asgi`` is set; returns (response, query count, seconds). Streamed
+        bodies are read within the count, into ``response.streamed_content``.
+        """
+        if asgi:
+            client = AsyncClient()
+            if authenticate:
+                extra['headers'] = {'Authorization': f'Token {Token.objects.get(user=user).key}'}
+
+            @async_to_sync
+            async def send(*args, **kwargs):
+                response = await getattr(client, method)(*args, **kwargs)
+                if response.streaming and response.is_async:
+                    response.streamed_content = b''.join([chunk async for chunk in response.streaming_content])
+                return response
+        else:
+            client = APIClient()
+            if authenticate:
+                client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.get(user=user).key}')
+            if data is not None and 'format' not in extra and 'content_type' not in extra:
+                extra['format'] = 'json'
+            send = getattr(client, method)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = send(path, data, **extra)
+            if response.streaming and not hasattr(response, 'streamed_content'):
+                response.streamed_content = b''.join(response.streaming_content)
+            elapsed = time.perf_counter() - started
+        return response, len(queries), elapsed
+
+    def assertQueryBudget(self, method, path, data=None, status=200, max_queries=None, time_ceiling=None,
+                          authenticate=True, asgi=False, **extra):
+        """
+        Request ``path`` as the small and the large ledger's user, each time
+        with cold caches. Assert equal query counts, at most ``max_queries``
+        of them, and a response time under ``time_ceiling`` on the large
+        ledger. ``path`` and ``data`` may be callables taking the user, for
+        per-user ids and payloads; they are called after the caches are
+        cleared. ``asgi`` sends the requests through the ASGI handler, which
+        serves async views where there are some. Returns the large ledger's
+        response.
+        """
+        counts = []
+        for size, user in self.ledgers:
+            self.reset_caches()
+            url = path(user) if callable(path) else path
+            response, count, elapsed = self.request(
+                user, method, url, data(user) if callable(data) else data, authenticate=authenticate, asgi=asgi,
+                **extra,
+            )
+            self.assertEqual(
+                response.status_code, status,
+                f"{method.upper()} {url} with {size} transactions: {getattr(response, 'data', '')}",
+            )
+            counts.append((size, count))
+        label = f"{method.upper()} {url.split('?')[0]}"
+
+        (small_size, small_count), (large_size, large_count) = counts
+        self.assertEqual(
+            small_count, large_count,
+            f"{label} ran {small_count} queries with {small_size} transactions "
+            f"but {large_count} with {large_size}",
+        )
+        if max_queries is not None:
+            self.assertLessEqual(
+                large_count, max_queries,
+                f"{label} ran {large_count} queries, budget is {max_queries}",
+            )
+        ceiling = time_ceiling if time_ceiling is not None else self.DEFAULT_TIME_CEILING
+        self.assertLess(
+            elapsed, ceiling,
+            f"{label} took {elapsed:.3f}s with {large_size} transactions, ceiling is {ceiling}s",
+        )
+        return response
+
+    def first_transaction_id(self, user, **filters):
+        return user.transactions.filter(**filters).order_by('pk').values_list('pk', flat=True)[0]
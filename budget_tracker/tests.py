@@ -0,0 +1,98 @@
+from django.test import override_settings
+from django.utils import timezone
+
+from categories.models import Category
+from summary.ledger import get_ledger_cache
+from .testing import QueryBudgetTestCase
+
+
+class ResponseCacheTests(QueryBudgetTestCase):
+    """
+    Cached API responses: revalidation with ETags, invalidation by writes
+    and isolation between users.
+    """
+
+    SUMMARY = '/api/summary/'
+
+    def setUp(self):
+        self.reset_caches()
+
+    def get(self, user, path=SUMMARY, etag=None, asgi=False):
+        extra = {}
+        if etag:
+            # The async test client takes raw header names.
+            extra['if-none-match' if asgi else 'HTTP_IF_NONE_MATCH'] = etag
+        return self.request(user, 'get', path, asgi=asgi, **extra)
+
+    def add_transaction(self, user):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.request(user, 'post', '/api/transactions/', {
+                'amount': '12.00',
+                'type': 'expense',
+                'category': Category.objects.get(name='Food & Dining').pk,
+                'date': timezone.now().isoformat(),
+            })[0]
+        self.assertEqual(response.status_code, 201)
+
+    def test_hit(self):
+        first = self.get(self.small_user)[0]
+        self.assertEqual(first['X-Cache'], 'MISS')
+        second, queries, _ = self.get(self.small_user)
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(queries, 0)
+
+    def test_not_modified(self):
+        etag = self.get(self.small_user)[0]['ETag']
+        response, queries, _ = self.get(self.small_user, etag=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(queries, 0)
+        # ETags are shared with the async views.
+        self.assertEqual(self.get(self.small_user, etag=etag, asgi=True)[0].status_code, 304)
+
+    def test_write_invalidates(self):
+        first = self.get(self.small_user)[0]
+        self.add_transaction(self.small_user)
+        response = self.get(self.small_user, etag=first['ETag'])[0]
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertEqual(response.data['transaction_count'], first.data['transaction_count'] + 1)
+
+    def test_category_write_invalidates(self):
+        path = '/api/transactions/?cursor='
+        first = self.get(self.small_user, path)[0]
+        category = first.data['results'][0]['category']
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.filter(pk=category).get().save()
+        response = self.get(self.small_user, path, etag=first['ETag'])[0]
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_users_are_isolated(self):
+        small = self.get(self.small_user)[0]
+        large = self.get(self.large_user)[0]
+        self.assertEqual(large['X-Cache'], 'MISS')
+        self.assertNotEqual(large['ETag'], small['ETag'])
+        self.assertEqual(large.data['transaction_count'], self.LARGE_LEDGER)
+        # Another user's validator never matches.
+        self.assertEqual(self.get(self.large_user, etag=small['ETag'])[0].status_code, 200)
+
+        # Nor does another user's write invalidate.
+        self.add_transaction(self.large_user)
+        response = self.get(self.small_user, etag=small['ETag'])[0]
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_per_process_cache_is_not_used(self):
+        # Another worker's writes would not bump this process's versions.
+        self.get(self.small_user)
+        response, queries, _ = self.get(self.small_user)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+        self.assertNotIn('X-Cache', response)
+        self.assertGreater(queries, 0)
+        self.request(self.small_user, 'get', '/api/summary/stats/percentiles/')
+        self.assertEqual(len(get_ledger_cache()), 0)
@@ -52,7 +52,11 @@ def api_root(request):
             'summary': {
                 'financial_summary': '/api/summary/',
                 'category_summary': '/api/summary/categories/',
-            }
+            },
+            'budgets': {
+                'list_create': '/api/budgets/',
+                'detail': '/api/budgets/{id}/',
+            },
         }
     })
 
@@ -75,6 +79,8 @@ urlpatterns = [
     path('api/categories/', include('categories.urls')),
     path('api/transactions/', include('transactions.urls')),
     path('api/summary/', include('summary.urls')),
+    path('api/budgets/', include('budgets.urls')),
+    path('api/metrics/', include('monitoring.urls')),
 ]
 
 # static files during development
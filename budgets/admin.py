@@ -0,0 +1,15 @@
+from django.contrib import admin
+from .models import Budget
+
+
+@admin.register(Budget)
+class BudgetAdmin(admin.ModelAdmin):
+    """
+    Admin interface for the Budget model. The spent amount and count are
+    maintained automatically; run ``reconcile_budgets`` if they look off.
+    """
+    list_display = ['user', 'category', 'period', 'limit', 'spent', 'transaction_count', 'status']
+    list_filter = ['period']
+    search_fields = ['user__username', 'category__name']
+    ordering = ['-period']
+    readonly_fields = ['spent_cents', 'transaction_count', 'created_at', 'updated_at']
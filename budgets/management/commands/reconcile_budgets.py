@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from budgets.models import Budget
+from budgets.spending import reconcile
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Check the budgets' running spent totals against the real aggregates of their transactions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Only check the budgets of the user with this username',
+        )
+        parser.add_argument(
+            '--fix', action='store_true',
+            help='Correct the budgets that are off',
+        )
+
+    def handle(self, *args, **options):
+        """Report (and optionally fix) every budget whose totals differ from its transactions'."""
+        budgets = Budget.objects.select_related('user', 'category')
+        if options['user']:
+            try:
+                budgets = budgets.filter(user=User.objects.get(username=options['user']))
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist")
+
+        mismatches = reconcile(budgets, fix=options['fix'])
+        for budget, cents, count in mismatches:
+            self.stdout.write(
+                f"  {budget.user.username} {budget.category.name} {budget.period_label}: "
+                f"recorded {budget.spent_cents} cents in {budget.transaction_count} transactions, "
+                f"actual {cents} cents in {count}"
+            )
+
+        checked = budgets.count()
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS(f'All {checked} budgets match their transactions.'))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'Fixed {len(mismatches)} of {checked} budgets.'))
+        else:
+            raise CommandError(f'{len(mismatches)} of {checked} budgets are off; rerun with --fix to correct them.')
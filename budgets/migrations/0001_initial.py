@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:24
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('categories', '0002_category_transaction_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Budget',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.PositiveIntegerField(help_text='Month the budget applies to, as YYYYMM')),
+                ('limit_cents', models.BigIntegerField(help_text='Spending limit in cents (must be positive)', validators=[django.core.validators.MinValueValidator(1)])),
+                ('spent_cents', models.BigIntegerField(default=0, editable=False, help_text='Expenses of the category in the month, in cents (maintained automatically)')),
+                ('transaction_count', models.PositiveIntegerField(default=0, editable=False, help_text='Number of those expenses (maintained automatically)')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='budgets', to='categories.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='budgets', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-period', 'category__name'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='budget',
+            constraint=models.UniqueConstraint(fields=('user', 'period', 'category'), name='unique_budget'),
+        ),
+    ]
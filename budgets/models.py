@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.validators import MinValueValidator
+from django.db import models
+
+from budget_tracker.money import from_cents
+
+
+User = get_user_model()
+
+
+class Budget(models.Model):
+    """
+    A monthly spending limit for one category.
+
+    ``spent_cents`` and ``transaction_count`` are running totals of the
+    user's expenses in the category during the month, kept up to date by the
+    signal handlers in ``budgets.signals`` so reading a budget's status never
+    aggregates transactions. ``reconcile_budgets`` checks them.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='budgets')
+    category = models.ForeignKey('categories.Category', on_delete=models.CASCADE, related_name='budgets')
+    period = models.PositiveIntegerField(help_text="Month the budget applies to, as YYYYMM")
+    limit_cents = models.BigIntegerField(
+        validators=[MinValueValidator(1)],
+        help_text="Spending limit in cents (must be positive)"
+    )
+    spent_cents = models.BigIntegerField(
+        default=0, editable=False, help_text="Expenses of the category in the month, in cents (maintained automatically)"
+    )
+    transaction_count = models.PositiveIntegerField(
+        default=0, editable=False, help_text="Number of those expenses (maintained automatically)"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-period', 'category__name']
+        constraints = [
+            # Also the index every transaction write updates its budget through.
+            models.UniqueConstraint(fields=['user', 'period', 'category'], name='unique_budget'),
+        ]
+
+    # Only ever changed with ``UPDATE ... F()`` or by ``spending``; a save
+    # would write back the values loaded with the instance.
+    RUNNING_TOTALS = ('spent_cents', 'transaction_count')
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.RUNNING_TOTALS
+            ]
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.category.name} {self.period_label}: {self.spent} of {self.limit} ({self.user.username})"
+
+    @property
+    def period_label(self):
+        return f'{self.period // 100:04d}-{self.period % 100:02d}'
+
+    @property
+    def limit(self):
+        return from_cents(self.limit_cents)
+
+    @property
+    def spent(self):
+        return from_cents(self.spent_cents)
+
+    @property
+    def remaining_cents(self):
+        return self.limit_cents - self.spent_cents
+
+    @property
+    def percent_used(self):
+        return round(self.spent_cents * 100 / self.limit_cents, 1)
+
+    @property
+    def alert_threshold(self):
+        """The highest of ``BUDGET_ALERT_THRESHOLDS`` (percentages) reached, or None."""
+        reached = [
+            threshold for threshold in getattr(settings, 'BUDGET_ALERT_THRESHOLDS', (80, 100))
+            if self.spent_cents * 100 >= threshold * self.limit_cents
+        ]
+        return max(reached, default=None)
+
+    @property
+    def status(self):
+        """``exceeded`` past the limit, ``warning`` once a threshold is reached, else ``ok``."""
+        if self.spent_cents > self.limit_cents:
+            return 'exceeded'
+        if self.alert_threshold is not None:
+            return 'warning'
+        return 'ok'
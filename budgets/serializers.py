@@ -0,0 +1,94 @@
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+from budget_tracker.money import CentsField
+from budget_tracker.periods import month_bounds, year_month
+from . import spending
+from .models import Budget
+
+
+class PeriodField(serializers.Field):
+    """A month as ``YYYY-MM`` in the API and a ``YYYYMM`` integer in the database."""
+    default_error_messages = {
+        'invalid': 'Enter a month as YYYY-MM.',
+    }
+
+    def to_internal_value(self, data):
+        bounds = month_bounds(data) if isinstance(data, str) else None
+        if bounds is None:
+            self.fail('invalid')
+        return year_month(bounds[0])
+
+    def to_representation(self, value):
+        return f'{value // 100:04d}-{value % 100:02d}'
+
+
+DUPLICATE_MESSAGE = 'There is already a budget for this category and month.'
+
+
+class BudgetSerializer(serializers.ModelSerializer):
+    """
+    Serializer for Budget model with its status. Everything is read from the
+    budget row itself, so listing budgets costs no per-budget queries.
+    """
+    period = PeriodField()
+    limit = CentsField(source='limit_cents', min_value=Decimal('0.01'), help_text="Spending limit (must be positive)")
+    spent = CentsField(source='spent_cents', read_only=True)
+    remaining = CentsField(source='remaining_cents', read_only=True)
+    category_name = serializers.CharField(source='category.name', read_only=True)
+    percent_used = serializers.FloatField(read_only=True)
+    status = serializers.CharField(read_only=True)
+    alert_threshold = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Budget
+        fields = [
+            'id', 'category', 'category_name', 'period', 'limit', 'spent', 'remaining', 'percent_used',
+            'status', 'alert_threshold', 'transaction_count', 'created_at', 'updated_at',
+        ]
+        read_only_fields = ['id', 'transaction_count', 'created_at', 'updated_at']
+
+    def validate(self, attrs):
+        user = self.context['request'].user
+        category = attrs.get('category', getattr(self.instance, 'category', None))
+        period = attrs.get('period', getattr(self.instance, 'period', None))
+        duplicates = Budget.objects.filter(user=user, category=category, period=period)
+        if self.instance is not None:
+            duplicates = duplicates.exclude(pk=self.instance.pk)
+        if duplicates.exists():
+            raise serializers.ValidationError(DUPLICATE_MESSAGE)
+        return attrs
+
+    def _save(self, budget, moved):
+        # A concurrent request can still insert the same budget after
+        # ``validate``; the unique constraint then rejects this one.
+        try:
+            with transaction.atomic():
+                budget.save()
+                if moved:
+                    # Measured once the row exists, so that no expense
+                    # recorded meanwhile is left out.
+                    spending.refresh_spending(budget)
+                else:
+                    budget.refresh_from_db(fields=Budget.RUNNING_TOTALS)
+        except IntegrityError:
+            raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [DUPLICATE_MESSAGE]})
+        return budget
+
+    def create(self, validated_data):
+        # Set the user from the request context
+        validated_data['user'] = self.context['request'].user
+        # Expenses already recorded for the month count from the start.
+        return self._save(Budget(**validated_data), moved=True)
+
+    def update(self, instance, validated_data):
+        moved = any(
+            name in validated_data and validated_data[name] != getattr(instance, name)
+            for name in ('category', 'period')
+        )
+        for name, value in validated_data.items():
+            setattr(instance, name, value)
+        return self._save(instance, moved)
@@ -0,0 +1,32 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from transactions.models import Transaction
+from transactions.signals import transactions_bulk_created, transactions_localized
+from . import spending
+from .models import Budget
+
+
+@receiver(post_save, sender=Transaction)
+def update_budgets_on_save(sender, instance, created, raw=False, **kwargs):
+    """Move the saved transaction's amount between budgets as needed."""
+    if raw:
+        return
+    previous = None if created else instance.get_previous_state()
+    spending.apply_change(previous, instance.get_state())
+
+
+@receiver(post_delete, sender=Transaction)
+def update_budgets_on_delete(sender, instance, **kwargs):
+    spending.apply_state(instance.get_previous_state() or instance.get_state(), -1)
+
+
+@receiver(transactions_bulk_created)
+def update_budgets_on_bulk_create(sender, instances, **kwargs):
+    spending.apply_states([instance.get_state() for instance in instances])
+
+
+@receiver(transactions_localized)
+def reconcile_budgets_on_localize(sender, user, **kwargs):
+    """Budgets are local months; transactions near a month boundary may have moved."""
+    spending.reconcile(Budget.objects.filter(user=user), fix=True)
@@ -0,0 +1,141 @@
+"""
+Maintenance and checking of the budgets' running totals.
+
+A transaction write changes at most two budgets, the month and category it
+left and the one it moved to, each with a single
+``UPDATE ... SET spent_cents = spent_cents + delta`` through the unique
+(user, period, category) index; no transactions are read. Only expenses
+count. ``measure`` aggregates the real totals, for new budgets and for
+``reconcile``.
+"""
+from django.db.models import Count, F, Sum
+
+from budget_tracker.periods import year_month
+from transactions.models import Transaction
+from .models import Budget
+
+
+BUDGET_FIELDS = ('user_id', 'period', 'category_id')
+
+
+def _key(state):
+    # The budget a transaction state counts towards, if it is an expense.
+    if state is None or state.type != 'expense':
+        return None
+    return (state.user_id, year_month(state.local_date), state.category_id)
+
+
+def apply_state(state, sign):
+    """Add (sign=1) or remove (sign=-1) one transaction's state from its budget."""
+    key = _key(state)
+    if key is not None:
+        _apply_delta(key, state.amount_cents * sign, sign)
+
+
+def apply_change(previous, current):
+    """Move a transaction from its previous state's budget to its current one's."""
+    if previous is None:
+        apply_state(current, 1)
+        return
+    if _key(previous) == _key(current):
+        if _key(current) is not None and previous.amount_cents != current.amount_cents:
+            _apply_delta(_key(current), current.amount_cents - previous.amount_cents, 0)
+        return
+    apply_state(previous, -1)
+    apply_state(current, 1)
+
+
+def apply_states(states):
+    """
+    Add many new transactions at once: deltas are merged per budget, and only
+    the budgets that exist are updated, one UPDATE each.
+    """
+    deltas = {}
+    for state in states:
+        key = _key(state)
+        if key is not None:
+            cents, count = deltas.get(key, (0, 0))
+            deltas[key] = (cents + state.amount_cents, count + 1)
+    if not deltas:
+        return
+
+    budgets = Budget.objects.filter(
+        user_id__in={key[0] for key in deltas},
+        period__in={key[1] for key in deltas},
+        category_id__in={key[2] for key in deltas},
+    ).values_list('pk', *BUDGET_FIELDS)
+    for pk, *key in budgets:
+        delta = deltas.get(tuple(key))
+        if delta is not None:
+            Budget.objects.filter(pk=pk).update(
+                spent_cents=F('spent_cents') + delta[0],
+                transaction_count=F('transaction_count') + delta[1],
+            )
+
+
+def _apply_delta(key, cents, count):
+    Budget.objects.filter(**dict(zip(BUDGET_FIELDS, key))).update(
+        spent_cents=F('spent_cents') + cents,
+        transaction_count=F('transaction_count') + count,
+    )
+
+
+def measure(budgets):
+    """
+    Aggregate the real expenses behind ``budgets`` (an iterable of budgets) in
+    one query. Returns ``{(user_id, period, category_id): (cents, count)}``
+    for the keys that have any.
+    """
+    budgets = list(budgets)
+    if not budgets:
+        return {}
+    rows = (
+        Transaction.objects.filter(
+            type='expense',
+            user_id__in={budget.user_id for budget in budgets},
+            year_month__in={budget.period for budget in budgets},
+            category_id__in={budget.category_id for budget in budgets},
+        )
+        .values_list('user_id', 'year_month', 'category_id')
+        .annotate(cents=Sum('amount_cents'), count=Count('id'))
+        .order_by()
+    )
+    return {(user_id, period, category_id): (cents, count) for user_id, period, category_id, cents, count in rows}
+
+
+def set_spending(budget):
+    """Set an unsaved or moved budget's running totals from its transactions."""
+    key = (budget.user_id, budget.period, budget.category_id)
+    budget.spent_cents, budget.transaction_count = measure([budget]).get(key, (0, 0))
+
+
+def refresh_spending(budget):
+    """
+    Measure a saved budget's running totals and write them to its row. Called
+    after the budget is inserted or moved, inside the same database
+    transaction: expenses committed before then are measured here, and later
+    ones find the row and update it themselves.
+    """
+    set_spending(budget)
+    Budget.objects.filter(pk=budget.pk).update(
+        spent_cents=budget.spent_cents, transaction_count=budget.transaction_count,
+    )
+
+
+def reconcile(budgets, fix=False):
+    """
+    Compare the running totals of ``budgets`` (a queryset) with the real
+    aggregates. Returns ``(budget, cents, count)`` for each budget that is
+    off, with the real values; with ``fix``, those budgets are corrected.
+    """
+    mismatches = []
+    for start in range(0, budgets.count(), 1000):
+        chunk = list(budgets.order_by('pk')[start:start + 1000])
+        actual = measure(chunk)
+        for budget in chunk:
+            cents, count = actual.get((budget.user_id, budget.period, budget.category_id), (0, 0))
+            if (cents, count) != (budget.spent_cents, budget.transaction_count):
+                mismatches.append((budget, cents, count))
+                if fix:
+                    Budget.objects.filter(pk=budget.pk).update(spent_cents=cents, transaction_count=count)
+    return mismatches
@@ -0,0 +1,147 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db.models import QuerySet
+from django.db.models.signals import pre_save
+from django.utils import timezone
+
+from budget_tracker.periods import year_month
+from budget_tracker.testing import QueryBudgetTestCase
+from categories.models import Category
+from transactions.models import Transaction
+from .models import Budget
+from .spending import reconcile, set_spending
+
+
+class BudgetEndpointQueryBudgetTests(QueryBudgetTestCase):
+    """
+    Budget status is read from each budget's running totals, so listing
+    budgets must not aggregate or scale with the user's transactions, and
+    the totals must match the transactions after every kind of write.
+    """
+
+    def setUp(self):
+        self.category = Category.objects.get(name='Food & Dining')
+        self.month = timezone.localdate().strftime('%Y-%m')
+        for user in (self.small_user, self.large_user):
+            for category in Category.objects.all()[:5]:
+                self.create_budget(user, category, limit_cents=10000)
+
+    def create_budget(self, user, category, limit_cents):
+        budget = Budget(user=user, category=category, period=year_month(timezone.localdate()), limit_cents=limit_cents)
+        set_spending(budget)
+        budget.save()
+        return budget
+
+    def assertReconciled(self):
+        self.assertEqual(reconcile(Budget.objects.all()), [])
+
+    def test_list(self):
+        response = self.assertQueryBudget('get', '/api/budgets/', max_queries=2)
+        self.assertEqual(response.data['period'], self.month)
+        self.assertEqual(response.data['count'], 5)
+        for budget in response.data['results']:
+            self.assertEqual(budget['status'] != 'ok', budget['alert_threshold'] is not None)
+        self.assertEqual(
+            len(response.data['alerts']), sum(budget['alert_threshold'] is not None for budget in response.data['results'])
+        )
+
+    def test_create_counts_recorded_expenses(self):
+        category = Category.objects.create(name='Budgeted')
+        Transaction.objects.create(
+            user=self.large_user, category=category, type='expense', amount='12.34', date=timezone.now(),
+        )
+        response = self.request(
+            self.large_user, 'post', '/api/budgets/', {'category': category.pk, 'period': self.month, 'limit': '10.00'}
+        )[0]
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual((response.data['spent'], response.data['status']), ('12.34', 'exceeded'))
+        duplicate = self.request(
+            self.large_user, 'post', '/api/budgets/', {'category': category.pk, 'period': self.month, 'limit': '5.00'}
+        )[0]
+        self.assertEqual(duplicate.status_code, 400)
+
+    def test_create_races(self):
+        category = Category.objects.create(name='Contended')
+        payload = {'category': category.pk, 'period': self.month, 'limit': '10.00'}
+
+        def concurrent_create(queryset):
+            # Another request inserts the same budget after this one's check.
+            self.create_budget(self.large_user, category, limit_cents=500)
+            return False
+
+        with mock.patch.object(QuerySet, 'exists', autospec=True, side_effect=concurrent_create):
+            response = self.request(self.large_user, 'post', '/api/budgets/', payload)[0]
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'non_field_errors': ['There is already a budget for this category and month.']})
+        self.assertEqual(Budget.objects.get(user=self.large_user, category=category).limit_cents, 500)
+
+    def test_create_counts_expenses_recorded_meanwhile(self):
+        category = Category.objects.create(name='Busy')
+
+        def record_expense(instance, **kwargs):
+            # An expense committed just before the budget row is inserted.
+            Transaction.objects.create(
+                user=instance.user, category=category, type='expense', amount='7.00', date=timezone.now(),
+            )
+
+        pre_save.connect(record_expense, sender=Budget)
+        self.addCleanup(pre_save.disconnect, record_expense, sender=Budget)
+        response = self.request(
+            self.large_user, 'post', '/api/budgets/', {'category': category.pk, 'period': self.month, 'limit': '10.00'}
+        )[0]
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual((response.data['spent'], response.data['transaction_count']), ('7.00', 1))
+        self.assertReconciled()
+
+    def test_update_keeps_expenses_recorded_meanwhile(self):
+        budget = self.create_budget(self.large_user, Category.objects.create(name='Busy'), limit_cents=1000)
+
+        def record_expense(instance, **kwargs):
+            # An expense committed after the budget was loaded, before it is saved.
+            Transaction.objects.create(
+                user=instance.user, category=instance.category, type='expense', amount='7.00', date=timezone.now(),
+            )
+
+        pre_save.connect(record_expense, sender=Budget)
+        self.addCleanup(pre_save.disconnect, record_expense, sender=Budget)
+        response = self.request(self.large_user, 'patch', f'/api/budgets/{budget.pk}/', {'limit': '5.00'})[0]
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual((response.data['limit'], response.data['spent'], response.data['status']), ('5.00', '7.00', 'exceeded'))
+        self.assertReconciled()
+
+    def test_transaction_writes_update_running_totals(self):
+        payload = {
+            'amount': '42.50', 'type': 'expense', 'category': self.category.pk,
+            'date': timezone.now().isoformat(), 'description': 'Team lunch',
+        }
+        Budget.objects.filter(user=self.large_user).delete()
+        budget = self.create_budget(self.large_user, self.category, limit_cents=5000)
+        response, _, _ = self.request(self.large_user, 'post', '/api/transactions/', payload)
+        self.assertEqual(response.status_code, 201)
+        self.assertReconciled()
+        self.assertEqual(Budget.objects.get(pk=budget.pk).spent_cents, budget.spent_cents + 4250)
+
+        instance = Transaction.objects.filter(user=self.large_user).latest('created_at')
+        self.request(self.large_user, 'patch', f'/api/transactions/{instance.pk}/', {'amount': '60.00'})
+        self.assertReconciled()
+        other = Category.objects.exclude(pk=self.category.pk).first()
+        self.request(self.large_user, 'patch', f'/api/transactions/{instance.pk}/', {'category': other.pk})
+        self.assertReconciled()
+        self.request(self.large_user, 'post', '/api/transactions/bulk/', [payload] * 3)
+        self.assertReconciled()
+        self.request(self.large_user, 'delete', f'/api/transactions/{instance.pk}/')
+        self.assertReconciled()
+
+        # Only the bulk inserts are left in the category's budget.
+        Budget.objects.filter(pk=budget.pk).update(spent_cents=0)
+        self.assertEqual(len(reconcile(Budget.objects.all())), 1)
+        call_command('reconcile_budgets', '--fix', stdout=StringIO())
+        self.assertReconciled()
+
+    def test_update(self):
+        def path(user):
+            return f'/api/budgets/{Budget.objects.filter(user=user).first().pk}/'
+        # The running totals are reread after the save rather than written back.
+        self.assertQueryBudget('patch', path, {'limit': '250.00'}, max_queries=7)
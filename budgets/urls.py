@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+app_name = 'budgets'
+
+urlpatterns = [
+    path('', views.BudgetListCreateView.as_view(), name='budget_list_create'),
+    path('<int:pk>/', views.BudgetDetailView.as_view(), name='budget_detail'),
+]
@@ -0,0 +1,87 @@
+from django.utils import timezone
+from rest_framework import generics
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from budget_tracker.money import from_cents
+from budget_tracker.periods import local_day, month_bounds, user_timezone, year_month
+from .models import Budget
+from .serializers import BudgetSerializer
+
+
+def _alerts(budgets):
+    """One alert per budget that reached an alert threshold, most used first."""
+    alerts = []
+    for budget in sorted(budgets, key=lambda budget: -budget.percent_used):
+        if budget.alert_threshold is None:
+            continue
+        if budget.status == 'exceeded':
+            message = f'{budget.category.name}: {budget.spent} spent, over the {budget.limit} budget'
+        else:
+            message = f'{budget.category.name}: {budget.percent_used:g}% of the {budget.limit} budget spent'
+        alerts.append({
+            'budget': budget.pk,
+            'category_name': budget.category.name,
+            'threshold': budget.alert_threshold,
+            'status': budget.status,
+            'message': message,
+        })
+    return alerts
+
+
+class BudgetListCreateView(generics.ListCreateAPIView):
+    """
+    View to list the user's budgets for a month with their status, and
+    create new ones.
+    GET: Budgets of ``period`` (YYYY-MM, default the current month in the
+         user's time zone) with spent and remaining amounts, plus alerts for
+         those past an alert threshold
+    POST: Create a budget; expenses already recorded in its month count
+    """
+    serializer_class = BudgetSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = None
+
+    def get_period(self):
+        bounds = month_bounds(self.request.query_params.get('period'))
+        if bounds is None:
+            return year_month(local_day(timezone.now(), user_timezone(self.request.user)))
+        return year_month(bounds[0])
+
+    def get_queryset(self):
+        queryset = Budget.objects.filter(user=self.request.user).select_related('category')
+        if self.request.method == 'GET':
+            queryset = queryset.filter(period=self.get_period())
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        # A month has a budget per category at most; sorting them here keeps
+        # the query a plain range scan of the unique index.
+        budgets = sorted(self.get_queryset().order_by(), key=lambda budget: budget.category.name)
+        limit_cents = sum(budget.limit_cents for budget in budgets)
+        spent_cents = sum(budget.spent_cents for budget in budgets)
+        period = self.get_period()
+        return Response({
+            'period': f'{period // 100:04d}-{period % 100:02d}',
+            'count': len(budgets),
+            'total_limit': from_cents(limit_cents),
+            'total_spent': from_cents(spent_cents),
+            'total_remaining': from_cents(limit_cents - spent_cents),
+            'results': self.get_serializer(budgets, many=True).data,
+            'alerts': _alerts(budgets),
+        })
+
+
+class BudgetDetailView(generics.RetrieveUpdateDestroyAPIView):
+    """
+    View to retrieve, update, or delete a specific budget.
+    GET: Retrieve the budget and its status
+    PUT/PATCH: Update budget (moving it to another category or month
+               recounts its expenses)
+    DELETE: Delete budget
+    """
+    serializer_class = BudgetSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Budget.objects.filter(user=self.request.user).select_related('category')
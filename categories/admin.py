@@ -11,10 +11,4 @@ class CategoryAdmin(admin.ModelAdmin):
     list_filter = ['created_at', 'updated_at']
     search_fields = ['name', 'description']
     ordering = ['name']
-    readonly_fields = ['created_at', 'updated_at']
-
-    def transaction_count(self, obj):
-        """Display the number of transactions in this category."""
-        return obj.transactions.count()
-    
-    transaction_count.short_description = 'Transaction Count'
+    readonly_fields = ['transaction_count', 'created_at', 'updated_at']
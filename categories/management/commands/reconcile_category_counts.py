@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, F
+
+from categories.models import Category
+
+
+class Command(BaseCommand):
+    help = "Check the categories' transaction counts against their transactions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix', action='store_true',
+            help='Correct the categories that are off',
+        )
+
+    def handle(self, *args, **options):
+        """Report (and optionally fix) every category whose count differs from its transactions'."""
+        categories = Category.objects.annotate(actual=Count('transactions')).exclude(transaction_count=F('actual'))
+        mismatches = list(categories.order_by('name'))
+        for category in mismatches:
+            self.stdout.write(
+                f'  {category.name}: recorded {category.transaction_count} transactions, actual {category.actual}'
+            )
+            if options['fix']:
+                Category.objects.filter(pk=category.pk).update(transaction_count=category.actual)
+
+        checked = Category.objects.count()
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS(f'All {checked} categories match their transactions.'))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'Fixed {len(mismatches)} of {checked} categories.'))
+        else:
+            raise CommandError(
+                f'{len(mismatches)} of {checked} categories are off; rerun with --fix to correct them.'
+            )
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:49
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_transaction_count(apps, schema_editor):
+    Category = apps.get_model('categories', 'Category')
+    Transaction = apps.get_model('transactions', 'Transaction')
+
+    counts = (
+        Transaction.objects.filter(category=OuterRef('pk'))
+        .order_by()
+        .values('category')
+        .annotate(count=Count('id'))
+        .values('count')
+    )
+    Category.objects.update(transaction_count=Coalesce(Subquery(counts), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0001_initial'),
+        ('transactions', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='transaction_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of transactions in this category (maintained automatically)'),
+        ),
+        migrations.RunPython(populate_transaction_count, migrations.RunPython.noop),
+    ]
@@ -7,6 +7,11 @@ class Category(models.Model):
     """
     name = models.CharField(max_length=100, unique=True, help_text="Category name")
     description = models.TextField(blank=True, help_text="Optional category description")
+    transaction_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of transactions in this category (maintained automatically)"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -14,5 +19,16 @@ class Category(models.Model):
         verbose_name_plural = "Categories"
         ordering = ['name']
 
+    def save(self, *args, **kwargs):
+        # ``transaction_count`` is only changed with ``UPDATE ... F()`` by the
+        # transaction signals; a save would write back the value loaded with
+        # the instance.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'transaction_count'
+            ]
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.name
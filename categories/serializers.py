@@ -5,17 +5,28 @@ from .models import Category
 class CategorySerializer(serializers.ModelSerializer):
     """
     Serializer for Category model.
+    ``transaction_count`` is read from the denormalized counter column, so
+    nesting this serializer costs no extra queries.
     """
-    transaction_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Category
         fields = ['id', 'name', 'description', 'transaction_count', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at', 'transaction_count']
 
-    def get_transaction_count(self, obj):
-        """Get the number of transactions in this category."""
-        return obj.transactions.count()
+
+class NestedCategorySerializer(serializers.ModelSerializer):
+    """
+    Category as nested in per-user payloads such as transactions.
+    ``transaction_count`` counts every user's transactions and changes on
+    writes that don't bump the category version, so it is left out of
+    responses cached per user; ``/api/categories/`` serves it live.
+    """
+
+    class Meta:
+        model = Category
+        fields = ['id', 'name', 'description', 'created_at', 'updated_at']
+        read_only_fields = fields
 
 
 class CategoryCreateSerializer(serializers.ModelSerializer):
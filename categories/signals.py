@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from budget_tracker.response_cache import bump_category_version
+from .models import Category
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_category_data_version(sender, instance, **kwargs):
+    """Cached transaction and summary responses embed category names."""
+    transaction.on_commit(bump_category_version)
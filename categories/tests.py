@@ -1,3 +1,75 @@
-from django.test import TestCase
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models.signals import pre_save
+from django.utils import timezone
+
+from budget_tracker.testing import QueryBudgetTestCase
+from transactions.models import Transaction
+from .models import Category
+
+
+class CategoryEndpointQueryBudgetTests(QueryBudgetTestCase):
+    """
+    Category responses include ``transaction_count``; it must come from the
+    denormalized counter, not from counting each category's transactions.
+    """
+
+    def busiest_category_path(self, user):
+        category = Category.objects.order_by('-transaction_count').first()
+        return f'/api/categories/{category.pk}/'
+
+    def unused_category_path(self, user):
+        category = Category.objects.create(name=f'Unused {user.username}')
+        return f'/api/categories/{category.pk}/'
+
+    def test_list(self):
+        response = self.assertQueryBudget('get', '/api/categories/', max_queries=3)
+        self.assertEqual(
+            sum(category['transaction_count'] for category in response.data['results']),
+            self.SMALL_LEDGER + self.LARGE_LEDGER,
+        )
+
+    def test_create(self):
+        self.assertQueryBudget(
+            'post', '/api/categories/', lambda user: {'name': f'New {user.username}'}, status=201, max_queries=3
+        )
+
+    def test_retrieve(self):
+        self.assertQueryBudget('get', self.busiest_category_path, max_queries=2)
+
+    def test_update(self):
+        self.assertQueryBudget(
+            'patch', self.busiest_category_path, {'description': 'Groceries and eating out'}, max_queries=3
+        )
+
+    def test_delete(self):
+        self.assertQueryBudget('delete', self.unused_category_path, status=204, max_queries=6)
+
+    def test_update_keeps_transaction_count(self):
+        category = Category.objects.create(name='Busy')
+
+        def record_transaction(instance, **kwargs):
+            # A transaction recorded after the category was loaded, before it is saved.
+            Transaction.objects.create(
+                user=self.small_user, category=instance, type='expense', amount='7.00', date=timezone.now(),
+            )
+
+        pre_save.connect(record_transaction, sender=Category)
+        self.addCleanup(pre_save.disconnect, record_transaction, sender=Category)
+        response = self.request(self.small_user, 'patch', f'/api/categories/{category.pk}/', {'description': 'Renamed'})[0]
+        self.assertEqual(response.status_code, 200)
+        category.refresh_from_db()
+        self.assertEqual((category.description, category.transaction_count), ('Renamed', 1))
+
+    def test_reconcile_category_counts(self):
+        call_command('reconcile_category_counts', stdout=StringIO())
+        Category.objects.filter(name='Food & Dining').update(transaction_count=0)
+        stdout = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('reconcile_category_counts', stdout=stdout)
+        self.assertIn('Food & Dining: recorded 0 transactions', stdout.getvalue())
+        call_command('reconcile_category_counts', '--fix', stdout=StringIO())
+        category = Category.objects.get(name='Food & Dining')
+        self.assertEqual(category.transaction_count, category.transactions.count())
@@ -0,0 +1,99 @@
+from django.contrib import admin
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
+
+from .models import RequestProfile
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """
+    Admin interface for request profiles (read-only, captured by ProfilingMiddleware).
+    """
+    list_display = ['created_at', 'method', 'path', 'status_code', 'duration_ms_display', 'query_count', 'user']
+    list_filter = ['method', 'status_code', 'view_name']
+    search_fields = ['path', 'view_name', 'user__username']
+    ordering = ['-created_at']
+
+    fieldsets = (
+        ('Request', {
+            'fields': ('created_at', 'user', 'method', 'path', 'query_string', 'view_name', 'status_code')
+        }),
+        ('Timing', {
+            'fields': ('duration_ms', 'query_count', 'query_time_ms', 'download_link')
+        }),
+        ('Profile', {
+            'fields': ('stats_display',)
+        }),
+        ('SQL Queries', {
+            'fields': ('queries_display',)
+        }),
+    )
+    readonly_fields = [
+        'created_at', 'user', 'method', 'path', 'query_string', 'view_name', 'status_code',
+        'duration_ms', 'query_count', 'query_time_ms', 'download_link', 'stats_display', 'queries_display',
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                '<int:pk>/download/',
+                self.admin_site.admin_view(self.download_view),
+                name='monitoring_requestprofile_download',
+            ),
+        ] + super().get_urls()
+
+    def download_view(self, request, pk):
+        """Serve the raw cProfile capture for pstats or snakeviz."""
+        if not self.has_view_permission(request):
+            raise Http404
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        profile_path = profile.profile_path
+        if profile_path is None or not profile_path.exists():
+            raise Http404("The profile file no longer exists.")
+        return FileResponse(open(profile_path, 'rb'), as_attachment=True, filename=profile.profile_file)
+
+    def duration_ms_display(self, obj):
+        return f"{obj.duration_ms:.1f} ms"
+
+    duration_ms_display.short_description = 'Duration'
+    duration_ms_display.admin_order_field = 'duration_ms'
+
+    def download_link(self, obj):
+        if not obj.profile_file:
+            return '-'
+        url = reverse('admin:monitoring_requestprofile_download', args=[obj.pk])
+        return format_html('<a href="{}">{}</a>', url, obj.profile_file)
+
+    download_link.short_description = 'Raw profile'
+
+    def stats_display(self, obj):
+        return format_html('<pre style="white-space: pre; overflow-x: auto;">{}</pre>', obj.stats)
+
+    stats_display.short_description = 'Functions by cumulative time'
+
+    def queries_display(self, obj):
+        return format_html_join(
+            '',
+            '<div style="margin-bottom: 1em;"><strong>{} ms</strong>'
+            '<pre style="white-space: pre-wrap;">{}</pre>'
+            '<pre style="white-space: pre-wrap; color: #666;">params: {}</pre>'
+            '<pre style="white-space: pre-wrap; color: #264b5d;">{}</pre></div>',
+            (
+                (
+                    query['time_ms'], query['sql'],
+                    'not recorded' if query['params'] is None else query['params'], query['explain'] or '',
+                )
+                for query in obj.queries
+            ),
+        )
+
+    queries_display.short_description = 'Queries in execution order'
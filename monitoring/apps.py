@@ -0,0 +1,17 @@
+from django.apps import AppConfig
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'monitoring'
+
+    def ready(self):
+        from django.db import connections
+        from django.db.backends.signals import connection_created
+        from . import signals  # noqa: F401
+        from . import metrics, querylog
+
+        for install in (querylog.install_query_wrapper, metrics.install_query_wrapper):
+            connection_created.connect(install)
+            for connection in connections.all(initialized_only=True):
+                install(connection=connection)
@@ -0,0 +1,249 @@
+import re
+import statistics
+import time
+from datetime import timedelta
+from urllib.parse import parse_qsl, urlsplit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from monitoring.profiling import QueryRecorder, explain
+from monitoring.querylog import fingerprint
+from transactions.sync import encode_cursor
+from transactions.synthetic import generate_ledger
+
+
+# Plan lines that mean a query reads more rows than it returns, per vendor.
+PLAN_PROBLEMS = {
+    'sqlite': [
+        (re.compile(r'^SCAN (?:TABLE )?(?!CONSTANT ROW)(?!\()\S+$'), 'full table scan'),
+        (re.compile(r'^SCAN (?:TABLE )?\S+ USING (?:COVERING )?INDEX'), 'full index scan'),
+        (re.compile(r'USE TEMP B-TREE'), 'temp B-tree sort'),
+    ],
+    'postgresql': [
+        (re.compile(r'\bSeq Scan on\b'), 'full table scan'),
+        (re.compile(r'(?:^|->\s*)(?:Incremental )?Sort\b'), 'sort'),
+    ],
+}
+
+
+# Flagged plans that are the best available, as (SQL pattern, plan line pattern, reason).
+ACCEPTED_PROBLEMS = [
+    (
+        re.compile(r'"name" LIKE'), re.compile(r'categories_category'),
+        'category names are matched by substring, which no B-tree index serves; categories are few',
+    ),
+    (
+        re.compile(r'FROM "summary_dailyrollup".*"day" >=', re.DOTALL), re.compile(r'GROUP BY|Sort\b'),
+        "only the range's buckets are sorted; streaming them out of the unique index "
+        "would read every bucket of the user",
+    ),
+]
+
+
+def plan_problems(vendor, sql, plan):
+    """
+    Return ``(problem, plan line, reason)`` for every flagged line of a query
+    plan; ``reason`` says why the line is accepted, or is None.
+    """
+    problems = []
+    for line in plan.splitlines():
+        line = line.strip()
+        for pattern, problem in PLAN_PROBLEMS.get(vendor, ()):
+            if pattern.search(line):
+                reason = next(
+                    (reason for sql_pattern, line_pattern, reason in ACCEPTED_PROBLEMS
+                     if sql_pattern.search(sql) and line_pattern.search(line)),
+                    None,
+                )
+                problems.append((problem, line, reason))
+                break
+    return problems
+
+
+class Command(BaseCommand):
+    help = (
+        'Request every transaction and summary endpoint, EXPLAIN the SELECTs they run and flag '
+        'full scans and sorts that do not use an index'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--username',
+            help='Audit this existing user in the configured database instead of a generated ledger',
+        )
+        parser.add_argument('--transactions', type=int, default=5000, help='Transactions of the generated ledger')
+        parser.add_argument('--users', type=int, default=5, help='Users of the generated ledger (the first is audited)')
+        parser.add_argument('--days', type=int, default=730, help='Days of history to spread transactions over')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the generated ledger')
+        parser.add_argument('--iterations', type=int, default=5, help='Timed requests per endpoint, with cold caches')
+        parser.add_argument('--strict', action='store_true', help='Exit with an error if any plan is flagged')
+
+    def handle(self, *args, **options):
+        """Set up the database, request the endpoints and print their plans."""
+        self.verbosity = options['verbosity']
+        old_name = None
+        if options['username'] is None:
+            old_name = connection.settings_dict['NAME']
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                flagged = self._run(options)
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if flagged:
+            message = f'{flagged} queries have plans with unaccepted full scans or sorts.'
+            if options['strict']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS('No query plan has an unaccepted full scan or sort.'))
+
+    def _run(self, options):
+        if options['username'] is not None:
+            try:
+                user = get_user_model().objects.get(username=options['username'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"No user named {options['username']}")
+        else:
+            user = generate_ledger(
+                users=options['users'], transactions_per_user=options['transactions'],
+                days=options['days'], seed=options['seed'], prefix='audit',
+            )[0]
+        count = user.transactions.count()
+        self.stdout.write(f'Auditing {user.username} ({count} transactions) on {connection.vendor}\n')
+        if not count:
+            raise CommandError(f'{user.username} has no transactions to audit')
+
+        client = Client(HTTP_AUTHORIZATION=f'Token {user.auth_token.key}')
+        flagged = 0
+        timings = []
+        for name, path, params in self._scenarios(client, user):
+            recorder, elapsed, status = self._measure(client, path, params, options['iterations'])
+            problems = self._print_plans(name, status, elapsed, recorder.queries)
+            flagged += problems
+            timings.append((name, elapsed, len(recorder.queries), problems))
+
+        self.stdout.write(f"\n{'endpoint':<58} {'median ms':>10} {'queries':>8} {'flagged':>8}")
+        for name, elapsed, queries, problems in timings:
+            self.stdout.write(f'{name:<58} {elapsed:>10.2f} {queries:>8} {problems:>8}')
+        return flagged
+
+    def _scenarios(self, client, user):
+        """Return ``(name, path, params)`` for the requests to audit."""
+        transaction = user.transactions.order_by('-date').first()
+        category_id = transaction.category_id
+        now = timezone.now()
+        year_ago = (now - timedelta(days=365)).date().isoformat()
+        month_ago = (now - timedelta(days=30)).date().isoformat()
+        word = (transaction.description.split() or ['a'])[0][:4].lower()
+        local_date = transaction.local_date
+        month = local_date.strftime('%Y-%m')
+        week = local_date.strftime('%G-W%V')
+
+        # The second keyset page starts from a cursor only the API can make.
+        next_link = client.get('/api/transactions/filter/').json()['next']
+        keyset = dict(parse_qsl(urlsplit(next_link).query)) if next_link else {}
+        # A sync cursor an hour old with a stale version, so changes are read.
+        since = encode_cursor(now - timedelta(hours=1), -1)
+
+        return [
+            ('GET /api/transactions/', '/api/transactions/', {}),
+            ('GET /api/transactions/?page=10', '/api/transactions/', {'page': 10}),
+            ('GET /api/transactions/?type', '/api/transactions/', {'type': 'expense'}),
+            ('GET /api/transactions/?category', '/api/transactions/', {'category': category_id}),
+            ('GET /api/transactions/?start_date&end_date', '/api/transactions/',
+             {'start_date': year_ago, 'end_date': month_ago}),
+            ('GET /api/transactions/?month', '/api/transactions/', {'month': month}),
+            ('GET /api/transactions/?cursor', '/api/transactions/', {'cursor': ''}),
+            ('GET /api/transactions/{id}/', f'/api/transactions/{transaction.pk}/', {}),
+            ('GET /api/transactions/filter/', '/api/transactions/filter/', {}),
+            ('GET /api/transactions/filter/?cursor (page 2)', '/api/transactions/filter/', keyset),
+            ('GET /api/transactions/filter/?type&start_date&end_date', '/api/transactions/filter/',
+             {'type': 'expense', 'start_date': year_ago, 'end_date': month_ago}),
+            ('GET /api/transactions/filter/?category&start_date', '/api/transactions/filter/',
+             {'category': category_id, 'start_date': year_ago}),
+            ('GET /api/transactions/filter/?type&category', '/api/transactions/filter/',
+             {'type': transaction.type, 'category': category_id}),
+            ('GET /api/transactions/filter/?type&week', '/api/transactions/filter/',
+             {'type': 'expense', 'week': week}),
+            ('GET /api/transactions/filter/?search', '/api/transactions/filter/', {'search': word}),
+            ('GET /api/transactions/search/?q', '/api/transactions/search/', {'q': word}),
+            ('GET /api/transactions/changes/?since', '/api/transactions/changes/', {'since': since}),
+            ('GET /api/transactions/export/', '/api/transactions/export/', {}),
+            ('GET /api/transactions/export/?type&start_date', '/api/transactions/export/',
+             {'type': 'income', 'start_date': year_ago}),
+            ('GET /api/summary/', '/api/summary/', {}),
+            ('GET /api/summary/?start_date&end_date', '/api/summary/',
+             {'start_date': f'{year_ago}T12:30:00', 'end_date': f'{month_ago}T08:00:00'}),
+            ('GET /api/summary/?month', '/api/summary/', {'month': month}),
+            ('GET /api/summary/categories/', '/api/summary/categories/', {}),
+            ('GET /api/summary/categories/?type&start_date&end_date', '/api/summary/categories/',
+             {'type': 'expense', 'start_date': f'{year_ago}T12:30:00', 'end_date': f'{month_ago}T08:00:00'}),
+            ('GET /api/summary/timeseries/?granularity=month', '/api/summary/timeseries/', {'granularity': 'month'}),
+            ('GET /api/summary/timeseries/?granularity=week&start_date', '/api/summary/timeseries/',
+             {'granularity': 'week', 'start_date': f'{year_ago}T12:30:00'}),
+            ('GET /api/summary/timeseries/?granularity=day&by_category', '/api/summary/timeseries/',
+             {'granularity': 'day', 'by_category': 'true', 'month': month}),
+            ('GET /api/summary/compare/?period x3', '/api/summary/compare/',
+             {'period': [month, month_ago[:7], year_ago[:4]]}),
+            ('GET /api/summary/forecast/', '/api/summary/forecast/', {}),
+            ('GET /api/budgets/', '/api/budgets/', {}),
+            ('GET /api/summary/stats/percentiles/', '/api/summary/stats/percentiles/', {}),
+            ('GET /api/summary/stats/categories/', '/api/summary/stats/categories/', {'type': 'all'}),
+            ('GET /api/summary/stats/largest/?limit', '/api/summary/stats/largest/', {'limit': 50}),
+        ]
+
+    def _measure(self, client, path, params, iterations):
+        """Time ``iterations`` cold requests; returns the first one's queries, median ms and status."""
+        recorder = None
+        latencies = []
+        for _ in range(max(iterations, 1)):
+            for alias in settings.CACHES:
+                caches[alias].clear()
+            current = QueryRecorder()
+            with connection.execute_wrapper(current):
+                started = time.perf_counter()
+                response = client.get(path, params)
+                if response.streaming:
+                    for _ in response.streaming_content:
+                        pass
+                latencies.append((time.perf_counter() - started) * 1000)
+            response.close()
+            recorder = recorder or current
+        return recorder, statistics.median(latencies), response.status_code
+
+    def _print_plans(self, name, status, elapsed, queries):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{name}  [{status}, {len(queries)} queries, {elapsed:.2f} ms]'))
+        flagged = 0
+        seen = set()
+        for query in queries:
+            sql = query['sql']
+            if query['many'] or sql.lstrip()[:6].upper() != 'SELECT' or sql in seen:
+                continue
+            seen.add(sql)
+            plan = explain(query['alias'], sql, query['params'])
+            problems = {line: (problem, reason) for problem, line, reason in plan_problems(connection.vendor, sql, plan)}
+            unexpected = any(reason is None for _, reason in problems.values())
+            flagged += unexpected
+            label = self.style.WARNING('  FLAG ') if unexpected else '  ok   '
+            shape = fingerprint(sql)
+            if self.verbosity < 2 and len(shape) > 110:
+                shape = shape[:107] + '...'
+            self.stdout.write(f'{label}{shape}')
+            for line in plan.splitlines():
+                problem, reason = problems.get(line.strip(), (None, None))
+                if problem is None:
+                    self.stdout.write(f'         {line}')
+                elif reason is None:
+                    self.stdout.write(self.style.WARNING(f'         {line}  <- {problem}'))
+                else:
+                    self.stdout.write(f'         {line}  <- {problem}, accepted: {reason}')
+        return flagged
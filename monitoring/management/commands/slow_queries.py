@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from monitoring.querylog import collect
+
+
+SORT_KEYS = {
+    'total': lambda stats: stats[1],
+    'mean': lambda stats: stats[1] / stats[0],
+    'max': lambda stats: stats[2],
+    'calls': lambda stats: stats[0],
+    'rows': lambda stats: stats[3],
+}
+
+
+class Command(BaseCommand):
+    help = 'Print the query fingerprints that cost the most database time across the server processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help='Number of fingerprints to show')
+        parser.add_argument(
+            '--sort', choices=sorted(SORT_KEYS), default='total',
+            help='Rank by total, mean or max time, by calls or by rows (default: total)',
+        )
+        parser.add_argument('--full', action='store_true', help='Print whole fingerprints instead of truncating them')
+
+    def handle(self, *args, **options):
+        """
+        Merge the per-process snapshots in METRICS_SHARED_DIR and rank them.
+        Without a shared directory only this process's own totals are known,
+        which is useful when the command is called from a running process
+        (e.g. ``call_command`` in a shell).
+        """
+        directory = getattr(settings, 'METRICS_SHARED_DIR', None)
+        if not directory:
+            self.stderr.write(self.style.WARNING(
+                'METRICS_SHARED_DIR is not set, so server processes keep their query totals to '
+                'themselves; showing this process only.'
+            ))
+
+        stats = collect()
+        if not stats:
+            self.stdout.write(f'No query totals in {directory or "this process"} yet.')
+            return
+
+        grand_total = sum(entry[1] for entry in stats.values()) or 1
+        ranked = sorted(stats.items(), key=lambda item: SORT_KEYS[options['sort']](item[1]), reverse=True)
+        self.stdout.write(
+            f"{'#':>3} {'calls':>8} {'total ms':>11} {'mean ms':>9} {'max ms':>9} {'rows':>10} {'time':>6}  query"
+        )
+        for rank, (query, (calls, total, longest, rows, slow, site)) in enumerate(ranked[:options['limit']], 1):
+            if not options['full'] and len(query) > 120:
+                query = query[:117] + '...'
+            self.stdout.write(
+                f'{rank:>3} {calls:>8} {total * 1000:>11.1f} {total * 1000 / calls:>9.2f} {longest * 1000:>9.1f} '
+                f'{rows:>10} {total / grand_total:>6.1%}  {query}'
+            )
+            if slow:
+                self.stdout.write(f'{"":>12} {slow} slow, last at {site or "unknown"}')
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{len(stats)} fingerprints, {sum(entry[0] for entry in stats.values())} queries, '
+                f'{grand_total * 1000:.1f} ms in total.'
+            )
+        )
+
@@ -0,0 +1,232 @@
+"""
+In-process request metrics, rendered in the Prometheus text format.
+
+``MetricsMiddleware`` makes one ``MetricsRegistry.record`` call per API
+request. Each call increments a request counter by status and adds the
+request to fixed-bucket histograms of wall time, query count, database time
+and response size, labelled by view. Queries are counted by a database
+execute wrapper installed on every connection. The wrapper only does work
+while a request is being measured. Recording is a handful of dict lookups
+and bisects under a lock, so it costs microseconds.
+
+Every worker process only sees its own requests. With ``METRICS_SHARED_DIR``
+set, processes periodically write a snapshot to ``<pid>.json`` in that
+directory, and ``collect`` sums all snapshots. A scrape then covers the
+whole host, whichever worker answers it. Snapshots of exited processes keep
+counting until their files are removed.
+"""
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+
+from django.conf import settings
+
+
+METRIC_PREFIX = 'budget_tracker_http_'
+PROCESS_SNAPSHOT = re.compile(r'\d+\.json')
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+DB_DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# Histogram name -> (help text, bucket upper bounds)
+HISTOGRAMS = {
+    'request_duration_seconds': ('Wall time of API requests.', DURATION_BUCKETS),
+    'request_db_queries': ('Database queries per API request.', QUERY_BUCKETS),
+    'request_db_duration_seconds': ('Time spent in database queries per API request.', DB_DURATION_BUCKETS),
+    'response_size_bytes': ('Size of API response bodies (streaming responses excluded).', SIZE_BUCKETS),
+}
+
+
+class QueryStats:
+    """Queries executed while one request is being measured."""
+
+    __slots__ = ('count', 'duration')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+current_query_stats = ContextVar('monitoring_query_stats', default=None)
+
+
+def _execute_wrapper(execute, sql, params, many, context):
+    stats = current_query_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.count += 1
+        stats.duration += time.perf_counter() - started
+
+
+def install_query_wrapper(connection, **kwargs):
+    """``connection_created`` receiver adding the query counter to a connection."""
+    if _execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _execute_wrapper)
+
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms of one process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = defaultdict(int)
+        self._histograms = {}
+        self._last_flush = time.monotonic()
+
+    def record(self, view, method, status, duration, queries, db_duration, size=None):
+        with self._lock:
+            self._requests[(view, method, str(status))] += 1
+            self._observe('request_duration_seconds', view, method, duration)
+            self._observe('request_db_queries', view, method, queries)
+            self._observe('request_db_duration_seconds', view, method, db_duration)
+            if size is not None:
+                self._observe('response_size_bytes', view, method, size)
+
+    def _observe(self, name, view, method, value):
+        key = (name, view, method)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = [[0] * (len(HISTOGRAMS[name][1]) + 1), 0]
+        histogram[0][bisect_left(HISTOGRAMS[name][1], value)] += 1
+        histogram[1] += value
+
+    def snapshot(self):
+        """Return the current values as a JSON-serializable dict."""
+        with self._lock:
+            return {
+                'requests': [[*key, count] for key, count in self._requests.items()],
+                'histograms': [[*key, list(counts), total] for key, (counts, total) in self._histograms.items()],
+            }
+
+    def reset(self):
+        with self._lock:
+            self._requests.clear()
+            self._histograms.clear()
+
+    def maybe_flush(self):
+        """Write this process's snapshot to ``METRICS_SHARED_DIR`` if it is due."""
+        directory = getattr(settings, 'METRICS_SHARED_DIR', None)
+        if not directory:
+            return
+        now = time.monotonic()
+        if now - self._last_flush < getattr(settings, 'METRICS_FLUSH_SECONDS', 15):
+            return
+        self._last_flush = now
+        self.flush(directory)
+
+    def flush(self, directory):
+        write_snapshot(directory, f'{os.getpid()}.json', self.snapshot())
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry():
+    return _registry
+
+
+def merge(snapshots):
+    """Sum several snapshots into one."""
+    requests = defaultdict(int)
+    histograms = {}
+    for snapshot in snapshots:
+        for view, method, status, count in snapshot['requests']:
+            requests[(view, method, status)] += count
+        for name, view, method, counts, total in snapshot['histograms']:
+            if name not in HISTOGRAMS or len(counts) != len(HISTOGRAMS[name][1]) + 1:
+                continue  # written with other buckets
+            merged = histograms.setdefault((name, view, method), [[0] * len(counts), 0])
+            merged[0] = [a + b for a, b in zip(merged[0], counts)]
+            merged[1] += total
+    return {
+        'requests': [[*key, count] for key, count in requests.items()],
+        'histograms': [[*key, counts, total] for key, (counts, total) in histograms.items()],
+    }
+
+
+def collect():
+    """Return this process's metrics, merged with the other processes' snapshots."""
+    registry = get_registry()
+    directory = getattr(settings, 'METRICS_SHARED_DIR', None)
+    if not directory:
+        return registry.snapshot()
+
+    registry.flush(directory)
+    return merge(read_snapshots(directory, PROCESS_SNAPSHOT))
+
+
+def write_snapshot(directory, name, data):
+    """Atomically replace ``directory/name`` with ``data`` as JSON."""
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile('w', dir=directory, suffix='.tmp', delete=False) as fh:
+        json.dump(data, fh)
+    os.replace(fh.name, os.path.join(directory, name))
+
+
+def read_snapshots(directory, pattern, exclude=None):
+    """Load every snapshot in ``directory`` whose file name matches ``pattern``."""
+    snapshots = []
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return snapshots
+    for name in names:
+        if name == exclude or not pattern.fullmatch(name):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as fh:
+                snapshots.append(json.load(fh))
+        except (OSError, ValueError):
+            continue  # removed or replaced while reading
+    return snapshots
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(snapshot):
+    """Render a snapshot in the Prometheus text exposition format (0.0.4)."""
+    name = f'{METRIC_PREFIX}requests_total'
+    lines = [
+        f'# HELP {name} API requests by view, method and status code.',
+        f'# TYPE {name} counter',
+    ]
+    for view, method, status, count in sorted(snapshot['requests']):
+        lines.append(f'{name}{_labels(view=view, method=method, status=status)} {count}')
+
+    by_name = defaultdict(list)
+    for histogram_name, view, method, counts, total in snapshot['histograms']:
+        by_name[histogram_name].append((view, method, counts, total))
+    for histogram_name, (help_text, buckets) in HISTOGRAMS.items():
+        name = f'{METRIC_PREFIX}{histogram_name}'
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for view, method, counts, total in sorted(by_name[histogram_name]):
+            cumulative = 0
+            for bound, count in zip((*buckets, '+Inf'), counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(view=view, method=method, le=bound)} {cumulative}')
+            lines.append(f'{name}_sum{_labels(view=view, method=method)} {_number(total)}')
+            lines.append(f'{name}_count{_labels(view=view, method=method)} {cumulative}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,107 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .metrics import QueryStats, current_query_stats, get_registry
+from .profiling import is_profiling_requested, is_staff_request, profile_request, save_profile
+
+
+DEFAULT_METRICS_APPS = ('users', 'categories', 'transactions', 'summary')
+
+
+class MetricsMiddleware:
+    """
+    Record wall time, query count, database time and response size of every
+    request served by a view of one of ``METRICS_APPS``.
+
+    Place it near the top of ``MIDDLEWARE`` so the measurements include the
+    session and authentication middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.apps = frozenset(getattr(settings, 'METRICS_APPS', DEFAULT_METRICS_APPS))
+        self.registry = get_registry()
+        self._tracked_views = {}
+        self._is_async = iscoroutinefunction(get_response)
+        if self._is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self._is_async:
+            return self.__acall__(request)
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_query_stats.reset(token)
+        self.record(request, response, time.perf_counter() - started, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_query_stats.reset(token)
+        self.record(request, response, time.perf_counter() - started, stats)
+        return response
+
+    def is_tracked(self, view_func):
+        tracked = self._tracked_views.get(view_func)
+        if tracked is None:
+            module = getattr(view_func, '__module__', None) or ''
+            tracked = self._tracked_views[view_func] = module.partition('.')[0] in self.apps
+        return tracked
+
+    def record(self, request, response, duration, stats):
+        match = request.resolver_match
+        if match is None or not self.is_tracked(match.func):
+            return
+        # Streaming bodies are produced after this returns; their duration
+        # is the time to the first byte.
+        size = None if response.streaming else len(response.content)
+        self.registry.record(
+            match.view_name, request.method, response.status_code,
+            duration, stats.count, stats.duration, size,
+        )
+        self.registry.maybe_flush()
+
+
+class ProfilingMiddleware:
+    """
+    Profile staff requests flagged with ``X-Profile: 1`` or ``?_profile=1``
+    (see ``monitoring.profiling``); the response carries the capture's id in
+    ``X-Profile-Id``. Flagged requests of anyone else are served normally.
+    Place it after ``AuthenticationMiddleware`` so staff sessions count.
+
+    cProfile only follows the thread it was enabled on, and under ASGI
+    views run in worker threads, so profiling needs a WSGI server; flagged
+    requests are served normally under ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self._is_async = iscoroutinefunction(get_response)
+        if self._is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self._is_async:
+            return self.get_response(request)
+        if not is_profiling_requested(request) or not is_staff_request(request):
+            return self.get_response(request)
+
+        response, profiler, queries, duration = profile_request(self.get_response, request)
+        profile = save_profile(request, response, profiler, queries, duration)
+        response['X-Profile-Id'] = str(profile.pk)
+        return response
@@ -0,0 +1,41 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.db import models
+
+
+class RequestProfile(models.Model):
+    """
+    cProfile capture of one API request flagged for profiling by a staff
+    user, with every SQL query it ran and their query plans.
+
+    The raw profile is written to ``REQUEST_PROFILE_DIR``; only the newest
+    ``REQUEST_PROFILE_RETENTION`` captures are kept.
+    """
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    query_string = models.CharField(max_length=1000, blank=True)
+    view_name = models.CharField(max_length=200, blank=True)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField(help_text="Wall time of the request, profiler overhead included")
+    query_count = models.PositiveIntegerField(default=0)
+    query_time_ms = models.FloatField(default=0)
+    queries = models.JSONField(default=list, help_text="SQL, parameters, timing and EXPLAIN output of each query")
+    stats = models.TextField(blank=True, help_text="Functions sorted by cumulative time")
+    profile_file = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
+
+    @property
+    def profile_path(self):
+        if not self.profile_file:
+            return None
+        return Path(settings.REQUEST_PROFILE_DIR) / self.profile_file
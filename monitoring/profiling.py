@@ -0,0 +1,182 @@
+"""
+Opt-in profiling of single API requests.
+
+A staff user's request carrying an ``X-Profile: 1`` header or a
+``_profile=1`` query parameter runs under cProfile, and every SQL query it
+executes is recorded with its timing. Query parameters hold other users'
+data and credentials (token and session lookups), so they are only stored
+with ``REQUEST_PROFILE_STORE_PARAMS``; the EXPLAINs still use them. The raw profile is
+written to ``REQUEST_PROFILE_DIR`` (open it with ``pstats`` or snakeviz), the
+SELECTs are explained, and a ``RequestProfile`` row makes the capture
+browsable in the admin. The user is authenticated before anything is
+profiled, so flagged requests of other users are served normally. Requests
+without the flag only pay for the flag lookup.
+"""
+import cProfile
+import io
+import pstats
+import time
+import uuid
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .models import RequestProfile
+
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAM = '_profile'
+FALSE_VALUES = ('', '0', 'false', 'no', 'off')
+
+
+def is_profiling_requested(request):
+    value = request.META.get(PROFILE_HEADER)
+    if value is None:
+        if PROFILE_PARAM not in request.META.get('QUERY_STRING', ''):
+            return False
+        value = request.GET.get(PROFILE_PARAM)
+        if value is None:
+            return False
+    return value.strip().lower() not in FALSE_VALUES
+
+
+def is_staff_request(request):
+    """
+    Authenticate ``request`` with the API's authentication classes, as its
+    view will, and return whether it comes from a staff user. Invalid
+    credentials count as anonymous.
+    """
+    authenticators = [authentication() for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    try:
+        user = Request(request, authenticators=authenticators).user
+    except exceptions.APIException:
+        return False
+    return bool(user and user.is_staff)
+
+
+class QueryRecorder:
+    """Execute wrapper keeping every query with its parameters and timing."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'alias': context['connection'].alias,
+                'sql': sql,
+                'params': params,
+                'many': many,
+                'time_ms': (time.perf_counter() - started) * 1000,
+            })
+
+
+def profile_request(get_response, request):
+    """Serve ``request`` under the profiler; returns (response, profiler, queries, duration)."""
+    recorder = QueryRecorder()
+    profiler = cProfile.Profile()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+        duration = time.perf_counter() - started
+    return response, profiler, recorder.queries, duration
+
+
+def explain(alias, sql, params):
+    """Return the database's query plan for a SELECT, as text."""
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+        rows = cursor.fetchall()
+    if connection.vendor == 'sqlite':
+        # (id, parent, notused, detail)
+        return '\n'.join(str(row[-1]) for row in rows)
+    return '\n'.join(' '.join(str(column) for column in row) for row in rows)
+
+
+def _serializable(params):
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {name: _serializable(value) for name, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        return [_serializable(value) for value in params]
+    if isinstance(params, (bool, int, float, str)):
+        return params
+    return str(params)
+
+
+def _describe_queries(queries):
+    max_explains = getattr(settings, 'REQUEST_PROFILE_MAX_EXPLAINS', 25)
+    store_params = getattr(settings, 'REQUEST_PROFILE_STORE_PARAMS', False)
+    plans = {}
+    described = []
+    for query in queries:
+        plan = None
+        is_select = not query['many'] and query['sql'].lstrip()[:6].upper() == 'SELECT'
+        if is_select:
+            plan = plans.get(query['sql'])
+            if plan is None and len(plans) < max_explains:
+                try:
+                    plan = explain(query['alias'], query['sql'], query['params'])
+                except Exception as exc:
+                    plan = f'EXPLAIN failed: {exc}'
+                plans[query['sql']] = plan
+        described.append({
+            'alias': query['alias'],
+            'sql': query['sql'],
+            'params': _serializable(query['params']) if store_params and not query['many'] else None,
+            'time_ms': round(query['time_ms'], 3),
+            'explain': plan,
+        })
+    return described
+
+
+def save_profile(request, response, profiler, queries, duration):
+    """Store a capture and prune the oldest beyond ``REQUEST_PROFILE_RETENTION``."""
+    directory = Path(settings.REQUEST_PROFILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    file_name = f"{timezone.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}.prof"
+    profiler.dump_stats(directory / file_name)
+
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(
+        getattr(settings, 'REQUEST_PROFILE_TOP_FUNCTIONS', 60)
+    )
+    match = request.resolver_match
+    profile = RequestProfile.objects.create(
+        user=request.user,
+        method=request.method,
+        path=request.path[:500],
+        query_string=request.META.get('QUERY_STRING', '')[:1000],
+        view_name=match.view_name if match else '',
+        status_code=response.status_code,
+        duration_ms=duration * 1000,
+        query_count=len(queries),
+        query_time_ms=sum(query['time_ms'] for query in queries),
+        queries=_describe_queries(queries),
+        stats=stream.getvalue(),
+        profile_file=file_name,
+    )
+
+    retention = getattr(settings, 'REQUEST_PROFILE_RETENTION', 50)
+    stale = list(RequestProfile.objects.values_list('pk', flat=True)[retention:])
+    if stale:
+        # post_delete removes their files.
+        RequestProfile.objects.filter(pk__in=stale).delete()
+    return profile
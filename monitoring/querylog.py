@@ -0,0 +1,180 @@
+"""
+Slow-query log and per-fingerprint query statistics.
+
+An execute wrapper on every database connection times each query and folds
+it into running totals keyed by the query's fingerprint. The fingerprint is
+its SQL with literals and placeholders replaced by ``?``, and IN lists and
+VALUES tuples collapsed, so every execution of one ORM query shape shares a
+row however its parameters vary. A query slower than
+``SLOW_QUERY_THRESHOLD_MS`` is also logged to the
+``budget_tracker.slow_queries`` logger together with the line of project
+code that ran it.
+
+Totals are per process. With ``METRICS_SHARED_DIR`` set, each process writes
+them to ``queries-<pid>.json`` there at most every ``METRICS_FLUSH_SECONDS``.
+``manage.py slow_queries`` merges those files and prints the top offenders.
+"""
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from functools import lru_cache
+
+import asgiref
+import django
+import rest_framework
+from django.conf import settings
+
+from .metrics import read_snapshots, write_snapshot
+
+
+logger = logging.getLogger('budget_tracker.slow_queries')
+
+QUERY_SNAPSHOT = re.compile(r'queries-\d+\.json')
+OVERFLOW_FINGERPRINT = '(other fingerprints)'
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?\b', re.IGNORECASE)
+_PLACEHOLDER = re.compile(r'%s|%\(\w+\)s|\?')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+# Each row's parentheses only, so clauses after VALUES (ON CONFLICT,
+# RETURNING) stay in the fingerprint, and any number of rows collapses.
+_VALUES = re.compile(r'\bVALUES\s*\([^()]*?\)(?:\s*,\s*\([^()]*?\))*', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """Normalize SQL into the shape shared by all executions of one query."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _VALUES.sub('VALUES (...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+# Frames in these directories are framework or instrumentation code, not a call site.
+_FRAMEWORK_PATHS = tuple(
+    os.path.dirname(path) + os.sep for path in (django.__file__, rest_framework.__file__, asgiref.__file__, __file__)
+)
+
+
+def call_site():
+    """Return ``path:line in function`` of the innermost project frame running a query."""
+    base_dir = str(settings.BASE_DIR) + os.sep
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (filename.startswith(base_dir) and not filename.startswith(_FRAMEWORK_PATHS)
+                and os.sep + 'site-packages' + os.sep not in filename):
+            return f'{filename[len(base_dir):]}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return ''
+
+
+class QueryLog:
+    """Thread-safe running totals per query fingerprint."""
+
+    def __init__(self, max_fingerprints=1000):
+        self.max_fingerprints = max_fingerprints
+        self._lock = threading.Lock()
+        # fingerprint -> [calls, total seconds, max seconds, rows, slow calls, last slow call site].
+        # Rows are the driver's rowcount: rows written, plus rows read on
+        # backends that report them for SELECTs (SQLite does not).
+        self._stats = {}
+        self._last_flush = time.monotonic()
+
+    def record(self, sql, duration, rows=None, site=None):
+        key = fingerprint(sql)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                if len(self._stats) >= self.max_fingerprints:
+                    key = OVERFLOW_FINGERPRINT
+                    stats = self._stats.get(key)
+                if stats is None:
+                    stats = self._stats[key] = [0, 0.0, 0.0, 0, 0, '']
+            stats[0] += 1
+            stats[1] += duration
+            if duration > stats[2]:
+                stats[2] = duration
+            if rows is not None and rows >= 0:
+                stats[3] += rows
+            if site is not None:
+                stats[4] += 1
+                stats[5] = site
+
+    def snapshot(self):
+        with self._lock:
+            return {key: list(stats) for key, stats in self._stats.items()}
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def maybe_flush(self):
+        directory = getattr(settings, 'METRICS_SHARED_DIR', None)
+        if not directory:
+            return
+        now = time.monotonic()
+        if now - self._last_flush < getattr(settings, 'METRICS_FLUSH_SECONDS', 15):
+            return
+        self._last_flush = now
+        write_snapshot(directory, f'queries-{os.getpid()}.json', self.snapshot())
+
+
+_query_log = QueryLog(getattr(settings, 'QUERY_STATS_MAX_FINGERPRINTS', 1000))
+
+
+def get_query_log():
+    return _query_log
+
+
+def merge(snapshots):
+    """Sum per-fingerprint totals of several processes."""
+    merged = {}
+    for snapshot in snapshots:
+        for key, (calls, total, longest, rows, slow, site) in snapshot.items():
+            stats = merged.setdefault(key, [0, 0.0, 0.0, 0, 0, ''])
+            stats[0] += calls
+            stats[1] += total
+            stats[2] = max(stats[2], longest)
+            stats[3] += rows
+            stats[4] += slow
+            stats[5] = site or stats[5]
+    return merged
+
+
+def collect():
+    """Return this process's totals, merged with the snapshots in ``METRICS_SHARED_DIR``."""
+    snapshots = [get_query_log().snapshot()]
+    directory = getattr(settings, 'METRICS_SHARED_DIR', None)
+    if directory:
+        snapshots += read_snapshots(directory, QUERY_SNAPSHOT, exclude=f'queries-{os.getpid()}.json')
+    return merge(snapshots)
+
+
+def _execute_wrapper(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        site = None
+        if duration * 1000 >= getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 100):
+            site = call_site()
+            logger.warning(
+                'Slow query (%.1f ms) at %s: %s', duration * 1000, site or 'unknown', fingerprint(sql),
+            )
+        query_log = get_query_log()
+        query_log.record(sql, duration, getattr(context['cursor'], 'rowcount', None), site)
+        query_log.maybe_flush()
+
+
+def install_query_wrapper(connection, **kwargs):
+    """``connection_created`` receiver adding the query log to a connection."""
+    if _execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _execute_wrapper)
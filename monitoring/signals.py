@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import RequestProfile
+
+
+@receiver(post_delete, sender=RequestProfile)
+def delete_profile_file(sender, instance, **kwargs):
+    """Remove the raw capture along with its row (retention and admin deletes)."""
+    path = instance.profile_path
+    if path is not None:
+        path.unlink(missing_ok=True)
@@ -0,0 +1,187 @@
+import io
+import json
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from budget_tracker.testing import QueryBudgetTestCase
+from . import middleware
+from .metrics import get_registry
+from .models import RequestProfile
+from .querylog import fingerprint, get_query_log
+
+
+class ProfilingMiddlewareTests(TestCase):
+    """Only staff users can have their requests profiled."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(REQUEST_PROFILE_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        User = get_user_model()
+        self.staff = User.objects.create_user('operator', 'operator@example.com', 'x', is_staff=True)
+        self.member = User.objects.create_user('member', 'member@example.com', 'x')
+        self.profile_request = mock.patch.object(
+            middleware, 'profile_request', side_effect=middleware.profile_request
+        ).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def get(self, authorization=None, user=None):
+        client = APIClient()
+        if authorization:
+            client.credentials(HTTP_AUTHORIZATION=authorization)
+        if user:
+            client.force_login(user)
+        return client.get('/api/users/me/?_profile=1')
+
+    def test_staff_token(self):
+        response = self.get(f'Token {Token.objects.create(user=self.staff).key}')
+        self.assertEqual(response.status_code, 200)
+        profile = RequestProfile.objects.get()
+        self.assertEqual(response['X-Profile-Id'], str(profile.pk))
+        self.assertEqual(profile.user, self.staff)
+
+    def test_query_parameters_are_not_stored(self):
+        key = Token.objects.create(user=self.staff).key
+        self.get(f'Token {key}')
+        queries = RequestProfile.objects.get().queries
+        self.assertTrue(queries)
+        self.assertEqual({query['params'] for query in queries}, {None})
+        self.assertNotIn(key, json.dumps(queries))
+
+    @override_settings(REQUEST_PROFILE_STORE_PARAMS=True)
+    def test_query_parameters_stored_on_request(self):
+        key = Token.objects.create(user=self.staff).key
+        self.get(f'Token {key}')
+        self.assertIn(key, json.dumps(RequestProfile.objects.get().queries))
+
+    def test_staff_session(self):
+        response = self.get(user=self.staff)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('X-Profile-Id', response)
+
+    def test_member_is_not_profiled(self):
+        response = self.get(f'Token {Token.objects.create(user=self.member).key}')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-Id', response)
+        self.profile_request.assert_not_called()
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_invalid_token_is_not_profiled(self):
+        response = self.get('Token not-a-token')
+        self.assertEqual(response.status_code, 401)
+        self.profile_request.assert_not_called()
+
+    def test_anonymous_is_not_profiled(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 401)
+        self.profile_request.assert_not_called()
+
+
+class QueryFingerprintTests(SimpleTestCase):
+
+    def test_literals_and_lists(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE a = 'it''s' AND b IN (1, 2, 3) AND c > -4.5 AND \"x1\" = %s"),
+            'SELECT * FROM t WHERE a = ? AND b IN (...) AND c > ? AND "x1" = ?',
+        )
+
+    def test_values_rows(self):
+        upsert = (
+            'INSERT INTO "t" ("a", "b") VALUES {rows} '
+            'ON CONFLICT("a") DO UPDATE SET "b" = ("t"."b" + EXCLUDED."b") RETURNING "t"."id"'
+        )
+        one = fingerprint(upsert.format(rows='(%s, %s)'))
+        # Only the rows collapse: the clauses after them are kept.
+        self.assertEqual(
+            one,
+            'INSERT INTO "t" ("a", "b") VALUES (...) '
+            'ON CONFLICT("a") DO UPDATE SET "b" = ("t"."b" + EXCLUDED."b") RETURNING "t"."id"',
+        )
+        self.assertEqual(fingerprint(upsert.format(rows='(%s, %s), (%s, %s),\n(%s, %s)')), one)
+
+
+@override_settings(METRICS_SHARED_DIR=None)
+class SlowQueriesCommandTests(SimpleTestCase):
+
+    def setUp(self):
+        get_query_log().reset()
+        self.addCleanup(get_query_log().reset)
+
+    def test_without_shared_dir(self):
+        get_query_log().record('SELECT * FROM "t" WHERE "id" = 7', 0.25)
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command('slow_queries', stdout=stdout, stderr=stderr)
+        self.assertIn('showing this process only', stderr.getvalue())
+        self.assertIn('SELECT * FROM "t" WHERE "id" = ?', stdout.getvalue())
+        self.assertIn('1 fingerprints, 1 queries', stdout.getvalue())
+
+
+class MetricsTests(QueryBudgetTestCase):
+    """What ``MetricsMiddleware`` records, and how /api/metrics/ reports it."""
+
+    def setUp(self):
+        self.reset_caches()
+        get_registry().reset()
+        self.addCleanup(get_registry().reset)
+
+    def recorded(self):
+        snapshot = get_registry().snapshot()
+        requests = {tuple(key): count for *key, count in snapshot['requests']}
+        histograms = {tuple(key): (counts, total) for *key, counts, total in snapshot['histograms']}
+        return requests, histograms
+
+    def test_api_request(self):
+        response, queries, _ = self.request(self.small_user, 'get', '/api/summary/')
+        view = response.resolver_match.view_name
+        requests, histograms = self.recorded()
+        self.assertEqual(requests, {(view, 'GET', '200'): 1})
+        self.assertEqual(histograms['request_db_queries', view, 'GET'][1], queries)
+        self.assertEqual(histograms['response_size_bytes', view, 'GET'][1], len(response.content))
+        counts, seconds = histograms['request_duration_seconds', view, 'GET']
+        self.assertEqual(sum(counts), 1)
+        self.assertGreater(seconds, 0)
+
+    def test_status_codes(self):
+        self.request(self.small_user, 'get', '/api/summary/', authenticate=False)
+        self.request(self.small_user, 'get', '/api/summary/')
+        self.request(self.small_user, 'get', '/api/summary/')
+        requests, _ = self.recorded()
+        self.assertEqual(sorted(requests.values()), [1, 2])
+        self.assertEqual(sorted(status for _, _, status in requests), ['200', '401'])
+
+    def test_untracked_requests(self):
+        # Views of apps outside METRICS_APPS, and paths that match no view.
+        self.client.get('/admin/login/')
+        self.client.get('/api/no-such-endpoint/')
+        self.assertEqual(self.recorded(), ({}, {}))
+
+    def test_metrics_endpoint(self):
+        self.request(self.small_user, 'get', '/api/summary/')
+        self.assertEqual(self.request(self.small_user, 'get', '/api/metrics/')[0].status_code, 403)
+
+        staff = get_user_model().objects.create_user('scraper', 'scraper@example.com', 'x', is_staff=True)
+        Token.objects.create(user=staff)
+        response = self.request(staff, 'get', '/api/metrics/')[0]
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('budget_tracker_http_requests_total{view="summary:financial_summary",method="GET",status="200"} 1', body)
+        self.assertIn('budget_tracker_http_request_db_queries_count{view="summary:financial_summary",method="GET"} 1', body)
+        self.assertIn('# TYPE budget_tracker_http_request_duration_seconds histogram', body)
+        self.assertIn('budget_tracker_response_cache_misses_total 1', body)
+        # Tests run without METRICS_SHARED_DIR.
+        self.assertTrue(body.startswith('# METRICS_SHARED_DIR is not set'))
+        self.assertEqual(response['X-Metrics-Scope'], 'process')
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_SHARED_DIR=directory):
+            response = self.request(staff, 'get', '/api/metrics/')[0]
+        self.assertFalse(response.content.startswith(b'# METRICS_SHARED_DIR'))
+        self.assertEqual(response['X-Metrics-Scope'], 'all-processes')
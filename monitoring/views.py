@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+
+from budget_tracker.response_cache import get_cache_stats
+from .metrics import collect, render_prometheus
+
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+PROCESS_ONLY_WARNING = (
+    '# METRICS_SHARED_DIR is not set: these metrics only cover the worker process that served this scrape.\n'
+)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics_view(request):
+    """
+    Request metrics for Prometheus (staff only).
+    GET: Per-view request counts and histograms of latency, query count,
+         database time and response size, plus response cache counters.
+         Without ``METRICS_SHARED_DIR`` they only cover the worker that
+         answers, which the body and ``X-Metrics-Scope`` say.
+    """
+    shared = bool(getattr(settings, 'METRICS_SHARED_DIR', None))
+    body = ('' if shared else PROCESS_ONLY_WARNING) + render_prometheus(collect())
+    cache_stats = get_cache_stats()
+    for name, value in cache_stats.items():
+        metric = f'budget_tracker_response_cache_{name}_total'
+        body += f'# HELP {metric} Response cache {name}.\n# TYPE {metric} counter\n{metric} {value}\n'
+    response = HttpResponse(body, content_type=PROMETHEUS_CONTENT_TYPE)
+    response['X-Metrics-Scope'] = 'all-processes' if shared else 'process'
+    return response
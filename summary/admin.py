@@ -1,3 +1,19 @@
 from django.contrib import admin
+from .models import DailyRollup
 
-# Register your models here.
+
+@admin.register(DailyRollup)
+class DailyRollupAdmin(admin.ModelAdmin):
+    """
+    Admin interface for the DailyRollup model (read-only, maintained automatically).
+    """
+    list_display = ['user', 'day', 'type', 'category', 'total_amount', 'transaction_count']
+    list_filter = ['type', 'day']
+    search_fields = ['user__username', 'category__name']
+    ordering = ['-day']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
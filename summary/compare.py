@@ -0,0 +1,83 @@
+"""
+Totals of several periods side by side, from one grouped query.
+
+Periods are whole local days, so they are answered from the daily rollups
+alone. Each period becomes a pair of conditional aggregates
+(``Sum(..., filter=Q(day__range=...))``) over the rows of all periods, so N
+periods cost one pass over the rollups grouped by category and type rather
+than a summary request per period.
+"""
+from django.db.models import Max, Q, Sum
+
+from .models import DailyRollup
+
+
+def compare_queries(user, periods):
+    """
+    Return the rollups of ``periods`` (``(first_day, last_day)`` pairs)
+    grouped by category and type, with ``cents_<i>`` and ``count_<i>`` per
+    period ``i``.
+    """
+    ranges = [Q(day__range=period) for period in periods]
+    any_period = Q()
+    for condition in ranges:
+        any_period |= condition
+    aggregates = {}
+    for index, condition in enumerate(ranges):
+        aggregates[f'cents_{index}'] = Sum('total_cents', filter=condition, default=0)
+        aggregates[f'count_{index}'] = Sum('transaction_count', filter=condition, default=0)
+    return (
+        # The overall bounds let the (user, day) index narrow the scan.
+        DailyRollup.objects.filter(
+            any_period, user=user,
+            day__gte=min(first for first, _ in periods), day__lte=max(last for _, last in periods),
+        )
+        .values('category_id', 'type')
+        .annotate(category_name=Max('category__name'), **aggregates)
+        .order_by()
+    )
+
+
+def _change(value, baseline):
+    return {
+        'change': value - baseline,
+        'percent_change': round((value - baseline) * 100 / abs(baseline), 1) if baseline else None,
+    }
+
+
+def compare(user, periods):
+    """
+    Return per-period totals in cents of a user's income and expenses, in
+    total and per category and type, each with its change from the first
+    period (the baseline).
+    """
+    groups = list(compare_queries(user, periods))
+    indexes = range(len(periods))
+
+    totals = [{'income': 0, 'expense': 0, 'transaction_count': 0} for _ in indexes]
+    categories = []
+    for group in groups:
+        cents = [group[f'cents_{index}'] for index in indexes]
+        counts = [group[f'count_{index}'] for index in indexes]
+        for index in indexes:
+            totals[index][group['type']] += cents[index]
+            totals[index]['transaction_count'] += counts[index]
+        categories.append({
+            'category_id': group['category_id'],
+            'category_name': group['category_name'],
+            'type': group['type'],
+            'periods': [
+                {'total': cents[index], 'transaction_count': counts[index], **_change(cents[index], cents[0])}
+                for index in indexes
+            ],
+        })
+    categories.sort(key=lambda category: (category['category_name'], category['type']))
+
+    baseline = totals[0]
+    for period in totals:
+        period['net'] = period['income'] - period['expense']
+    for period in totals:
+        period['changes'] = {
+            name: _change(period[name], baseline[name]) for name in ('income', 'expense', 'net')
+        }
+    return {'totals': totals, 'categories': categories}
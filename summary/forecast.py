@@ -0,0 +1,159 @@
+"""
+Month-end projections of income and expenses per category.
+
+Everything is computed from the daily rollups of a trailing window, loaded
+with one query and scattered into a dense (category and type) x day array.
+Each series' projection for the rest of the month is the sum of two parts:
+
+- Recurring amounts: days of the month on which the series had a
+  transaction in most of the previous months (rent, salary, subscriptions).
+  Those still ahead this month, and not yet recorded, are added at their
+  median past amount.
+- The trend of everything else: a least-squares line through the series'
+  other daily amounts over the last ``FORECAST_TREND_DAYS`` complete days,
+  extended over the days left in the month and clipped at zero.
+
+All series are fitted at once with array operations; nothing loops per day
+or per category in Python.
+"""
+import calendar
+import math
+import warnings
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+
+from .models import DailyRollup
+
+
+# Share of the observed past months a day of the month must have a
+# transaction in for it to count as recurring, and the fewest months that
+# makes.
+RECURRING_SHARE = 0.75
+RECURRING_MIN_MONTHS = 2
+
+
+def month_start(day, months_back=0):
+    """Return the first day of the month ``months_back`` months before ``day``'s."""
+    index = day.year * 12 + day.month - 1 - months_back
+    return day.replace(year=index // 12, month=index % 12 + 1, day=1)
+
+
+def _window(today):
+    """The first and last day of the rollups a forecast made on ``today`` reads."""
+    history_months = getattr(settings, 'FORECAST_HISTORY_MONTHS', 6)
+    trend_days = getattr(settings, 'FORECAST_TREND_DAYS', 90)
+    start = min(month_start(today, history_months), today - timedelta(days=trend_days))
+    return start, today.replace(day=calendar.monthrange(today.year, today.month)[1])
+
+
+def forecast_queries(user, today):
+    """Return the rollup rows a forecast made on ``today`` is computed from."""
+    start, end = _window(today)
+    return (
+        DailyRollup.objects.filter(user=user, day__gte=start, day__lte=end)
+        .values_list('day', 'category_id', 'category__name', 'type', 'total_cents')
+        .order_by()
+    )
+
+
+def forecast(user, today):
+    """
+    Return a user's projected income and expenses per category at the end
+    of the month ``today`` (their local day) falls in, in cents.
+
+    Each series has ``actual`` (recorded for the month so far, including
+    future-dated transactions), ``recurring`` and ``trend`` (the two parts
+    of the projection for the days after today) and ``projected``, their
+    sum. Today counts as recorded.
+    """
+    rows = list(forecast_queries(user, today))
+    days_in_month = calendar.monthrange(today.year, today.month)[1]
+    result = {
+        'month': f'{today.year:04d}-{today.month:02d}',
+        'as_of': today,
+        'days_remaining': days_in_month - today.day,
+        'series': [],
+    }
+    if not rows:
+        return result
+    days, category_ids, category_names, types, cents = zip(*rows)
+
+    # Dense (series x day) cents over the whole window, whatever days the
+    # rows fall on, so the current month always has all its columns.
+    keys = np.asarray(category_ids, dtype=np.int64) * 2 + (np.asarray(types, dtype=object) == 'income')
+    series_keys, series_index = np.unique(keys, return_inverse=True)
+    window_start, window_end = _window(today)
+    origin = np.datetime64(window_start, 'D')
+    month_origin = np.datetime64(month_start(today), 'D')
+    calendar_days = np.arange(origin, np.datetime64(window_end, 'D') + 1)
+    day_index = (np.asarray(days, dtype='datetime64[D]') - origin).astype(np.int64)
+    daily = np.zeros((len(series_keys), len(calendar_days)), dtype=np.int64)
+    np.add.at(daily, (series_index, day_index), np.asarray(cents, dtype=np.int64))
+
+    months = calendar_days.astype('datetime64[M]')
+    day_of_month = (calendar_days - months.astype('datetime64[D]')).astype(np.int64)
+    current = calendar_days >= month_origin
+    today_index = int((np.datetime64(today, 'D') - origin).astype(np.int64))
+    # History starts at the user's first day with any data, so a new user's
+    # past isn't padded with zeros; only days before today count as history.
+    first_index = min(int(day_index.min()), today_index)
+
+    # Recurring days of the month: a (series x past month x day of month)
+    # array of the amounts, and in how many of the months each day had one.
+    past = ~current & (np.arange(len(calendar_days)) >= first_index)
+    month_number = (months - months[0]).astype(np.int64)
+    observed = 0
+    if past.any():
+        observed = int(month_number[past].max() - month_number[past].min()) + 1
+    by_month = np.zeros((len(series_keys), int(month_number.max()) + 1, 31), dtype=np.int64)
+    by_month[:, month_number[past], day_of_month[past]] = daily[:, past]
+    occurrences = (by_month != 0).sum(axis=1)
+    needed = max(RECURRING_MIN_MONTHS, math.ceil(RECURRING_SHARE * observed))
+    recurring_days = occurrences >= needed
+    with warnings.catch_warnings():
+        # Days that never had an amount leave all-NaN slices; they are not recurring.
+        warnings.simplefilter('ignore', RuntimeWarning)
+        typical = np.nanmedian(np.where(by_month != 0, by_month, np.nan), axis=1)
+    typical = np.where(recurring_days, np.nan_to_num(typical), 0)
+
+    # Recurring days still ahead this month with nothing recorded on them yet.
+    this_month = daily[:, current]
+    ahead = np.zeros(31, dtype=bool)
+    ahead[today.day:days_in_month] = True
+    pending = recurring_days & ahead & (np.pad(this_month, ((0, 0), (0, 31 - days_in_month))) == 0)
+    recurring = np.where(pending, typical, 0).sum(axis=1)
+
+    # Trend of the non-recurring amounts over the last complete days of history.
+    trend_days = getattr(settings, 'FORECAST_TREND_DAYS', 90)
+    trend_start = max(today_index - trend_days, first_index)
+    other = np.where(recurring_days[:, day_of_month], 0, daily)[:, trend_start:today_index]
+    trend = np.zeros(len(series_keys))
+    if other.shape[1] >= 2:
+        x = np.arange(other.shape[1], dtype=float)
+        x -= x.mean()
+        slope = other @ x / (x @ x)
+        level = other.mean(axis=1)
+        # Days after today, on the same axis as ``x``.
+        future = x[-1] + 1 + np.arange(1, days_in_month - today.day + 1)
+        trend = np.clip(level[:, None] + slope[:, None] * future[None, :], 0, None).sum(axis=1)
+
+    actual = this_month.sum(axis=1)
+    recurring = np.rint(recurring).astype(np.int64)
+    trend = np.rint(trend).astype(np.int64)
+    names = dict(zip(category_ids, category_names))
+    for key, actual_cents, recurring_cents, trend_cents in zip(
+        series_keys.tolist(), actual.tolist(), recurring.tolist(), trend.tolist()
+    ):
+        result['series'].append({
+            'category_id': key // 2,
+            'category_name': names[key // 2],
+            'type': 'income' if key % 2 else 'expense',
+            'actual': actual_cents,
+            'recurring': recurring_cents,
+            'trend': trend_cents,
+            'projected': actual_cents + recurring_cents + trend_cents,
+        })
+    result['series'].sort(key=lambda series: (series['category_name'], series['type']))
+    return result
@@ -0,0 +1,207 @@
+"""
+Per-user columnar snapshots of transactions for analytics.
+
+Statistics beyond sums and counts (percentiles, medians, top N) need every
+amount, not rollup totals. ``get_ledger`` loads a user's transactions once
+with a single ``values_list`` query into NumPy arrays and keeps them in a
+process-wide LRU bounded by ``LEDGER_CACHE_MAX_BYTES``, so endpoints compute
+on them with vectorized operations instead of model instances.
+
+A snapshot is tagged with the user's data version from
+``budget_tracker.response_cache``, which every committed transaction write
+bumps, in any process. A snapshot whose version is behind is reloaded, except
+after inserts made by this process: those are appended to the arrays in place
+once committed, and the snapshot moves on to the new version. When the
+versions are not shared between processes nothing is kept: every call loads
+the transactions.
+"""
+import threading
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+
+from budget_tracker.response_cache import get_data_version, versions_are_shared
+from transactions.models import Transaction
+
+
+EPOCH = np.datetime64('1970-01-01', 'D')
+EPOCH_DATETIME = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+COLUMNS = {
+    'id': np.int64,
+    'amount_cents': np.int64,
+    'timestamp_us': np.int64,  # microseconds since the epoch of ``date``
+    'day': np.int32,  # days since the epoch of ``local_date``
+    'category_id': np.int64,
+    'is_income': np.bool_,
+}
+
+# Arrays of equal length, one per column; what statistics are computed on.
+LedgerColumns = namedtuple('LedgerColumns', COLUMNS)
+
+
+def to_microseconds(value):
+    """Exact microseconds since the epoch of an aware datetime."""
+    return (value - EPOCH_DATETIME) // timedelta(microseconds=1)
+
+
+def _columns(rows):
+    """Turn ``(id, amount_cents, date, local_date, category_id, type)`` rows into arrays."""
+    ids, cents, dates, days, categories, types = zip(*rows) if rows else ((),) * 6
+    return {
+        'id': np.asarray(ids, dtype=np.int64),
+        'amount_cents': np.asarray(cents, dtype=np.int64),
+        'timestamp_us': np.asarray([to_microseconds(value) for value in dates], dtype=np.int64),
+        'day': (np.asarray(days, dtype='datetime64[D]') - EPOCH).astype(np.int32),
+        'category_id': np.asarray(categories, dtype=np.int64),
+        'is_income': np.asarray(types, dtype=object) == 'income',
+    }
+
+
+def _rows(queryset):
+    return list(queryset.values_list('id', 'amount_cents', 'date', 'local_date', 'category_id', 'type').order_by('id'))
+
+
+class Ledger:
+    """
+    One user's transactions as parallel arrays (see ``COLUMNS``), ordered by
+    id as loaded. Arrays keep spare capacity so appends rarely copy.
+    """
+
+    def __init__(self, columns, version):
+        self.version = version
+        self.size = len(columns['id'])
+        self._arrays = columns
+
+    def view(self):
+        """Return ``LedgerColumns`` of the rows so far; later appends don't change them."""
+        return LedgerColumns(**{name: array[:self.size] for name, array in self._arrays.items()})
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self._arrays.values())
+
+    def append(self, columns):
+        """Add rows to the end, skipping ids already present. Views taken earlier are unaffected."""
+        new = ~np.isin(columns['id'], self._arrays['id'][:self.size])
+        count = int(new.sum())
+        if not count:
+            return
+        needed = self.size + count
+        capacity = len(self._arrays['id'])
+        if needed > capacity:
+            capacity = max(needed, capacity * 2)
+            grown = {}
+            for name, array in self._arrays.items():
+                grown[name] = np.empty(capacity, dtype=array.dtype)
+                grown[name][:self.size] = array[:self.size]
+            self._arrays = grown
+        for name, array in self._arrays.items():
+            array[self.size:needed] = columns[name][new]
+        self.size = needed
+
+
+class LedgerCache:
+    """Bounded LRU of user id -> ``Ledger``, sized by the bytes its arrays take."""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        return sum(ledger.nbytes for ledger in self._entries.values())
+
+    def get(self, user_id):
+        """Return ``LedgerColumns`` of the user at the current data version, loading them on a miss."""
+        if not versions_are_shared():
+            self.misses += 1
+            return Ledger(_columns(_rows(Transaction.objects.filter(user_id=user_id))), None).view()
+        version = get_data_version(user_id)
+        with self._lock:
+            ledger = self._entries.get(user_id)
+            if ledger is not None and ledger.version == version:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return ledger.view()
+        # Loaded outside the lock; a write committed meanwhile bumps the
+        # version past the one recorded here, so the snapshot is reloaded.
+        ledger = Ledger(_columns(_rows(Transaction.objects.filter(user_id=user_id))), version)
+        self.misses += 1
+        self._store(user_id, ledger)
+        return ledger.view()
+
+    def _store(self, user_id, ledger):
+        with self._lock:
+            self._entries[user_id] = ledger
+            self._entries.move_to_end(user_id)
+            total = self.nbytes
+            # The newest entry stays even if it alone is over the limit.
+            while total > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                total -= evicted.nbytes
+
+    def append(self, user_id, instances):
+        """
+        Add committed new transactions of a user to their cached ledger.
+        Called after the data version was bumped for them; a ledger that
+        was not at the version just before is dropped instead.
+        """
+        if not versions_are_shared():
+            return
+        version = get_data_version(user_id)
+        with self._lock:
+            ledger = self._entries.get(user_id)
+            if ledger is None:
+                return
+            if ledger.version != version - 1:
+                del self._entries[user_id]
+                return
+            rows = [
+                (instance.pk, instance.amount_cents, instance.date, instance.local_date, instance.category_id,
+                 instance.type)
+                for instance in instances
+            ]
+            ledger.append(_columns(rows))
+            ledger.version = version
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_ledger_cache = None
+_ledger_cache_lock = threading.Lock()
+
+
+def get_ledger_cache():
+    """Return the process-wide ledger cache, configured from settings."""
+    global _ledger_cache
+    if _ledger_cache is None:
+        with _ledger_cache_lock:
+            if _ledger_cache is None:
+                _ledger_cache = LedgerCache(max_bytes=getattr(settings, 'LEDGER_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    return _ledger_cache
+
+
+def reset_ledger_cache():
+    """Forget the ledger cache so it is rebuilt from the current settings."""
+    global _ledger_cache
+    with _ledger_cache_lock:
+        _ledger_cache = None
+
+
+def get_ledger(user):
+    """Return the current ``LedgerColumns`` of a user's transactions."""
+    return get_ledger_cache().get(user.pk)
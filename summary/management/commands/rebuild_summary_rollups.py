@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from summary.rollups import rebuild_rollups
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily summary rollups from the raw transactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Only rebuild the rollups of the user with this username',
+        )
+
+    def handle(self, *args, **options):
+        """Drop and recompute the rollup buckets."""
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist")
+
+        bucket_count = rebuild_rollups(user=user)
+
+        scope = f"user '{user.username}'" if user else 'all users'
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {bucket_count} rollup buckets for {scope}.')
+        )
@@ -0,0 +1,37 @@
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def populate_daily_rollups(apps, schema_editor):
+    Transaction = apps.get_model('transactions', 'Transaction')
+    DailyRollup = apps.get_model('summary', 'DailyRollup')
+
+    buckets = (
+        Transaction.objects
+        .annotate(day=TruncDate('date', tzinfo=timezone.get_default_timezone()))
+        .values('user_id', 'category_id', 'type', 'day')
+        .annotate(total_amount=Sum('amount'), transaction_count=Count('id'))
+        .order_by()
+    )
+    DailyRollup.objects.bulk_create(
+        (DailyRollup(**bucket) for bucket in buckets.iterator()),
+        batch_size=1000,
+    )
+
+
+def clear_daily_rollups(apps, schema_editor):
+    apps.get_model('summary', 'DailyRollup').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('summary', '0001_initial'),
+        ('transactions', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_daily_rollups, clear_daily_rollups),
+    ]
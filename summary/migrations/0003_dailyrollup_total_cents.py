@@ -0,0 +1,41 @@
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Cast, Round
+
+
+def totals_to_cents(apps, schema_editor):
+    DailyRollup = apps.get_model('summary', 'DailyRollup')
+    DailyRollup.objects.update(total_cents=Cast(Round(F('total_amount') * 100), models.BigIntegerField()))
+
+
+def cents_to_totals(apps, schema_editor):
+    DailyRollup = apps.get_model('summary', 'DailyRollup')
+    batch = []
+    for rollup in DailyRollup.objects.only('id', 'total_cents').iterator(chunk_size=2000):
+        rollup.total_amount = Decimal(rollup.total_cents).scaleb(-2)
+        batch.append(rollup)
+        if len(batch) >= 2000:
+            DailyRollup.objects.bulk_update(batch, ['total_amount'])
+            batch = []
+    DailyRollup.objects.bulk_update(batch, ['total_amount'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('summary', '0002_populate_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyrollup',
+            name='total_cents',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(totals_to_cents, cents_to_totals),
+        migrations.RemoveField(
+            model_name='dailyrollup',
+            name='total_amount',
+        ),
+    ]
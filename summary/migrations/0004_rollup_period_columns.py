@@ -0,0 +1,64 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:10
+
+from django.db import migrations, models
+
+
+# The period columns as computed when this migration was written, kept here
+# so later changes to the application's helpers cannot alter it.
+def year_month(day):
+    return day.year * 100 + day.month
+
+
+def iso_week(day):
+    year, week, _ = day.isocalendar()
+    return year * 100 + week
+
+
+def fill_period_columns(apps, schema_editor):
+    DailyRollup = apps.get_model('summary', 'DailyRollup')
+    batch = []
+    for pk, day in DailyRollup.objects.values_list('pk', 'day').order_by().iterator(chunk_size=2000):
+        batch.append(DailyRollup(pk=pk, year_month=year_month(day), iso_week=iso_week(day)))
+        if len(batch) >= 2000:
+            DailyRollup.objects.bulk_update(batch, ['year_month', 'iso_week'])
+            batch = []
+    DailyRollup.objects.bulk_update(batch, ['year_month', 'iso_week'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('summary', '0003_dailyrollup_total_cents'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyrollup',
+            name='iso_week',
+            field=models.PositiveIntegerField(editable=False, help_text='ISO week of the day, as the ISO year * 100 + week', null=True),
+        ),
+        migrations.AddField(
+            model_name='dailyrollup',
+            name='year_month',
+            field=models.PositiveIntegerField(editable=False, help_text='Month of the day, as YYYYMM', null=True),
+        ),
+        migrations.RunPython(fill_period_columns, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='dailyrollup',
+            name='iso_week',
+            field=models.PositiveIntegerField(editable=False, help_text='ISO week of the day, as the ISO year * 100 + week'),
+        ),
+        migrations.AlterField(
+            model_name='dailyrollup',
+            name='year_month',
+            field=models.PositiveIntegerField(editable=False, help_text='Month of the day, as YYYYMM'),
+        ),
+        migrations.AddIndex(
+            model_name='dailyrollup',
+            index=models.Index(fields=['user', 'year_month', 'type'], name='summary_dai_user_id_07e35c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dailyrollup',
+            index=models.Index(fields=['user', 'iso_week', 'type'], name='summary_dai_user_id_c3540b_idx'),
+        ),
+    ]
@@ -1,3 +1,70 @@
 from django.db import models
+from django.contrib.auth import get_user_model
 
-# Create your models here.
+from budget_tracker.money import from_cents
+from budget_tracker.periods import iso_week, year_month
+
+
+User = get_user_model()
+
+
+class DailyRollupQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for rollup in objs:
+            rollup.set_periods()
+        return super().bulk_create(objs, *args, **kwargs)
+
+
+class DailyRollup(models.Model):
+    """
+    Running totals of a user's transactions per category, type and day.
+
+    Kept up to date by the signal handlers in ``summary.signals`` so summary
+    endpoints can aggregate over buckets instead of raw transactions.
+    """
+    TRANSACTION_TYPES = [
+        ('income', 'Income'),
+        ('expense', 'Expense'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_rollups')
+    category = models.ForeignKey('categories.Category', on_delete=models.CASCADE, related_name='daily_rollups')
+    type = models.CharField(max_length=10, choices=TRANSACTION_TYPES)
+    day = models.DateField(help_text="Local calendar day the transactions fall on")
+    year_month = models.PositiveIntegerField(editable=False, help_text="Month of the day, as YYYYMM")
+    iso_week = models.PositiveIntegerField(
+        editable=False, help_text="ISO week of the day, as the ISO year * 100 + week"
+    )
+    total_cents = models.BigIntegerField(default=0)
+    transaction_count = models.PositiveIntegerField(default=0)
+
+    objects = DailyRollupQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'category', 'type', 'day'], name='unique_daily_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'day']),
+            # Series by month and week stream their groups out of these.
+            models.Index(fields=['user', 'year_month', 'type']),
+            models.Index(fields=['user', 'iso_week', 'type']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.day} {self.type}: {self.total_amount} ({self.transaction_count})"
+
+    @property
+    def total_amount(self):
+        return from_cents(self.total_cents)
+
+    def set_periods(self):
+        """Set the month and ISO week columns from ``day``, for grouping series by period."""
+        self.year_month = year_month(self.day)
+        self.iso_week = iso_week(self.day)
+
+    def save(self, *args, **kwargs):
+        self.set_periods()
+        super().save(*args, **kwargs)
@@ -0,0 +1,281 @@
+"""
+Maintenance and querying of the per-day transaction rollups.
+
+Summaries are answered from ``DailyRollup`` buckets for every whole local day
+inside the requested range. Days only partially covered by ``start_date`` /
+``end_date`` are aggregated from the raw transactions, so results are identical
+to aggregating the transactions directly.
+"""
+from datetime import timedelta
+from functools import partial
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.utils import timezone
+
+from budget_tracker.async_views import gather_queries
+from budget_tracker.periods import day_start, local_day, user_timezone
+from transactions.models import Transaction
+from .models import DailyRollup
+
+
+BUCKET_FIELDS = ('user_id', 'category_id', 'type', 'day')
+
+
+def _bucket(state):
+    # Transactions carry their local day in the owner's time zone.
+    return (state.user_id, state.category_id, state.type, state.local_date)
+
+
+def apply_state(state, sign):
+    """Add (sign=1) or remove (sign=-1) one transaction's state to its bucket."""
+    if state is None:
+        return
+    _apply_delta(_bucket(state), state.amount_cents * sign, sign)
+
+
+def apply_change(previous, current):
+    """Move a transaction from its previous state to its current one."""
+    if previous is None:
+        apply_state(current, 1)
+        return
+    if _bucket(previous) == _bucket(current):
+        if previous.amount_cents != current.amount_cents:
+            _apply_delta(_bucket(current), current.amount_cents - previous.amount_cents, 0)
+        return
+    apply_state(previous, -1)
+    apply_state(current, 1)
+
+
+def apply_states(states):
+    """
+    Add many new transactions at once. Deltas are merged per bucket, existing
+    buckets are incremented with one batched UPDATE and missing ones are
+    created with one bulk insert.
+    """
+    deltas = {}
+    for state in states:
+        bucket = _bucket(state)
+        cents, count = deltas.get(bucket, (0, 0))
+        deltas[bucket] = (cents + state.amount_cents, count + 1)
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        existing = DailyRollup.objects.filter(
+            user_id__in={bucket[0] for bucket in deltas},
+            day__in={bucket[3] for bucket in deltas},
+        ).values_list('pk', *BUCKET_FIELDS)
+        increments = []
+        for pk, *bucket in existing:
+            delta = deltas.pop(tuple(bucket), None)
+            if delta is not None:
+                increments.append((*delta, pk))
+        if increments:
+            table = connection.ops.quote_name(DailyRollup._meta.db_table)
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f'UPDATE {table} SET total_cents = total_cents + %s, '
+                    f'transaction_count = transaction_count + %s WHERE id = %s',
+                    increments,
+                )
+        try:
+            with transaction.atomic():
+                DailyRollup.objects.bulk_create(
+                    [
+                        DailyRollup(
+                            user_id=user_id, category_id=category_id, type=transaction_type, day=day,
+                            total_cents=cents, transaction_count=count,
+                        )
+                        for (user_id, category_id, transaction_type, day), (cents, count) in deltas.items()
+                    ],
+                    batch_size=1000,
+                )
+        except IntegrityError:
+            # A concurrent writer created some of the buckets; fall back to upserts.
+            for bucket, (cents, count) in deltas.items():
+                _apply_delta(bucket, cents, count)
+
+
+def _apply_delta(bucket, cents, count):
+    key = dict(zip(BUCKET_FIELDS, bucket))
+    with transaction.atomic():
+        updated = DailyRollup.objects.filter(**key).update(
+            total_cents=F('total_cents') + cents,
+            transaction_count=F('transaction_count') + count,
+        )
+        if not updated:
+            if count < 0:
+                # Bucket already gone (e.g. the user is being deleted).
+                return
+            try:
+                with transaction.atomic():
+                    DailyRollup.objects.create(total_cents=cents, transaction_count=count, **key)
+            except IntegrityError:
+                DailyRollup.objects.filter(**key).update(
+                    total_cents=F('total_cents') + cents,
+                    transaction_count=F('transaction_count') + count,
+                )
+        elif count < 0:
+            DailyRollup.objects.filter(transaction_count=0, **key).delete()
+
+
+def rebuild_rollups(user=None):
+    """
+    Recompute rollups from the raw transactions, for one user or everyone.
+    Returns the number of buckets written.
+    """
+    transactions = Transaction.objects.all()
+    rollups = DailyRollup.objects.all()
+    if user is not None:
+        transactions = transactions.filter(user=user)
+        rollups = rollups.filter(user=user)
+
+    buckets = (
+        transactions
+        .values('user_id', 'category_id', 'type', day=F('local_date'))
+        .annotate(total_cents=Sum('amount_cents'), transaction_count=Count('id'))
+        .order_by()
+    )
+    with transaction.atomic():
+        rollups.delete()
+        created = DailyRollup.objects.bulk_create(
+            (DailyRollup(**bucket) for bucket in buckets.iterator()),
+            batch_size=1000,
+        )
+    return len(created)
+
+
+def summarize(user, start_date=None, end_date=None, transaction_type=None):
+    """
+    Aggregate a user's transactions between ``start_date`` and ``end_date``
+    (both inclusive, either may be None) grouped by category name and type.
+
+    Returns a list of dicts with ``category__name``, ``type``,
+    ``total_cents`` and ``transaction_count`` keys.
+    """
+    rollup_rows, edge_rows = summary_queries(user, start_date, end_date, transaction_type)
+    return fold_summary(
+        rollup_rows if rollup_rows is not None else [],
+        edge_rows if edge_rows is not None else [],
+    )
+
+
+async def asummarize(user, start_date=None, end_date=None, transaction_type=None):
+    """``summarize`` for async views; the rollup and partial-day queries run concurrently."""
+    rollup_rows, edge_rows = summary_queries(user, start_date, end_date, transaction_type)
+    queries = [rows for rows in (rollup_rows, edge_rows) if rows is not None]
+    results = iter(await gather_queries(*(partial(list, rows) for rows in queries)))
+    return fold_summary(
+        next(results) if rollup_rows is not None else [],
+        next(results) if edge_rows is not None else [],
+    )
+
+
+def split_range(user, start_date=None, end_date=None):
+    """
+    Split a user's inclusive datetime range (either bound may be None) at
+    local day boundaries. Returns ``(rollups, edges)``: the user's rollups of
+    the whole days inside the range and their transactions on its partial
+    first and last days; either is None when the range has no such days.
+    """
+    tz = user_timezone(user)
+    if start_date is not None and timezone.is_naive(start_date):
+        start_date = timezone.make_aware(start_date, tz)
+    if end_date is not None and timezone.is_naive(end_date):
+        end_date = timezone.make_aware(end_date, tz)
+
+    rollups = DailyRollup.objects.filter(user=user)
+    raw = Transaction.objects.filter(user=user)
+
+    # Whole days inside the range come from the rollups: [first_day, end_day).
+    first_day = end_day = None
+    if start_date is not None:
+        first_day = local_day(start_date, tz)
+        if day_start(first_day, tz) < start_date:
+            first_day += timedelta(days=1)
+        rollups = rollups.filter(day__gte=first_day)
+    if end_date is not None:
+        end_day = local_day(end_date + timedelta(microseconds=1), tz)
+        rollups = rollups.filter(day__lt=end_day)
+
+    edges = None
+    if first_day is not None and end_day is not None and first_day >= end_day:
+        # The range lies within a single day, so there is nothing to reuse.
+        rollups = None
+        edges = Q(date__gte=start_date, date__lte=end_date)
+    else:
+        if first_day is not None and day_start(first_day, tz) > start_date:
+            edges = Q(date__gte=start_date, date__lt=day_start(first_day, tz))
+        if end_day is not None and day_start(end_day, tz) <= end_date:
+            last = Q(date__gte=day_start(end_day, tz), date__lte=end_date)
+            edges = last if edges is None else edges | last
+    return rollups, None if edges is None else raw.filter(edges)
+
+
+def summary_queries(user, start_date=None, end_date=None, transaction_type=None):
+    """
+    Return the two independent querysets behind ``summarize``: rollup groups
+    of the whole days in the range and raw rows of its partial days. Either
+    is None when the range needs none of it.
+    """
+    rollups, edges = split_range(user, start_date, end_date)
+    rollup_rows = None
+    if rollups is not None:
+        if transaction_type:
+            rollups = rollups.filter(type=transaction_type)
+        # Grouped by category id rather than name so the groups come out of
+        # the (user, category, type, day) unique index in order, without a sort.
+        rollup_rows = (
+            rollups.values('category_id', 'type')
+            .annotate(
+                category_name=Max('category__name'),
+                total_cents=Sum('total_cents'),
+                transaction_count=Sum('transaction_count'),
+            )
+            .order_by()
+        )
+    edge_rows = None
+    if edges is not None:
+        if transaction_type:
+            edges = edges.filter(type=transaction_type)
+        # At most two partial days of transactions; summed in Python, not grouped in SQL.
+        edge_rows = edges.values_list('category__name', 'type', 'amount_cents').order_by()
+    return rollup_rows, edge_rows
+
+
+def fold_summary(rollup_rows, edge_rows):
+    """Merge the results of ``summary_queries`` into ``summarize``'s groups."""
+    totals = {}
+
+    def add(category_name, transaction_type, cents, count):
+        bucket = totals.setdefault((category_name, transaction_type), {
+            'category__name': category_name,
+            'type': transaction_type,
+            'total_cents': 0,
+            'transaction_count': 0,
+        })
+        bucket['total_cents'] += cents
+        bucket['transaction_count'] += count
+
+    for row in rollup_rows:
+        add(row['category_name'], row['type'], row['total_cents'], row['transaction_count'])
+    for category_name, transaction_type, cents in edge_rows:
+        add(category_name, transaction_type, cents, 1)
+    return list(totals.values())
+
+
+def totals(user):
+    """Return all-time income/expense totals (in cents) and counts, read from the rollups only."""
+    result = {
+        'total_income': 0,
+        'total_expenses': 0,
+        'transaction_count': 0,
+    }
+    # Folded from the per-category groups, which need no sort to compute.
+    for row in summarize(user):
+        key = 'total_income' if row['type'] == 'income' else 'total_expenses'
+        result[key] += row['total_cents']
+        result['transaction_count'] += row['transaction_count']
+    result['net_balance'] = result['total_income'] - result['total_expenses']
+    return result
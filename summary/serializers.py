@@ -1,25 +1,36 @@
 from rest_framework import serializers
-from decimal import Decimal
+
+from budget_tracker.money import CentsField
 
 
 class SummarySerializer(serializers.Serializer):
     """
     Serializer for financial summary data.
     """
-    total_income = serializers.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
-    total_expenses = serializers.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
-    net_balance = serializers.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    total_income = CentsField(default=0)
+    total_expenses = CentsField(default=0)
+    net_balance = CentsField(default=0)
     transaction_count = serializers.IntegerField(default=0)
     income_count = serializers.IntegerField(default=0)
     expense_count = serializers.IntegerField(default=0)
     category_breakdown = serializers.DictField(default=dict)
 
 
+class SummaryTotalsSerializer(serializers.Serializer):
+    """
+    Serializer for the all-time totals sent along with synced changes.
+    """
+    total_income = CentsField(max_digits=14)
+    total_expenses = CentsField(max_digits=14)
+    net_balance = CentsField(max_digits=14)
+    transaction_count = serializers.IntegerField()
+
+
 class CategoryBreakdownSerializer(serializers.Serializer):
     """
     Serializer for category-wise spending breakdown.
     """
     category_name = serializers.CharField()
-    total_amount = serializers.DecimalField(max_digits=10, decimal_places=2)
+    total_amount = CentsField()
     transaction_count = serializers.IntegerField()
     transaction_type = serializers.CharField()
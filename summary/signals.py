@@ -0,0 +1,56 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from transactions.models import Transaction
+from transactions.signals import transactions_bulk_created, transactions_localized
+from . import rollups
+from .ledger import get_ledger_cache
+
+
+@receiver(post_save, sender=Transaction)
+def update_rollups_on_save(sender, instance, created, raw=False, **kwargs):
+    """Move the saved transaction into its daily rollup bucket."""
+    if raw:
+        return
+    previous = None if created else instance.get_previous_state()
+    rollups.apply_change(previous, instance.get_state())
+
+
+@receiver(post_delete, sender=Transaction)
+def update_rollups_on_delete(sender, instance, **kwargs):
+    """Remove the deleted transaction from its daily rollup bucket."""
+    rollups.apply_state(instance.get_previous_state() or instance.get_state(), -1)
+
+
+@receiver(transactions_bulk_created)
+def update_rollups_on_bulk_create(sender, instances, **kwargs):
+    """Add bulk inserted transactions to their buckets in a few queries."""
+    rollups.apply_states([instance.get_state() for instance in instances])
+
+
+@receiver(transactions_localized)
+def rebuild_rollups_on_localize(sender, user, **kwargs):
+    """Buckets are local days; rebuild them after the user's time zone changed."""
+    rollups.rebuild_rollups(user)
+
+
+@receiver(post_save, sender=Transaction)
+def append_to_ledger_on_create(sender, instance, created, raw=False, **kwargs):
+    """Patch the owner's cached ledger in place once the insert is committed."""
+    if created and not raw:
+        transaction.on_commit(lambda: get_ledger_cache().append(instance.user_id, [instance]))
+
+
+@receiver(transactions_bulk_created)
+def append_to_ledger_on_bulk_create(sender, instances, **kwargs):
+    """Likewise for bulk inserts, one append per user."""
+    by_user = defaultdict(list)
+    for instance in instances:
+        by_user[instance.user_id].append(instance)
+    for user_id, user_instances in by_user.items():
+        transaction.on_commit(
+            lambda user_id=user_id, user_instances=user_instances: get_ledger_cache().append(user_id, user_instances)
+        )
@@ -0,0 +1,102 @@
+"""
+Transaction statistics computed on a user's ``LedgerColumns``.
+
+Every function takes the columns and a boolean mask selecting the rows to
+describe (see ``select``) and works on whole arrays: no Python loop runs per
+transaction. Amounts are integer cents; averages and percentiles are
+rounded to the nearest cent.
+"""
+import numpy as np
+
+from .ledger import to_microseconds
+
+
+DEFAULT_PERCENTILES = (50, 75, 90, 95, 99)
+
+
+def select(columns, start_date=None, end_date=None, transaction_type=None, category_id=None):
+    """
+    Return a mask of the transactions dated between the aware datetimes
+    ``start_date`` and ``end_date`` (inclusive, either may be None) of one
+    type and category, if given.
+    """
+    mask = np.ones(len(columns.id), dtype=bool)
+    if start_date is not None:
+        mask &= columns.timestamp_us >= to_microseconds(start_date)
+    if end_date is not None:
+        mask &= columns.timestamp_us <= to_microseconds(end_date)
+    if transaction_type is not None:
+        mask &= columns.is_income == (transaction_type == 'income')
+    if category_id is not None:
+        mask &= columns.category_id == category_id
+    return mask
+
+
+def _cents(values):
+    return np.rint(values).astype(np.int64)
+
+
+def percentiles(columns, mask, percents=DEFAULT_PERCENTILES):
+    """
+    Return the count, total, mean, min and max of the selected amounts and
+    their ``percents`` percentiles (linear interpolation), in cents; all but
+    the count are None when nothing is selected.
+    """
+    amounts = columns.amount_cents[mask]
+    if not len(amounts):
+        return {
+            'count': 0, 'total': 0, 'mean': None, 'min': None, 'max': None,
+            'percentiles': {percent: None for percent in percents},
+        }
+    values = _cents(np.percentile(amounts, percents))
+    return {
+        'count': len(amounts),
+        'total': int(amounts.sum()),
+        'mean': int(_cents(amounts.mean())),
+        'min': int(amounts.min()),
+        'max': int(amounts.max()),
+        'percentiles': dict(zip(percents, values.tolist())),
+    }
+
+
+def category_medians(columns, mask):
+    """
+    Return ``(category_id, count, total, mean, median)`` per category of the
+    selected transactions, in cents. Amounts are sorted by category and
+    amount once; each category's median is then read at the middle of its
+    run.
+    """
+    categories = columns.category_id[mask]
+    amounts = columns.amount_cents[mask]
+    if not len(amounts):
+        return []
+    order = np.lexsort((amounts, categories))
+    categories, amounts = categories[order], amounts[order]
+    starts = np.flatnonzero(np.r_[True, categories[1:] != categories[:-1]])
+    counts = np.diff(np.r_[starts, len(amounts)])
+    totals = np.add.reduceat(amounts, starts)
+    lower = amounts[starts + (counts - 1) // 2]
+    upper = amounts[starts + counts // 2]
+    medians = _cents((lower + upper) / 2)
+    means = _cents(totals / counts)
+    return list(zip(
+        categories[starts].tolist(), counts.tolist(), totals.tolist(), means.tolist(), medians.tolist(),
+    ))
+
+
+def largest(columns, mask, limit):
+    """
+    Return the ids of the ``limit`` largest selected transactions, largest
+    first; equal amounts go newest first, then by highest id.
+    """
+    ids = columns.id[mask]
+    amounts = columns.amount_cents[mask]
+    timestamps = columns.timestamp_us[mask]
+    if limit < len(amounts):
+        # Only the candidates are sorted, not every amount: those at least
+        # as large as the limit-th largest, every tie with it included.
+        threshold = -np.partition(-amounts, limit - 1)[limit - 1]
+        candidates = np.flatnonzero(amounts >= threshold)
+        ids, amounts, timestamps = ids[candidates], amounts[candidates], timestamps[candidates]
+    order = np.lexsort((-ids, -timestamps, -amounts))
+    return ids[order][:limit].tolist()
@@ -1,3 +1,455 @@
+import statistics
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Sum
 from django.test import TestCase
+from django.utils import timezone
+
+from budget_tracker.money import from_cents
+from budget_tracker.periods import user_timezone
+from budget_tracker.testing import QueryBudgetTestCase
+from categories.models import Category
+from transactions.importers import TransactionImporter
+from transactions.models import Transaction
+from .forecast import forecast, month_start
+from .rollups import summarize, totals
+
+
+class SummaryEndpointQueryBudgetTests(QueryBudgetTestCase):
+    """
+    Summaries are read from the daily rollups, so their query counts must
+    not depend on how many transactions the user has.
+    """
+
+    def date_range(self, days):
+        end = timezone.localtime()
+        start = end - timedelta(days=days)
+        return f'start_date={start.isoformat()}&end_date={end.isoformat()}'.replace('+', '%2B')
+
+    def test_financial_summary(self):
+        response = self.assertQueryBudget('get', '/api/summary/', max_queries=2)
+        self.assertEqual(response.data['transaction_count'], self.LARGE_LEDGER)
+
+    def test_financial_summary_date_range(self):
+        # Partial first and last days are aggregated from raw transactions.
+        self.assertQueryBudget('get', f'/api/summary/?{self.date_range(180)}', max_queries=3)
+
+    def test_financial_summary_whole_days(self):
+        start = (timezone.localdate() - timedelta(days=365)).isoformat()
+        self.assertQueryBudget('get', f'/api/summary/?start_date={start}', max_queries=3)
+
+    def test_financial_summary_month(self):
+        # A calendar month is whole local days, so only rollups are read.
+        month = timezone.localdate().strftime('%Y-%m')
+        self.assertQueryBudget('get', f'/api/summary/?month={month}', max_queries=2)
+
+    def test_category_summary(self):
+        response = self.assertQueryBudget('get', '/api/summary/categories/', max_queries=2)
+        self.assertEqual(
+            sum(row['transaction_count'] for row in response.data['results']), self.LARGE_LEDGER
+        )
+
+    def test_category_summary_by_type_and_date_range(self):
+        self.assertQueryBudget('get', f'/api/summary/categories/?type=expense&{self.date_range(90)}', max_queries=3)
+
+    def test_financial_summary_async(self):
+        path = f'/api/summary/?{self.date_range(180)}'
+        response = self.assertQueryBudget('get', path, max_queries=3, asgi=True)
+        self.reset_caches()
+        self.assertEqual(response.json(), self.request(self.large_user, 'get', path)[0].json())
+
+    def test_category_summary_async(self):
+        response = self.assertQueryBudget('get', '/api/summary/categories/', max_queries=2, asgi=True)
+        self.assertEqual(
+            sum(row['transaction_count'] for row in response.json()['results']), self.LARGE_LEDGER
+        )
+
+    def test_timeseries(self):
+        response = self.assertQueryBudget('get', '/api/summary/timeseries/?granularity=month', max_queries=2)
+        points = response.data['results']
+        self.assertEqual(response.data['count'], len(points))
+        self.assertEqual(sum(point['transaction_count'] for point in points), self.LARGE_LEDGER)
+
+    def test_timeseries_by_category_and_date_range(self):
+        # Partial first and last days are bucketed from raw transactions.
+        self.assertQueryBudget(
+            'get', f'/api/summary/timeseries/?granularity=week&by_category=true&{self.date_range(180)}',
+            max_queries=3,
+        )
+
+    def test_timeseries_daily_month(self):
+        month = timezone.localdate().strftime('%Y-%m')
+        response = self.assertQueryBudget(
+            'get', f'/api/summary/timeseries/?granularity=day&month={month}', max_queries=2,
+        )
+        self.assertEqual(response.data['results'][0]['period'], f'{month}-01')
+
+    def test_percentiles(self):
+        # One query loads the ledger; the statistics are computed in memory.
+        response = self.assertQueryBudget(
+            'get', '/api/summary/stats/percentiles/?percentiles=50,90,99.5', max_queries=2,
+        )
+        self.assertEqual([row['percentile'] for row in response.data['percentiles']], [50, 90, 99.5])
+        self.assertLessEqual(response.data['min'], response.data['percentiles'][0]['amount'])
+
+    def test_category_stats_by_date_range(self):
+        response = self.assertQueryBudget(
+            'get', f'/api/summary/stats/categories/?type=all&{self.date_range(180)}', max_queries=3,
+        )
+        for row in response.data['results']:
+            self.assertIsNotNone(row['category_name'])
+
+    def test_largest_transactions(self):
+        response = self.assertQueryBudget('get', '/api/summary/stats/largest/?limit=25', max_queries=3)
+        amounts = [float(row['amount']) for row in response.data['results']]
+        self.assertEqual(len(amounts), 25)
+        self.assertEqual(amounts, sorted(amounts, reverse=True))
+
+    def test_forecast(self):
+        # Projected from one query over the trailing window's daily rollups.
+        response = self.assertQueryBudget('get', '/api/summary/forecast/', max_queries=2)
+        self.assertEqual(response.data['as_of'], timezone.localdate().isoformat())
+        for totals in (response.data['income'], response.data['expenses']):
+            self.assertEqual(totals['projected'], totals['actual'] + totals['recurring'] + totals['trend'])
+        self.assertEqual(self.request(self.large_user, 'get', '/api/summary/forecast/')[0]['X-Cache'], 'HIT')
+
+    def test_compare_periods(self):
+        # Every period is a conditional aggregate of the same grouped query.
+        periods = '&'.join(f'period={period}' for period in ('2024', '2025', '2025-06', '2025-W10'))
+        response = self.assertQueryBudget('get', f'/api/summary/compare/?{periods}', max_queries=2)
+        self.assertEqual([period['period'] for period in response.data['periods']], ['2024', '2025', '2025-06', '2025-W10'])
+        for period in response.data['periods']:
+            summary = self.request(
+                self.large_user, 'get', f"/api/summary/?start_date={period['start_date']}&end_date={period['end_date']}",
+            )[0].data
+            self.assertEqual(period['transaction_count'], summary['transaction_count'])
+
+    def test_compare_defaults_to_previous_month(self):
+        response = self.assertQueryBudget('get', '/api/summary/compare/', max_queries=2)
+        self.assertEqual(response.data['periods'][1]['period'], timezone.localdate().strftime('%Y-%m'))
+        self.assertEqual(self.request(self.large_user, 'get', '/api/summary/compare/?period=2025')[0].status_code, 400)
+
+
+class SummaryValueTests(QueryBudgetTestCase):
+    """
+    Summary payloads come from rollups, calendar columns and the ledger;
+    each is checked against sums computed here from the transactions'
+    dates and amounts alone.
+    """
+
+    def setUp(self):
+        self.reset_caches()
+        self.tz = user_timezone(self.large_user)
+        self.today = timezone.localtime(timezone.now(), self.tz).date()
+        self.rows = [
+            (timezone.localtime(moment, self.tz).date(), transaction_type, cents, category_id)
+            for moment, transaction_type, cents, category_id in self.large_user.transactions.values_list(
+                'date', 'type', 'amount_cents', 'category_id'
+            )
+        ]
+
+    def get(self, path):
+        response = self.request(self.large_user, 'get', path)[0]
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def totals(self, rows):
+        income = sum(cents for _, transaction_type, cents, _ in rows if transaction_type == 'income')
+        expense = sum(cents for _, transaction_type, cents, _ in rows if transaction_type == 'expense')
+        return from_cents(income), from_cents(expense), len(rows)
+
+    def between(self, first, last):
+        return [row for row in self.rows if first <= row[0] <= last]
+
+    def test_calendar_columns(self):
+        for moment, local_date, period, week in self.large_user.transactions.values_list(
+            'date', 'local_date', 'year_month', 'iso_week'
+        ):
+            day = timezone.localtime(moment, self.tz).date()
+            iso_year, iso_number, _ = day.isocalendar()
+            self.assertEqual((local_date, period, week), (day, day.year * 100 + day.month, iso_year * 100 + iso_number))
+
+    def test_financial_summary(self):
+        first = self.today - timedelta(days=90)
+        data = self.get(f'/api/summary/?start_date={first}&end_date={self.today}')
+        self.assertEqual(
+            (Decimal(data['total_income']), Decimal(data['total_expenses']), data['transaction_count']),
+            self.totals(self.between(first, self.today)),
+        )
+
+    def test_category_summary(self):
+        expected = defaultdict(int)
+        for _, transaction_type, cents, category_id in self.rows:
+            expected[Category.objects.get(pk=category_id).name, transaction_type] += cents
+        data = self.get('/api/summary/categories/')
+        self.assertEqual(
+            {(row['category_name'], row['transaction_type']): row['total_amount'] for row in data['results']},
+            {key: from_cents(cents) for key, cents in expected.items()},
+        )
+
+    def test_timeseries(self):
+        for granularity, start in (
+            ('month', lambda day: day.replace(day=1)),
+            ('week', lambda day: day - timedelta(days=day.weekday())),
+            ('day', lambda day: day),
+        ):
+            first = self.today - timedelta(days=120)
+            data = self.get(f'/api/summary/timeseries/?granularity={granularity}&start_date={first}&end_date={self.today}')
+            expected = defaultdict(list)
+            for row in self.between(first, self.today):
+                expected[start(row[0])].append(row)
+            points = {
+                point['period']: (point['income'], point['expense'], point['transaction_count'])
+                for point in data['results'] if point['transaction_count']
+            }
+            self.assertEqual(points, {str(period): self.totals(rows) for period, rows in expected.items()}, granularity)
+
+    def test_compare(self):
+        month = self.today.replace(day=1)
+        monday = self.today - timedelta(days=self.today.weekday())
+        labels = [str(self.today.year - 1), str(self.today.year), f'{month:%Y-%m}', f'{monday:%G-W%V}']
+        data = self.get('/api/summary/compare/?' + '&'.join(f'period={label}' for label in labels))
+        for period in data['periods']:
+            first, last = date.fromisoformat(period['start_date']), date.fromisoformat(period['end_date'])
+            self.assertEqual(
+                (period['total_income'], period['total_expenses'], period['transaction_count']),
+                self.totals(self.between(first, last)),
+                period['period'],
+            )
+
+    def test_forecast_actuals(self):
+        expected = defaultdict(int)
+        for day, transaction_type, cents, category_id in self.rows:
+            if (day.year, day.month) == (self.today.year, self.today.month):
+                expected[category_id, transaction_type] += cents
+        data = self.get('/api/summary/forecast/')
+        self.assertEqual(
+            {
+                (row['category_id'], row['transaction_type']): row['actual']
+                for row in data['categories'] if row['actual']
+            },
+            {key: from_cents(cents) for key, cents in expected.items()},
+        )
+
+    def test_statistics(self):
+        expenses = sorted(cents for _, transaction_type, cents, _ in self.rows if transaction_type == 'expense')
+        data = self.get('/api/summary/stats/percentiles/?percentiles=50')
+        self.assertEqual(
+            (data['count'], data['total_amount'], data['min'], data['max'], data['percentiles'][0]['amount']),
+            (
+                len(expenses), from_cents(sum(expenses)), from_cents(expenses[0]), from_cents(expenses[-1]),
+                from_cents(round(statistics.median(expenses))),
+            ),
+        )
+
+        by_category = defaultdict(list)
+        for _, transaction_type, cents, category_id in self.rows:
+            if transaction_type == 'expense':
+                by_category[category_id].append(cents)
+        data = self.get('/api/summary/stats/categories/')
+        self.assertEqual(
+            {row['category_id']: (row['transaction_count'], row['total_amount'], row['median']) for row in data['results']},
+            {
+                category_id: (len(amounts), from_cents(sum(amounts)), from_cents(round(statistics.median(amounts))))
+                for category_id, amounts in by_category.items()
+            },
+        )
+
+        data = self.get('/api/summary/stats/largest/?limit=25')
+        self.assertEqual(
+            [row['id'] for row in data['results']],
+            list(
+                self.large_user.transactions.filter(type='expense')
+                .order_by('-amount_cents', '-date', '-id').values_list('id', flat=True)[:25]
+            ),
+        )
+
+    def test_largest_ties(self):
+        # Equal amounts come back newest first, then by id, however many tie.
+        Transaction.objects.filter(pk__in=self.large_user.transactions.filter(type='expense').values('pk')[:40]).update(
+            amount_cents=10 ** 9
+        )
+        for limit in (1, 7, 25):
+            data = self.get(f'/api/summary/stats/largest/?limit={limit}')
+            self.assertEqual(
+                [row['id'] for row in data['results']],
+                list(
+                    self.large_user.transactions.filter(type='expense')
+                    .order_by('-amount_cents', '-date', '-id').values_list('id', flat=True)[:limit]
+                ),
+                limit,
+            )
+
+
+class RollupConsistencyTests(TestCase):
+    """
+    Summaries read from the rollups must equal a ``Sum`` over the
+    transactions themselves after every kind of write.
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='auditor', email='auditor@example.com', password='x')
+        self.tz = user_timezone(self.user)
+        self.food = Category.objects.create(name='Food')
+        self.rent = Category.objects.create(name='Rent')
+
+    def at(self, day, hour, minute=0):
+        return timezone.make_aware(datetime.combine(day, time(hour, minute)), self.tz)
+
+    def add(self, category, amount, when, transaction_type='expense'):
+        return Transaction.objects.create(
+            user=self.user, category=category, type=transaction_type, amount=amount, date=when,
+        )
+
+    def ranges(self):
+        yield None, None
+        # Whole days only, and partial first and last days.
+        yield self.at(date(2025, 3, 2), 0), self.at(date(2025, 3, 4), 0) - timedelta(microseconds=1)
+        yield self.at(date(2025, 3, 1), 12), self.at(date(2025, 3, 3), 9, 30)
+        yield self.at(date(2025, 3, 1), 8, 15), None
+        yield None, self.at(date(2025, 3, 3), 18)
+        # Within a single day.
+        yield self.at(date(2025, 3, 2), 6), self.at(date(2025, 3, 2), 20)
+
+    def assertMatchesTransactions(self):
+        for start, end in self.ranges():
+            for transaction_type in (None, 'income', 'expense'):
+                expected = Transaction.objects.filter(user=self.user)
+                if start is not None:
+                    expected = expected.filter(date__gte=start)
+                if end is not None:
+                    expected = expected.filter(date__lte=end)
+                if transaction_type:
+                    expected = expected.filter(type=transaction_type)
+                expected = expected.values('category__name', 'type').annotate(
+                    total_cents=Sum('amount_cents'), transaction_count=Count('id'),
+                )
+                self.assertCountEqual(
+                    summarize(self.user, start, end, transaction_type), list(expected),
+                    f'{start} - {end} ({transaction_type or "all"})',
+                )
+
+        expected = Transaction.objects.filter(user=self.user)
+        income = expected.filter(type='income').aggregate(total=Sum('amount_cents', default=0))['total']
+        expenses = expected.filter(type='expense').aggregate(total=Sum('amount_cents', default=0))['total']
+        self.assertEqual(totals(self.user), {
+            'total_income': income,
+            'total_expenses': expenses,
+            'transaction_count': expected.count(),
+            'net_balance': income - expenses,
+        })
+
+    def populate(self):
+        day = date(2025, 3, 1)
+        return [
+            self.add(self.food, '12.50', self.at(day, 7)),
+            self.add(self.food, '8.00', self.at(day, 13)),
+            self.add(self.rent, '900.00', self.at(day + timedelta(days=1), 0)),
+            self.add(self.food, '20.00', self.at(day + timedelta(days=2), 9, 30)),
+            self.add(self.rent, '2500.00', self.at(day + timedelta(days=2), 23, 59), 'income'),
+            self.add(self.food, '4.25', self.at(day + timedelta(days=3), 10)),
+        ]
+
+    def test_create(self):
+        self.populate()
+        self.assertMatchesTransactions()
+
+    def test_amount_change(self):
+        transaction = self.populate()[1]
+        transaction.amount = '80.00'
+        transaction.save()
+        self.assertMatchesTransactions()
+
+    def test_category_change(self):
+        transaction = self.populate()[0]
+        transaction.category = self.rent
+        transaction.save()
+        self.assertMatchesTransactions()
+
+    def test_type_change(self):
+        transaction = self.populate()[3]
+        transaction.type = 'income'
+        transaction.save()
+        self.assertMatchesTransactions()
+
+    def test_day_change(self):
+        transactions = self.populate()
+        # Across a day boundary, and within the same day.
+        transactions[0].date = self.at(date(2025, 3, 3), 9)
+        transactions[0].save()
+        transactions[5].date = self.at(date(2025, 3, 4), 22)
+        transactions[5].save()
+        self.assertMatchesTransactions()
+
+    def test_save_of_unloaded_instance(self):
+        # Saved without being loaded first, so its previous state is read back.
+        transaction = self.populate()[2]
+        Transaction(
+            pk=transaction.pk, user=self.user, category=self.food, type='expense', amount='3.00',
+            date=self.at(date(2025, 3, 3), 10), created_at=transaction.created_at,
+        ).save()
+        self.assertMatchesTransactions()
+
+    def test_delete(self):
+        transactions = self.populate()
+        transactions[2].delete()
+        transactions[4].delete()
+        self.assertMatchesTransactions()
+
+    def test_bulk_import(self):
+        self.populate()
+        result = TransactionImporter(self.user, batch_size=2).run([
+            {'amount': '15.00', 'type': 'expense', 'category': 'Food', 'date': self.at(date(2025, 3, 1), 20).isoformat()},
+            {'amount': '30.00', 'type': 'income', 'category': 'Rent', 'date': self.at(date(2025, 3, 2), 11).isoformat()},
+            {'amount': '7.75', 'type': 'expense', 'category': str(self.rent.pk), 'date': self.at(date(2025, 3, 3), 8).isoformat()},
+        ])
+        self.assertEqual(result['created'], 3)
+        self.assertMatchesTransactions()
+
+
+class ForecastTests(TestCase):
+    """Projections of small ledgers whose month end is known."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='planner', email='planner@example.com', password='x')
+        self.rent = Category.objects.create(name='Rent')
+        self.food = Category.objects.create(name='Food')
+
+    def add(self, category, amount, day, transaction_type='expense'):
+        Transaction.objects.create(
+            user=self.user, category=category, type=transaction_type, amount=amount,
+            date=timezone.make_aware(datetime.combine(day, time(12)), user_timezone(self.user)),
+        )
+
+    def series(self, today):
+        return {series['category_name']: series for series in forecast(self.user, today)['series']}
+
+    def test_new_user(self):
+        # All history is inside the current month, after its first day.
+        # A flat 8.00 a day over Oct 5-9, extended over the 21 days left.
+        self.add(self.food, '10.00', date(2025, 10, 5))
+        self.add(self.food, '20.00', date(2025, 10, 7))
+        self.add(self.food, '10.00', date(2025, 10, 9))
+        food = self.series(date(2025, 10, 10))['Food']
+        self.assertEqual((food['actual'], food['recurring'], food['trend'], food['projected']), (4000, 0, 16800, 20800))
+
+    def test_only_future_dated_transactions(self):
+        self.add(self.food, '15.00', date(2025, 10, 20))
+        food = self.series(date(2025, 10, 10))['Food']
+        self.assertEqual((food['actual'], food['recurring'], food['trend'], food['projected']), (1500, 0, 0, 1500))
+
+    def test_recurring_payment(self):
+        today = date(2025, 10, 18)
+        for months_back in range(1, 7):
+            self.add(self.rent, '1500.00', month_start(today, months_back).replace(day=25))
+        rent = self.series(today)['Rent']
+        self.assertEqual((rent['actual'], rent['recurring'], rent['trend'], rent['projected']), (0, 150000, 0, 150000))
 
-# Create your tests here.
+        # Paid this month: nothing left to project.
+        self.add(self.rent, '1500.00', date(2025, 10, 25))
+        self.assertEqual(self.series(today)['Rent']['projected'], 150000)
+        # Past the day: nothing left either.
+        self.assertEqual(self.series(date(2025, 10, 26))['Rent']['recurring'], 0)
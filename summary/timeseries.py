@@ -0,0 +1,184 @@
+"""
+Income, expense and net totals per day, ISO week or calendar month.
+
+The database groups the daily rollups of whole days into one row per period
+and type (and category) in a single query, on the rollups' precomputed
+``year_month`` / ``iso_week`` columns rather than truncating every day with a
+date function. The few transactions of partial first and last days are added
+on their local day. Both are scattered into
+dense numpy arrays spanning the requested periods, so periods without
+transactions come out as zeros without a Python loop over the calendar.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Max, Min, Sum, Value
+
+from budget_tracker.money import from_cents
+from budget_tracker.periods import local_day, user_timezone
+from .rollups import split_range
+
+
+# The rollup column each granularity's periods are grouped by.
+GRANULARITIES = {
+    'day': 'day',
+    'week': 'iso_week',
+    'month': 'year_month',
+}
+
+
+class TimeseriesTooLong(ValueError):
+    """The requested range has more periods than ``SUMMARY_TIMESERIES_MAX_PERIODS``."""
+
+
+def period_start(day, granularity):
+    """Return the first day of the period ``day`` falls in."""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _period_index(days, origin, granularity):
+    """Vectorized: the offset of each day's period from the period starting on ``origin``."""
+    days = np.asarray(days, dtype='datetime64[D]')
+    origin = np.datetime64(origin, 'D')
+    if granularity == 'month':
+        return (days.astype('datetime64[M]') - origin.astype('datetime64[M]')).astype(np.int64)
+    offsets = (days - origin).astype(np.int64)
+    return offsets // 7 if granularity == 'week' else offsets
+
+
+def _period_labels(origin, length, granularity):
+    origin = np.datetime64(origin, 'D')
+    if granularity == 'month':
+        starts = (origin.astype('datetime64[M]') + np.arange(length)).astype('datetime64[D]')
+    else:
+        starts = origin + np.arange(length) * (7 if granularity == 'week' else 1)
+    return np.datetime_as_string(starts, unit='D').tolist()
+
+
+def timeseries_queries(user, granularity, start_date=None, end_date=None, category_id=None, by_category=False):
+    """
+    Return the querysets behind ``timeseries``: rollups grouped by period and
+    type, and the transactions of the range's partial days. Both yield rows of
+    a day of the period, type, cents, count and, with ``by_category``, the
+    category id and name. Either is None when the range needs none of it.
+    """
+    rollups, edges = split_range(user, start_date, end_date)
+    if category_id is not None:
+        rollups = None if rollups is None else rollups.filter(category_id=category_id)
+        edges = None if edges is None else edges.filter(category_id=category_id)
+    category_fields = ('category_id', 'category__name') if by_category else ()
+
+    rollup_rows = None
+    if rollups is not None:
+        # Grouped by the precomputed period column, so no date function runs
+        # per row; any day of a period stands for it.
+        groups = (GRANULARITIES[granularity], 'type', *category_fields[:1])
+        rollup_rows = (
+            rollups.values(*groups)
+            .annotate(
+                period=Min('day'),
+                cents=Sum('total_cents'),
+                count=Sum('transaction_count'),
+                **({'category_name': Max('category__name')} if by_category else {}),
+            )
+            .values_list('period', 'type', 'cents', 'count', *(('category_id', 'category_name') if by_category else ()))
+            .order_by()
+        )
+    edge_rows = None
+    if edges is not None:
+        edge_rows = edges.values_list('local_date', 'type', 'amount_cents', Value(1), *category_fields).order_by()
+    return rollup_rows, edge_rows
+
+
+def timeseries(user, granularity, start_date=None, end_date=None, category_id=None, by_category=False):
+    """
+    Return a user's totals per ``granularity`` period between the aware
+    datetimes ``start_date`` and ``end_date`` (inclusive; either may be None
+    to start or end at the user's first or last transaction), optionally of
+    one category.
+
+    The result has one point per period, including empty ones, with
+    ``period`` (its first day), ``income``, ``expense``, ``net`` and
+    ``transaction_count``. With ``by_category`` it also has a series per
+    category. Raises ``TimeseriesTooLong`` for ranges of too many periods.
+    """
+    rollup_rows, edge_rows = timeseries_queries(user, granularity, start_date, end_date, category_id, by_category)
+    rows = [*(rollup_rows if rollup_rows is not None else ()), *(edge_rows if edge_rows is not None else ())]
+    columns = list(zip(*rows)) if rows else [()] * (6 if by_category else 4)
+    periods, types, cents, counts = columns[:4]
+
+    # Periods span the range, or the transactions when it is open-ended.
+    tz = user_timezone(user)
+    first = period_start(min(periods), granularity) if periods else None
+    last = period_start(max(periods), granularity) if periods else None
+    if start_date is not None:
+        first = period_start(local_day(start_date, tz), granularity)
+    if end_date is not None:
+        last = period_start(local_day(end_date, tz), granularity)
+    length = 0
+    if first is not None and last is not None and first <= last:
+        length = int(_period_index([last], first, granularity)[0]) + 1
+    limit = getattr(settings, 'SUMMARY_TIMESERIES_MAX_PERIODS', 3660)
+    if length > limit:
+        raise TimeseriesTooLong(
+            f'The range has {length} {granularity} periods; request at most {limit} at a time.'
+        )
+
+    # Scatter the rows into dense (category x period) arrays of income,
+    # expense and count; the zeros left over are the gaps. Without
+    # ``by_category`` there is a single row.
+    if by_category:
+        category_ids, category_index = np.unique(np.asarray(columns[4], dtype=np.int64), return_inverse=True)
+    else:
+        category_ids, category_index = np.zeros(1, dtype=np.int64), np.zeros(len(periods), dtype=np.int64)
+    index = _period_index(periods, first, granularity) if length else np.zeros(len(periods), dtype=np.int64)
+    inside = (index >= 0) & (index < length)
+    income_rows = inside & (np.asarray(types, dtype=object) == 'income')
+    expense_rows = inside & ~income_rows
+    cents = np.asarray(cents, dtype=np.int64)
+    shape = (len(category_ids), length)
+    income, expense, count = (np.zeros(shape, dtype=np.int64) for _ in range(3))
+    np.add.at(income, (category_index[income_rows], index[income_rows]), cents[income_rows])
+    np.add.at(expense, (category_index[expense_rows], index[expense_rows]), cents[expense_rows])
+    np.add.at(count, (category_index[inside], index[inside]), np.asarray(counts, dtype=np.int64)[inside])
+
+    labels = _period_labels(first, length, granularity) if length else []
+    result = {
+        'granularity': granularity,
+        'count': length,
+        'results': _points(labels, income.sum(axis=0), expense.sum(axis=0), count.sum(axis=0)),
+    }
+    if by_category:
+        names = dict(zip(columns[4], columns[5]))
+        result['categories'] = sorted(
+            (
+                {
+                    'category_id': category,
+                    'category_name': names[category],
+                    'results': _points(labels, income[row], expense[row], count[row]),
+                }
+                for row, category in enumerate(category_ids.tolist())
+            ),
+            key=lambda series: series['category_name'],
+        )
+    return result
+
+
+def _points(labels, income, expense, count):
+    return [
+        {
+            'period': label,
+            'income': from_cents(income_cents),
+            'expense': from_cents(expense_cents),
+            'net': from_cents(income_cents - expense_cents),
+            'transaction_count': transactions,
+        }
+        for label, income_cents, expense_cents, transactions in zip(
+            labels, income.tolist(), expense.tolist(), count.tolist()
+        )
+    ]
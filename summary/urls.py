@@ -6,4 +6,10 @@ app_name = 'summary'
 urlpatterns = [
     path('', views.financial_summary_view, name='financial_summary'),
     path('categories/', views.category_summary_view, name='category_summary'),
+    path('timeseries/', views.timeseries_view, name='timeseries'),
+    path('compare/', views.compare_view, name='compare'),
+    path('forecast/', views.forecast_view, name='forecast'),
+    path('stats/percentiles/', views.percentiles_view, name='stats_percentiles'),
+    path('stats/categories/', views.category_stats_view, name='stats_categories'),
+    path('stats/largest/', views.largest_transactions_view, name='stats_largest'),
 ]
@@ -1,152 +1,437 @@
+from datetime import timedelta
+
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Sum, Count, Q
-from decimal import Decimal
-from datetime import datetime
-from transactions.models import Transaction
+from django.conf import settings
+from django.utils import timezone
+from budget_tracker.async_views import async_api_view, json_response
+from budget_tracker.money import from_cents
+from budget_tracker.periods import local_day, period_bounds, user_timezone
+from budget_tracker.response_cache import cache_json_response, cache_response
 from categories.models import Category
+from transactions.filters import parse_period_range
+from transactions.models import Transaction
+from transactions.serializers import TransactionSerializer
+from . import stats
+from .compare import compare
+from .forecast import forecast
+from .ledger import get_ledger
+from .rollups import asummarize, summarize
 from .serializers import SummarySerializer, CategoryBreakdownSerializer
+from .timeseries import GRANULARITIES, TimeseriesTooLong, timeseries
+
+
+def _summary_data(groups):
+    """Build the financial summary payload from ``summarize`` groups."""
+    income_groups = [group for group in groups if group['type'] == 'income']
+    expense_groups = [group for group in groups if group['type'] == 'expense']
+
+    total_income = sum(group['total_cents'] for group in income_groups)
+    total_expenses = sum(group['total_cents'] for group in expense_groups)
+    net_balance = total_income - total_expenses
+    income_count = sum(group['transaction_count'] for group in income_groups)
+    expense_count = sum(group['transaction_count'] for group in expense_groups)
+
+    def breakdown(category_groups):
+        category_groups = sorted(category_groups, key=lambda group: (-group['total_cents'], group['category__name']))
+        return [
+            {
+                'category__name': group['category__name'],
+                'total_amount': from_cents(group['total_cents']),
+                'transaction_count': group['transaction_count'],
+            }
+            for group in category_groups
+        ]
+
+    category_breakdown = {
+        'income': breakdown(income_groups),
+        'expenses': breakdown(expense_groups),
+    }
+    
+    summary_data = {
+        'total_income': total_income,
+        'total_expenses': total_expenses,
+        'net_balance': net_balance,
+        'transaction_count': income_count + expense_count,
+        'income_count': income_count,
+        'expense_count': expense_count,
+        'category_breakdown': category_breakdown
+    }
+    
+    return SummarySerializer(summary_data).data
+
+
+def _category_data(groups):
+    """Build the category summary payload from ``summarize`` groups."""
+    category_data = sorted(groups, key=lambda item: (item['category__name'], item['type']))
+    
+    # Format the data
+    formatted_data = []
+    for item in category_data:
+        formatted_data.append({
+            'category_name': item['category__name'],
+            'transaction_type': item['type'],
+            'total_amount': from_cents(item['total_cents']),
+            'transaction_count': item['transaction_count']
+        })
+    
+    return {
+        'count': len(formatted_data),
+        'results': formatted_data
+    }
+
+
+def _category_type(params):
+    # Optional transaction type filter
+    transaction_type = params.get('type')
+    return transaction_type if transaction_type in ['income', 'expense'] else None
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cache_response('financial_summary')
 def financial_summary_view(request):
     """
     Get comprehensive financial summary for the authenticated user.
     Includes total income, expenses, balance, and category breakdown.
     """
     user = request.user
-    queryset = Transaction.objects.filter(user=user)
     
-    # Date range filtering (optional)
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
-    
-    if start_date:
-        try:
-            start_date = datetime.fromisoformat(start_date)
-            queryset = queryset.filter(date__gte=start_date)
-        except ValueError:
-            pass
-            
-    if end_date:
-        try:
-            end_date = datetime.fromisoformat(end_date)
-            queryset = queryset.filter(date__lte=end_date)
-        except ValueError:
-            pass
+    # Date range and calendar period filtering (optional), in the user's time zone
+    start_date, end_date = parse_period_range(request.query_params, user_timezone(user))
     
-    # Calculate totals
-    income_data = queryset.filter(type='income').aggregate(
-        total=Sum('amount'),
-        count=Count('id')
-    )
-    expense_data = queryset.filter(type='expense').aggregate(
-        total=Sum('amount'),
-        count=Count('id')
-    )
-    
-    total_income = income_data['total'] or Decimal('0.00')
-    total_expenses = expense_data['total'] or Decimal('0.00')
-    net_balance = total_income - total_expenses
-    
-    # Category breakdown
-    category_breakdown = {}
-    
-    # Income by category
-    income_by_category = (
-        queryset.filter(type='income')
-        .values('category__name')
-        .annotate(
-            total_amount=Sum('amount'),
-            transaction_count=Count('id')
-        )
-        .order_by('-total_amount')
-    )
-    
-    # Expense by category
-    expense_by_category = (
-        queryset.filter(type='expense')
-        .values('category__name')
-        .annotate(
-            total_amount=Sum('amount'),
-            transaction_count=Count('id')
-        )
-        .order_by('-total_amount')
-    )
-    
-    category_breakdown['income'] = list(income_by_category)
-    category_breakdown['expenses'] = list(expense_by_category)
-    
-    summary_data = {
-        'total_income': total_income,
-        'total_expenses': total_expenses,
-        'net_balance': net_balance,
-        'transaction_count': queryset.count(),
-        'income_count': income_data['count'],
-        'expense_count': expense_data['count'],
-        'category_breakdown': category_breakdown
-    }
-    
-    serializer = SummarySerializer(summary_data)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    # Totals and category breakdown from the daily rollups
+    groups = summarize(user, start_date=start_date, end_date=end_date)
+    return Response(_summary_data(groups), status=status.HTTP_200_OK)
+
+
+@async_api_view()
+@cache_json_response('financial_summary')
+async def financial_summary_async_view(request):
+    """
+    ASGI version of ``financial_summary_view``; the rollup and partial-day
+    aggregates run concurrently.
+    """
+    user = request.user
+    start_date, end_date = parse_period_range(request.GET, user_timezone(user))
+    groups = await asummarize(user, start_date=start_date, end_date=end_date)
+    return json_response(_summary_data(groups))
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cache_response('category_summary')
 def category_summary_view(request):
     """
     Get spending summary grouped by categories.
     """
     user = request.user
-    queryset = Transaction.objects.filter(user=user)
-    
-    # Optional transaction type filter
-    transaction_type = request.query_params.get('type')
-    if transaction_type in ['income', 'expense']:
-        queryset = queryset.filter(type=transaction_type)
     
-    # Date range filtering (optional)
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
-    
-    if start_date:
-        try:
-            start_date = datetime.fromisoformat(start_date)
-            queryset = queryset.filter(date__gte=start_date)
-        except ValueError:
-            pass
-            
-    if end_date:
-        try:
-            end_date = datetime.fromisoformat(end_date)
-            queryset = queryset.filter(date__lte=end_date)
-        except ValueError:
-            pass
+    # Date range and calendar period filtering (optional), in the user's time zone
+    start_date, end_date = parse_period_range(request.query_params, user_timezone(user))
     
     # Group by category and transaction type
-    category_data = (
-        queryset.values('category__name', 'type')
-        .annotate(
-            total_amount=Sum('amount'),
-            transaction_count=Count('id')
+    groups = summarize(
+        user, start_date=start_date, end_date=end_date, transaction_type=_category_type(request.query_params)
+    )
+    return Response(_category_data(groups), status=status.HTTP_200_OK)
+
+
+@async_api_view()
+@cache_json_response('category_summary')
+async def category_summary_async_view(request):
+    """
+    ASGI version of ``category_summary_view``; the rollup and partial-day
+    aggregates run concurrently.
+    """
+    user = request.user
+    start_date, end_date = parse_period_range(request.GET, user_timezone(user))
+    groups = await asummarize(
+        user, start_date=start_date, end_date=end_date, transaction_type=_category_type(request.GET)
+    )
+    return json_response(_category_data(groups))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@cache_response('summary_timeseries')
+def timeseries_view(request):
+    """
+    Get income, expenses and net balance per day, week or month, with
+    empty periods included, for trend charts.
+    """
+    user = request.user
+    params = request.query_params
+
+    granularity = params.get('granularity', 'month')
+    if granularity not in GRANULARITIES:
+        return Response({
+            'error': f"Unsupported granularity. Choose one of: {', '.join(GRANULARITIES)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    # Optional category filter; invalid ids are ignored like on the other endpoints
+    try:
+        category_id = int(params['category'])
+    except (KeyError, ValueError):
+        category_id = None
+    by_category = params.get('by_category', '').lower() in ('1', 'true', 'yes')
+
+    # Date range and calendar period filtering (optional), in the user's time zone
+    start_date, end_date = parse_period_range(params, user_timezone(user))
+    try:
+        data = timeseries(
+            user, granularity, start_date=start_date, end_date=end_date,
+            category_id=category_id, by_category=by_category,
         )
-        .order_by('category__name', 'type')
+    except TimeseriesTooLong as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(data, status=status.HTTP_200_OK)
+
+
+STATS_MAX_LIMIT = 100
+
+
+def _stats_selection(request, default_type='expense'):
+    """
+    Return a user's ledger and the mask of the transactions selected by the
+    date range, month and week parameters, ``type`` (``all`` for both) and
+    ``category``.
+    """
+    user = request.user
+    params = request.query_params
+    transaction_type = params.get('type', default_type)
+    if transaction_type not in ('income', 'expense'):
+        transaction_type = None
+    try:
+        category_id = int(params['category'])
+    except (KeyError, ValueError):
+        category_id = None
+    start_date, end_date = parse_period_range(params, user_timezone(user))
+    columns = get_ledger(user)
+    return columns, stats.select(
+        columns, start_date=start_date, end_date=end_date, transaction_type=transaction_type,
+        category_id=category_id,
     )
-    
-    # Format the data
-    formatted_data = []
-    for item in category_data:
-        formatted_data.append({
-            'category_name': item['category__name'],
-            'transaction_type': item['type'],
-            'total_amount': item['total_amount'],
-            'transaction_count': item['transaction_count']
-        })
-    
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@cache_response('summary_percentiles')
+def percentiles_view(request):
+    """
+    Get the distribution of transaction amounts: count, total, mean, min,
+    max and the ``percentiles`` requested (comma separated, 0-100), of
+    expenses unless ``type`` says otherwise.
+    """
+    raw = request.query_params.get('percentiles')
+    percents = stats.DEFAULT_PERCENTILES
+    if raw:
+        try:
+            percents = tuple(float(value) for value in raw.split(','))
+            percents = tuple(int(percent) if percent.is_integer() else percent for percent in percents)
+        except ValueError:
+            percents = ()
+        if not percents or not all(0 <= percent <= 100 for percent in percents):
+            return Response({
+                'error': 'percentiles must be comma separated numbers between 0 and 100'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+    columns, mask = _stats_selection(request)
+    data = stats.percentiles(columns, mask, percents)
+
+    def amount(cents):
+        return None if cents is None else from_cents(cents)
+
     return Response({
-        'count': len(formatted_data),
-        'results': formatted_data
+        'count': data['count'],
+        'total_amount': from_cents(data['total']),
+        'mean': amount(data['mean']),
+        'min': amount(data['min']),
+        'max': amount(data['max']),
+        'percentiles': [
+            {'percentile': percent, 'amount': amount(cents)} for percent, cents in data['percentiles'].items()
+        ],
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@cache_response('summary_category_stats')
+def category_stats_view(request):
+    """
+    Get the count, total, mean and median transaction amount per category,
+    of expenses unless ``type`` says otherwise.
+    """
+    columns, mask = _stats_selection(request)
+    rows = stats.category_medians(columns, mask)
+    names = dict(Category.objects.filter(pk__in=[row[0] for row in rows]).values_list('pk', 'name').order_by())
+
+    results = sorted(
+        (
+            {
+                'category_id': category_id,
+                'category_name': names.get(category_id),
+                'transaction_count': count,
+                'total_amount': from_cents(total),
+                'mean': from_cents(mean),
+                'median': from_cents(median),
+            }
+            for category_id, count, total, mean, median in rows
+        ),
+        key=lambda row: (row['category_name'] or '', row['category_id']),
+    )
+    return Response({
+        'count': len(results),
+        'results': results,
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@cache_response('summary_largest')
+def largest_transactions_view(request):
+    """
+    Get the ``limit`` largest transactions (default 10, at most 100),
+    expenses unless ``type`` says otherwise.
+    """
+    try:
+        limit = max(1, min(int(request.query_params.get('limit', 10)), STATS_MAX_LIMIT))
+    except ValueError:
+        limit = 10
+
+    columns, mask = _stats_selection(request)
+    ids = stats.largest(columns, mask, limit)
+    # Ordered below, so the default ordering would only add a sort.
+    transactions = (
+        Transaction.objects.filter(user=request.user, id__in=ids).select_related('category', 'user').order_by()
+    )
+    by_id = {instance.pk: instance for instance in transactions}
+    results = [by_id[pk] for pk in ids if pk in by_id]
+
+    serializer = TransactionSerializer(results, many=True)
+    return Response({
+        'count': len(results),
+        'results': serializer.data,
+    }, status=status.HTTP_200_OK)
+
+
+# A forecast changes with the user's local day as well as their data, and is
+# keyed by both; entries outliving the day are unreachable anyway.
+FORECAST_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def _local_today(request):
+    return local_day(timezone.now(), user_timezone(request.user))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@cache_response('summary_forecast', timeout=FORECAST_CACHE_TIMEOUT, vary=_local_today)
+def forecast_view(request):
+    """
+    Get projected month-end income, expenses and net balance, in total and
+    per category, from recurring transactions and recent trends.
+    """
+    data = forecast(request.user, _local_today(request))
+
+    parts = ('actual', 'recurring', 'trend', 'projected')
+    totals = {transaction_type: dict.fromkeys(parts, 0) for transaction_type in ('income', 'expense')}
+    for series in data['series']:
+        for part in parts:
+            totals[series['type']][part] += series[part]
+
+    def amounts(values):
+        return {part: from_cents(values[part]) for part in parts}
+
+    return Response({
+        'month': data['month'],
+        'as_of': data['as_of'].isoformat(),
+        'days_remaining': data['days_remaining'],
+        'income': amounts(totals['income']),
+        'expenses': amounts(totals['expense']),
+        'net_balance': {
+            'actual': from_cents(totals['income']['actual'] - totals['expense']['actual']),
+            'projected': from_cents(totals['income']['projected'] - totals['expense']['projected']),
+        },
+        'categories': [
+            {
+                'category_id': series['category_id'],
+                'category_name': series['category_name'],
+                'transaction_type': series['type'],
+                **amounts(series),
+            }
+            for series in data['series']
+        ],
+    }, status=status.HTTP_200_OK)
+
+
+def _default_periods(today):
+    """The previous and the current month."""
+    first = today.replace(day=1)
+    previous = (first - timedelta(days=1)).replace(day=1)
+    return [f'{previous:%Y-%m}', f'{first:%Y-%m}']
+
+
+# Without periods it compares the current month to the previous one, which
+# depends on the day.
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@cache_response('summary_compare', vary=_local_today)
+def compare_view(request):
+    """
+    Compare income, expenses and net balance across periods, in total and
+    per category, with each period's change from the first one.
+    """
+    labels = request.query_params.getlist('period') or _default_periods(_local_today(request))
+    limit = getattr(settings, 'SUMMARY_COMPARE_MAX_PERIODS', 12)
+    if not 2 <= len(labels) <= limit:
+        return Response({
+            'error': f'Give between 2 and {limit} period parameters.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    periods = [period_bounds(label) for label in labels]
+    if None in periods:
+        return Response({
+            'error': 'Periods must be YYYY, YYYY-MM, YYYY-Www or YYYY-MM-DD..YYYY-MM-DD.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    data = compare(request.user, periods)
+
+    def change(values):
+        return {'change': from_cents(values['change']), 'percent_change': values['percent_change']}
+
+    return Response({
+        'periods': [
+            {
+                'period': label,
+                'start_date': first.isoformat(),
+                'end_date': last.isoformat(),
+                'total_income': from_cents(totals['income']),
+                'total_expenses': from_cents(totals['expense']),
+                'net_balance': from_cents(totals['net']),
+                'transaction_count': totals['transaction_count'],
+                'income_change': change(totals['changes']['income']),
+                'expenses_change': change(totals['changes']['expense']),
+                'net_balance_change': change(totals['changes']['net']),
+            }
+            for label, (first, last), totals in zip(labels, periods, data['totals'])
+        ],
+        'categories': [
+            {
+                'category_id': category['category_id'],
+                'category_name': category['category_name'],
+                'transaction_type': category['type'],
+                'periods': [
+                    {
+                        'period': label,
+                        'total_amount': from_cents(values['total']),
+                        'transaction_count': values['transaction_count'],
+                        **change(values),
+                    }
+                    for label, values in zip(labels, category['periods'])
+                ],
+            }
+            for category in data['categories']
+        ],
     }, status=status.HTTP_200_OK)
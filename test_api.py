@@ -2,10 +2,22 @@
 Budget Tracker API - Testing Script
 This script demonstrates all the API endpoints and functionality.
 Run this script to test the complete API workflow.
+
+With --load it instead simulates many concurrent users against a running
+server and reports throughput, latency and error rates per endpoint:
+
+    python test_api.py --load --users 200 --duration 60
 """
 
+import argparse
+import random
+import threading
+import time
+import uuid
 import requests
 import json
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from decimal import Decimal
 
@@ -321,10 +333,321 @@ class BudgetTrackerAPITester:
             print(f"\n⚠️  Some tests failed. Please check the output above.")
 
 
+# Relative weights of the actions a simulated user picks from between
+# requests; override with --mix, e.g. --mix changes=10,create=1
+DEFAULT_TRAFFIC_MIX = {
+    'list': 3,
+    'filter': 2,
+    'search': 1,
+    'summary': 3,
+    'category_summary': 1,
+    'changes': 6,
+    'create': 2,
+}
+
+# Upper bounds (ms) of the latency histogram buckets
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+SEARCH_TERMS = ['coffee', 'rent', 'salary', 'uber', 'groceries', 'bill', 'gift', 'lunch']
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, int(round(pct / 100 * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+def parse_mix(value):
+    """Parse ``name=weight,...`` into a traffic mix."""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_TRAFFIC_MIX:
+            raise argparse.ArgumentTypeError(
+                f"unknown action '{name}' (choose from {', '.join(DEFAULT_TRAFFIC_MIX)})"
+            )
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid weight for '{name}': {weight!r}")
+    if not any(weight > 0 for weight in mix.values()):
+        raise argparse.ArgumentTypeError('at least one action needs a positive weight')
+    return mix
+
+
+class LoadStats:
+    """Thread-safe latency and status recorder, keyed by endpoint."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def record(self, endpoint, elapsed, status, failed=True):
+        with self.lock:
+            self.latencies[endpoint].append(elapsed * 1000)
+            self.statuses[endpoint][str(status)] += 1
+            if status == 'error' or failed:
+                self.errors[endpoint] += 1
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    def report(self):
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        endpoints = {}
+        all_latencies = []
+        for endpoint, latencies in sorted(self.latencies.items()):
+            latencies = sorted(latencies)
+            all_latencies.extend(latencies)
+            histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+            for latency in latencies:
+                histogram[next(
+                    (i for i, bound in enumerate(LATENCY_BUCKETS_MS) if latency <= bound),
+                    len(LATENCY_BUCKETS_MS),
+                )] += 1
+            endpoints[endpoint] = {
+                'requests': len(latencies),
+                'throughput': round(len(latencies) / elapsed, 2) if elapsed else 0,
+                'errors': self.errors[endpoint],
+                'error_rate': round(self.errors[endpoint] / len(latencies), 4),
+                'statuses': dict(self.statuses[endpoint]),
+                'mean_ms': round(sum(latencies) / len(latencies), 2),
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p95_ms': round(percentile(latencies, 95), 2),
+                'p99_ms': round(percentile(latencies, 99), 2),
+                'max_ms': round(latencies[-1], 2),
+                'histogram': histogram,
+            }
+        all_latencies.sort()
+        total = len(all_latencies)
+        errors = sum(self.errors.values())
+        return {
+            'duration_seconds': round(elapsed, 2),
+            'requests': total,
+            'throughput': round(total / elapsed, 2) if elapsed else 0,
+            'errors': errors,
+            'error_rate': round(errors / total, 4) if total else 0,
+            'p50_ms': round(percentile(all_latencies, 50), 2),
+            'p95_ms': round(percentile(all_latencies, 95), 2),
+            'p99_ms': round(percentile(all_latencies, 99), 2),
+            'histogram_buckets_ms': LATENCY_BUCKETS_MS,
+            'endpoints': endpoints,
+        }
+
+
+class SimulatedUser:
+    """
+    One virtual user: logs in (registering on first use), then picks
+    weighted actions until the deadline, pausing a random think time
+    between requests.
+    """
+
+    def __init__(self, number, options, stats, deadline):
+        self.username = f"{options.prefix}_{number}"
+        self.options = options
+        self.stats = stats
+        self.deadline = deadline
+        self.rng = random.Random(f"{options.seed}:{number}")
+        self.session = requests.Session()
+        self.categories = []
+        self.sync_cursor = None
+        self.actions = [name for name, weight in options.mix.items() if weight > 0]
+        self.weights = [options.mix[name] for name in self.actions]
+
+    def request(self, endpoint, method, path, expected=(), **kwargs):
+        """Send a request and record it; statuses in ``expected`` are not counted as errors."""
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, f"{BASE_URL}{path}", timeout=self.options.timeout, **kwargs)
+        except requests.RequestException:
+            self.stats.record(endpoint, time.perf_counter() - started, 'error')
+            return None
+        self.stats.record(endpoint, time.perf_counter() - started, response.status_code,
+                          failed=response.status_code >= 400 and response.status_code not in expected)
+        return response
+
+    def authenticate(self):
+        credentials = {'username': self.username, 'password': self.options.password}
+        # A 400 means the user exists from an earlier run with this prefix.
+        response = self.request('register', 'POST', '/users/register/', expected=(400,), json={
+            **credentials,
+            'email': f"{self.username}@example.com",
+            'password_confirm': self.options.password,
+            'first_name': 'Load',
+            'last_name': 'Test',
+        })
+        if response is not None and response.status_code == 400:
+            response = self.request('login', 'POST', '/auth/login/', json=credentials)
+        if response is None or response.status_code not in (200, 201):
+            return False
+        self.session.headers.update({'Authorization': f"Token {response.json()['token']}"})
+
+        response = self.request('categories', 'GET', '/categories/')
+        if response is None or response.status_code != 200:
+            return False
+        data = response.json()
+        if isinstance(data, dict):
+            data = data.get('results', [])
+        self.categories = [category['id'] for category in data]
+        return True
+
+    def run(self):
+        if not self.authenticate():
+            return
+        if not self.categories and 'create' in self.actions:
+            # Nothing to file transactions under (see create_default_categories).
+            index = self.actions.index('create')
+            del self.actions[index], self.weights[index]
+        if not self.actions:
+            return
+        while time.monotonic() < self.deadline:
+            action = self.rng.choices(self.actions, self.weights)[0]
+            getattr(self, f"do_{action}")()
+            if self.options.think_time:
+                time.sleep(self.rng.uniform(0, self.options.think_time))
+
+    def do_list(self):
+        self.request('list', 'GET', '/transactions/')
+
+    def do_filter(self):
+        params = self.rng.choice([
+            {'type': 'expense'},
+            {'type': 'income'},
+            {'category': self.rng.choice(self.categories)},
+            {'start_date': (datetime.now() - timedelta(days=30)).date().isoformat()},
+            {'type': 'expense', 'search': self.rng.choice(SEARCH_TERMS)},
+        ])
+        self.request('filter', 'GET', '/transactions/filter/', params=params)
+
+    def do_search(self):
+        self.request('search', 'GET', '/transactions/search/', params={'q': self.rng.choice(SEARCH_TERMS)})
+
+    def do_summary(self):
+        self.request('summary', 'GET', '/summary/')
+
+    def do_category_summary(self):
+        self.request('category_summary', 'GET', '/summary/categories/', params={'type': 'expense'})
+
+    def do_changes(self):
+        # Poll like the dashboard does, carrying the cursor forward.
+        params = {'since': self.sync_cursor} if self.sync_cursor else {}
+        response = self.request('changes', 'GET', '/transactions/changes/', params=params)
+        if response is not None and response.status_code == 200:
+            self.sync_cursor = response.json().get('cursor')
+        elif response is not None and response.status_code == 400:
+            self.sync_cursor = None
+
+    def do_create(self):
+        transaction_type = 'income' if self.rng.random() < 0.1 else 'expense'
+        self.request('create', 'POST', '/transactions/', json={
+            'amount': f"{self.rng.lognormvariate(3, 1):.2f}",
+            'type': transaction_type,
+            'category': self.rng.choice(self.categories),
+            'date': (datetime.now() - timedelta(days=self.rng.randrange(60))).isoformat(),
+            'description': f"Load test {self.rng.choice(SEARCH_TERMS)}",
+        })
+
+
+def run_load_test(options):
+    """Run ``options.users`` simulated users concurrently and print a report."""
+    stats = LoadStats()
+    started_at = datetime.now().isoformat()
+    print(f"🚦 Load test: {options.users} users for {options.duration}s "
+          f"(ramp-up {options.ramp_up}s) against {BASE_URL}")
+    print(f"   Traffic mix: {', '.join(f'{name}={weight:g}' for name, weight in options.mix.items())}")
+
+    deadline = time.monotonic() + options.ramp_up + options.duration
+
+    def start_user(number):
+        if options.users > 1 and options.ramp_up:
+            time.sleep(options.ramp_up * number / options.users)
+        SimulatedUser(number, options, stats, deadline).run()
+
+    with ThreadPoolExecutor(max_workers=options.users) as executor:
+        futures = [executor.submit(start_user, number) for number in range(options.users)]
+        for future in futures:
+            exception = future.exception()
+            if exception is not None:
+                print(f"💥 Simulated user crashed: {exception}")
+    stats.finish()
+
+    report = stats.report()
+    print_load_report(report)
+    if options.mix.get('create') and 'create' not in report['endpoints']:
+        print("\n⚠️  No transactions were created: the server has no categories. "
+              "Run: python manage.py create_default_categories")
+    if options.output:
+        report['meta'] = {
+            'base_url': BASE_URL,
+            'users': options.users,
+            'duration': options.duration,
+            'ramp_up': options.ramp_up,
+            'think_time': options.think_time,
+            'mix': options.mix,
+            'started_at': started_at,
+        }
+        with open(options.output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+        print(f"\n💾 Report written to {options.output}")
+    return report
+
+
+def print_load_report(report):
+    print(f"\n\n📊 LOAD TEST RESULTS")
+    print("=" * 96)
+    print(f"Requests: {report['requests']} in {report['duration_seconds']}s "
+          f"({report['throughput']} req/s), errors: {report['errors']} ({report['error_rate']:.2%})")
+    print(f"Latency p50/p95/p99: {report['p50_ms']} / {report['p95_ms']} / {report['p99_ms']} ms\n")
+
+    print(f"{'Endpoint':<18}{'Requests':>10}{'req/s':>9}{'Errors':>9}{'p50 ms':>10}"
+          f"{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}  Statuses")
+    print("-" * 96)
+    for endpoint, row in report['endpoints'].items():
+        statuses = ' '.join(f"{status}:{count}" for status, count in sorted(row['statuses'].items()))
+        print(f"{endpoint:<18}{row['requests']:>10}{row['throughput']:>9}{row['error_rate']:>9.1%}"
+              f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}{row['max_ms']:>10}  {statuses}")
+
+    print(f"\nLatency histogram (all endpoints)")
+    print("-" * 96)
+    totals = [sum(row['histogram'][i] for row in report['endpoints'].values())
+              for i in range(len(LATENCY_BUCKETS_MS) + 1)]
+    peak = max(totals) if any(totals) else 1
+    labels = [f"<= {bound} ms" for bound in LATENCY_BUCKETS_MS] + [f"> {LATENCY_BUCKETS_MS[-1]} ms"]
+    for label, count in zip(labels, totals):
+        print(f"{label:>12} | {'#' * round(50 * count / peak):<50} {count}")
+
+
 def main():
     """Main function to run the API tests."""
+    global BASE_URL
+
+    parser = argparse.ArgumentParser(description="Budget Tracker API testing and load generation")
+    parser.add_argument('--base-url', default=BASE_URL, help="API root (default: %(default)s)")
+    parser.add_argument('--load', action='store_true', help="Simulate concurrent users instead of the scripted walkthrough")
+    parser.add_argument('--users', type=int, default=100, help="Concurrent simulated users (default: %(default)s)")
+    parser.add_argument('--duration', type=float, default=60, help="Seconds to run after ramp-up (default: %(default)s)")
+    parser.add_argument('--ramp-up', type=float, default=10, help="Seconds over which users are started (default: %(default)s)")
+    parser.add_argument('--think-time', type=float, default=1.0, help="Maximum random pause between a user's requests (default: %(default)s)")
+    parser.add_argument('--mix', type=parse_mix, default=dict(DEFAULT_TRAFFIC_MIX),
+                        help="Action weights, e.g. list=3,summary=3,changes=6,create=2")
+    parser.add_argument('--timeout', type=float, default=30, help="Per-request timeout in seconds (default: %(default)s)")
+    parser.add_argument('--prefix', default=f"load_{uuid.uuid4().hex[:6]}",
+                        help="Username prefix; reuse one to log in as existing users instead of registering")
+    parser.add_argument('--password', default='loadtest-pass123', help="Password of the simulated users")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed of the traffic (default: %(default)s)")
+    parser.add_argument('--output', help="Write the JSON report to this file")
+    options = parser.parse_args()
+    BASE_URL = options.base_url.rstrip('/')
+
     print("Budget Tracker API - Testing Suite")
-    print("Make sure the Django development server is running on http://127.0.0.1:8000")
+    print(f"Make sure the Django server is running and reachable at {BASE_URL}")
     print()
     
     # Check if server is running
@@ -337,6 +660,10 @@ def main():
         print("❌ Cannot connect to API server. Please start the Django server with: python manage.py runserver")
         return
     
+    if options.load:
+        run_load_test(options)
+        return
+
     tester = BudgetTrackerAPITester()
     tester.run_all_tests()
 
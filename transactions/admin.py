@@ -1,12 +1,39 @@
+from decimal import Decimal
+from django import forms
 from django.contrib import admin
 from .models import Transaction
 
 
+class TransactionAdminForm(forms.ModelForm):
+    """
+    Edits the amount in currency units; it is stored in cents.
+    """
+    amount = forms.DecimalField(
+        max_digits=10, decimal_places=2, min_value=Decimal('0.01'), help_text="Transaction amount (must be positive)",
+    )
+
+    class Meta:
+        model = Transaction
+        fields = ['user', 'type', 'category', 'date', 'description']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.amount_cents is not None:
+            self.initial.setdefault('amount', self.instance.amount)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get('amount') is not None:
+            self.instance.amount = cleaned_data['amount']
+        return cleaned_data
+
+
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
     """
     Admin interface for the Transaction model.
     """
+    form = TransactionAdminForm
     list_display = ['user', 'amount', 'type', 'category', 'date', 'description_short', 'created_at']
     list_filter = ['type', 'category', 'date', 'created_at']
     search_fields = ['user__username', 'description', 'category__name']
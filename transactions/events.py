@@ -0,0 +1,183 @@
+"""
+Publish/subscribe of transaction change notifications for the SSE endpoint.
+
+Signal handlers publish a user's id once a write to their transactions is
+committed. Every open event stream of that user holds a ``Subscription``,
+a small bounded queue that the stream waits on. A notification carries no
+data: the stream fetches the actual changes itself through
+``transactions.sync``, so bursts of writes collapse into one update.
+
+The default ``InProcessBroker`` only reaches streams served by the same
+process. Deployments running several ASGI workers need a broker that fans
+out between them (e.g. over Redis pub/sub); point
+``TRANSACTION_EVENTS_BROKER`` at a ``Broker`` subclass implementing
+``subscribe``, ``unsubscribe`` and ``publish``.
+
+``EventSource`` cannot send headers, so a stream is opened with a stream
+ticket in its query string rather than the API token: a random value
+issued to an authenticated client, valid once and for
+``TRANSACTION_EVENTS_TICKET_SECONDS``. Tickets are kept in the default
+cache, which every worker must share.
+"""
+import abc
+import asyncio
+import hashlib
+import secrets
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+
+class TooManyConnections(Exception):
+    """The user already has the maximum number of open event streams."""
+
+
+class Subscription:
+    """
+    One event stream's queue of pending notifications.
+
+    The queue is bounded; when a slow client lets it fill up, further
+    notifications are dropped and ``overflowed`` is set, telling the stream
+    to send a full reset instead of a delta.
+    """
+
+    def __init__(self, broker, user_id, max_pending):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=max_pending)
+        self.overflowed = False
+
+    def notify(self, event):
+        """Queue an event; safe to call from any thread."""
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The stream's event loop has shut down.
+            self.close()
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout):
+        """Wait up to ``timeout`` seconds and return every pending event (possibly none)."""
+        try:
+            events = [await asyncio.wait_for(self.queue.get(), timeout)]
+        except asyncio.TimeoutError:
+            return []
+        while not self.queue.empty():
+            events.append(self.queue.get_nowait())
+        return events
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker(abc.ABC):
+    """Interface of the event brokers."""
+
+    def __init__(self, max_connections_per_user=5, max_pending=100):
+        self.max_connections_per_user = max_connections_per_user
+        self.max_pending = max_pending
+
+    @abc.abstractmethod
+    def subscribe(self, user_id):
+        """Return a new ``Subscription``; must be called from the stream's event loop."""
+
+    @abc.abstractmethod
+    def unsubscribe(self, subscription):
+        """Forget a subscription; closing one twice must be harmless."""
+
+    @abc.abstractmethod
+    def publish(self, user_id, event):
+        """Deliver ``event`` to every subscription of the user."""
+
+
+class InProcessBroker(Broker):
+    """Broker delivering events to the streams of the current process."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        with self._lock:
+            subscriptions = self._subscriptions.setdefault(user_id, set())
+            if len(subscriptions) >= self.max_connections_per_user:
+                if not subscriptions:
+                    del self._subscriptions[user_id]
+                raise TooManyConnections(user_id)
+            subscription = Subscription(self, user_id, self.max_pending)
+            subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.notify(event)
+
+    def connection_count(self, user_id):
+        with self._lock:
+            return len(self._subscriptions.get(user_id, ()))
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Return the process-wide broker, configured from settings."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                broker_class = import_string(
+                    getattr(settings, 'TRANSACTION_EVENTS_BROKER', 'transactions.events.InProcessBroker')
+                )
+                _broker = broker_class(
+                    max_connections_per_user=getattr(settings, 'TRANSACTION_EVENTS_MAX_CONNECTIONS_PER_USER', 5),
+                    max_pending=getattr(settings, 'TRANSACTION_EVENTS_MAX_PENDING', 100),
+                )
+    return _broker
+
+
+def publish_change(user_id):
+    """Tell a user's open event streams that their transactions changed."""
+    get_broker().publish(user_id, 'changed')
+
+
+def _ticket_key(ticket):
+    return f'events-ticket:{hashlib.sha256(ticket.encode()).hexdigest()}'
+
+
+def issue_ticket(user_id):
+    """Return a new stream ticket for the user and how many seconds it is valid."""
+    ticket = secrets.token_urlsafe(32)
+    timeout = getattr(settings, 'TRANSACTION_EVENTS_TICKET_SECONDS', 30)
+    cache.set(_ticket_key(ticket), user_id, timeout)
+    return ticket, timeout
+
+
+def redeem_ticket(ticket):
+    """Return the id of the user a ticket was issued to, or None; a ticket redeems once."""
+    key = _ticket_key(ticket)
+    user_id = cache.get(key)
+    # Only the request that manages to delete it gets the user.
+    if user_id is None or not cache.delete(key):
+        return None
+    return user_id
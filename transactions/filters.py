@@ -0,0 +1,119 @@
+from datetime import date, datetime, timedelta
+from django.db.models import Q
+from django.utils import timezone
+
+from budget_tracker.periods import day_start, iso_week, month_bounds, user_timezone, week_bounds, year_month
+from categories.models import Category
+from .search import get_search_backend, tokenize
+
+
+def parse_date_param(value):
+    """Parse an optional ISO date/datetime query parameter, ignoring bad input."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def parse_date_range(params, tz):
+    """
+    Return aware, inclusive ``(start, end)`` datetime bounds (either may be
+    None) for the ``start_date`` and ``end_date`` query parameters in the
+    time zone ``tz``. A date without a time covers that whole local day.
+    """
+    start = parse_date_param(params.get('start_date'))
+    if start is not None and timezone.is_naive(start):
+        start = timezone.make_aware(start, tz)
+
+    end = parse_date_param(params.get('end_date'))
+    if end is not None and _is_date(params['end_date']):
+        end = day_start(end.date() + timedelta(days=1), tz) - timedelta(microseconds=1)
+    elif end is not None and timezone.is_naive(end):
+        end = timezone.make_aware(end, tz)
+    return start, end
+
+
+def _is_date(value):
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+
+def parse_period_range(params, tz):
+    """
+    Like ``parse_date_range``, narrowed to the whole local days of the
+    ``month`` (``YYYY-MM``) and ``week`` (``YYYY-Www``) parameters if given.
+    """
+    start, end = parse_date_range(params, tz)
+    for bounds in (month_bounds(params.get('month')), week_bounds(params.get('week'))):
+        if bounds is None:
+            continue
+        first = day_start(bounds[0], tz)
+        last = day_start(bounds[1] + timedelta(days=1), tz) - timedelta(microseconds=1)
+        start = first if start is None else max(start, first)
+        end = last if end is None else min(end, last)
+    return start, end
+
+
+def filter_date_range(queryset, params, tz):
+    """
+    Apply the start_date, end_date, month and week query parameters to a
+    transaction queryset, counting calendar days in the time zone ``tz``.
+
+    Ranges are compared with ``date`` so the listing indexes, which end in
+    the sort columns, still return rows in order. Months and weeks use the
+    precomputed ``year_month`` and ``iso_week`` columns.
+    """
+    start, end = parse_date_range(params, tz)
+    if start is not None:
+        queryset = queryset.filter(date__gte=start)
+    if end is not None:
+        queryset = queryset.filter(date__lte=end)
+
+    month = month_bounds(params.get('month'))
+    if month is not None:
+        queryset = queryset.filter(year_month=year_month(month[0]))
+    week = week_bounds(params.get('week'))
+    if week is not None:
+        queryset = queryset.filter(iso_week=iso_week(week[0]))
+    return queryset
+
+
+def filter_transactions(queryset, params, user):
+    """
+    Apply the type, category, start_date, end_date, month, week and search
+    query parameters to a queryset of ``user``'s transactions. Invalid
+    values are ignored.
+    """
+    # Filter by transaction type
+    transaction_type = params.get('type')
+    if transaction_type in ['income', 'expense']:
+        queryset = queryset.filter(type=transaction_type)
+
+    # Filter by category
+    category_id = params.get('category')
+    if category_id:
+        try:
+            queryset = queryset.filter(category_id=int(category_id))
+        except (ValueError, TypeError):
+            pass
+
+    # Filter by date range and calendar period, in the user's time zone
+    queryset = filter_date_range(queryset, params, user_timezone(user))
+
+    # Search descriptions through the full-text index (every word as a prefix)
+    # and category names, which are few enough to match without a join.
+    search = params.get('search')
+    if search:
+        matching_categories = Category.objects.filter(name__icontains=search).values('id')
+        if tokenize(search):
+            descriptions = Q(id__in=get_search_backend().matching_ids(user, search))
+        else:
+            descriptions = Q(description__icontains=search)
+        queryset = queryset.filter(descriptions | Q(category_id__in=matching_categories))
+
+    return queryset
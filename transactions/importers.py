@@ -0,0 +1,233 @@
+"""
+Batched import of transactions from JSON arrays or CSV files.
+
+Rows are parsed from the request stream one at a time, validated against a
+single prefetched category map and written with ``bulk_create`` in chunks,
+each chunk in its own database transaction. Invalid rows are reported back
+without stopping the import.
+"""
+import codecs
+import csv
+import json
+from datetime import datetime, time
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from categories.models import Category
+from .models import Transaction
+from .signals import transactions_bulk_created
+
+
+IMPORT_FIELDS = ['amount', 'type', 'category', 'date', 'description']
+TRANSACTION_TYPES = {value for value, _ in Transaction.TRANSACTION_TYPES}
+MIN_AMOUNT = Decimal('0.01')
+MAX_AMOUNT = Decimal('99999999.99')
+JSON_DELIMITERS = frozenset(' \t\r\n,]')
+
+
+class ImportFormatError(ValueError):
+    """The upload could not be parsed at all (as opposed to a bad row)."""
+
+
+def iter_json_array(stream, chunk_size=64 * 1024):
+    """Yield the elements of a top-level JSON array read incrementally from a byte stream."""
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    buffer = ''
+    position = 0
+    eof = False
+    state = 'start'  # start -> first -> separator -> value -> separator ... -> done
+
+    while True:
+        if not eof and len(buffer) - position < chunk_size:
+            chunk = stream.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[position:] + text_decoder.decode(chunk or b'', final=eof)
+            position = 0
+
+        while position < len(buffer) and buffer[position].isspace():
+            position += 1
+        if position >= len(buffer):
+            if eof:
+                if state != 'done':
+                    raise ImportFormatError('Unexpected end of JSON array.')
+                return
+            continue
+
+        char = buffer[position]
+        if state == 'done':
+            raise ImportFormatError('Unexpected data after the end of the JSON array.')
+        if state == 'start':
+            if char != '[':
+                raise ImportFormatError('Expected a JSON array of transactions.')
+            position += 1
+            state = 'first'
+            continue
+        if state in ('first', 'separator') and char == ']':
+            position += 1
+            state = 'done'
+            continue
+        if state == 'separator':
+            if char != ',':
+                raise ImportFormatError('Expected "," or "]" in JSON array.')
+            position += 1
+            state = 'value'
+            continue
+
+        try:
+            value, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError as exc:
+            if eof:
+                raise ImportFormatError(f'Invalid JSON: {exc.msg}.')
+            end = None
+        if end is None or (not eof and (end == len(buffer) or buffer[end] not in JSON_DELIMITERS)):
+            # The value may continue in the next chunk (e.g. a number cut in half).
+            if eof:
+                raise ImportFormatError('Unexpected end of JSON array.')
+            chunk = stream.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[position:] + text_decoder.decode(chunk or b'', final=eof)
+            position = 0
+            continue
+        position = end
+        state = 'separator'
+        yield value
+
+
+def iter_csv_rows(stream):
+    """Yield dicts for the rows of a CSV file with a header line, read from a byte stream."""
+    reader = csv.DictReader(codecs.getreader('utf-8-sig')(stream))
+    if reader.fieldnames is None:
+        return
+    missing = {'amount', 'type', 'category', 'date'} - {name.strip() for name in reader.fieldnames}
+    if missing:
+        raise ImportFormatError(f"CSV header is missing: {', '.join(sorted(missing))}.")
+    for row in reader:
+        yield {key.strip(): value for key, value in row.items() if key is not None}
+
+
+class TransactionImporter:
+    """
+    Validate rows and bulk insert them for a single user.
+
+    Use ``run(rows)`` with any iterable of dicts; the result holds the
+    number of created and failed rows plus the first ``max_errors`` errors.
+    """
+    def __init__(self, user, batch_size=1000, max_errors=1000):
+        self.user = user
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self.categories_by_id = {}
+        self.categories_by_name = {}
+        for pk, name in Category.objects.values_list('pk', 'name'):
+            self.categories_by_id[pk] = pk
+            self.categories_by_name[name.casefold()] = pk
+
+    def run(self, rows):
+        batch = []
+        for row_number, row in enumerate(rows, start=1):
+            instance, errors = self.validate_row(row)
+            if errors:
+                self.failed += 1
+                if len(self.errors) < self.max_errors:
+                    self.errors.append({'row': row_number, 'errors': errors})
+                continue
+            batch.append(instance)
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+                batch = []
+        if batch:
+            self.flush(batch)
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+        }
+
+    def flush(self, batch):
+        with transaction.atomic():
+            created = Transaction.objects.bulk_create(batch)
+            transactions_bulk_created.send(sender=Transaction, instances=created)
+        self.created += len(created)
+
+    def validate_row(self, row):
+        if not isinstance(row, dict):
+            return None, {'non_field_errors': ['Expected an object with transaction fields.']}
+
+        errors = {}
+        values = {}
+        for field in IMPORT_FIELDS:
+            value = row.get(field)
+            if isinstance(value, str):
+                value = value.strip()
+            try:
+                values[field] = getattr(self, f'clean_{field}')(value)
+            except ValueError as exc:
+                errors[field] = [str(exc)]
+        if errors:
+            return None, errors
+        return Transaction(user=self.user, category_id=values.pop('category'), **values), None
+
+    def clean_amount(self, value):
+        if value in (None, ''):
+            raise ValueError('This field is required.')
+        try:
+            amount = Decimal(str(value))
+        except InvalidOperation:
+            raise ValueError('A valid number is required.')
+        if not amount.is_finite():
+            raise ValueError('A valid number is required.')
+        if amount > MAX_AMOUNT:
+            raise ValueError('Ensure that there are no more than 10 digits in total.')
+        if amount < MIN_AMOUNT:
+            raise ValueError('Ensure this value is greater than or equal to 0.01.')
+        if amount != amount.quantize(Decimal('0.01')):
+            raise ValueError('Ensure that there are no more than 2 decimal places.')
+        return amount.quantize(Decimal('0.01'))
+
+    def clean_type(self, value):
+        if not isinstance(value, str) or value not in TRANSACTION_TYPES:
+            raise ValueError(f'"{value}" is not a valid choice.')
+        return value
+
+    def clean_category(self, value):
+        if value in (None, ''):
+            raise ValueError('This field is required.')
+        category_id = None
+        # JSON ``true`` is an int in Python, not a category id.
+        if (isinstance(value, int) and not isinstance(value, bool)) or (isinstance(value, str) and value.isdigit()):
+            category_id = self.categories_by_id.get(int(value))
+        elif isinstance(value, str):
+            category_id = self.categories_by_name.get(value.casefold())
+        if category_id is None:
+            raise ValueError(f'Invalid category "{value}" - object does not exist.')
+        return category_id
+
+    def clean_date(self, value):
+        if not value or not isinstance(value, str):
+            raise ValueError('This field is required.')
+        try:
+            parsed = parse_datetime(value)
+            if parsed is None:
+                day = parse_date(value)
+                parsed = datetime.combine(day, time.min) if day else None
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValueError('Datetime has wrong format. Use ISO 8601 (YYYY-MM-DD[THH:MM[:ss]]).')
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed, timezone.get_default_timezone())
+        return parsed
+
+    def clean_description(self, value):
+        if value is None:
+            return ''
+        if not isinstance(value, str):
+            raise ValueError('Not a valid string.')
+        return value
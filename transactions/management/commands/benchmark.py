@@ -0,0 +1,345 @@
+import json
+import math
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils import timezone
+
+from budget_tracker.periods import year_month
+from budgets.models import Budget
+from budgets.spending import reconcile
+from categories.models import Category
+from transactions.models import Transaction
+from transactions.sync import get_changes
+from transactions.synthetic import BENCHMARK_PASSWORD, generate_ledger
+
+
+# Routes that are not timed, with the reason recorded in the report.
+SKIPPED_ROUTES = {
+    'admin/': 'Django admin',
+    'api/users/logout/': 'revokes the benchmark token',
+    'api/auth/logout/': 'revokes the benchmark token',
+    'api/users/change-password/': 'revokes the benchmark token',
+    'api/auth/change-password/': 'revokes the benchmark token',
+    'api/auth/register/': 'same view as api/users/register/',
+    'api/transactions/events/': 'endless server-sent event stream (ASGI only)',
+}
+
+
+def percentile(samples, percent):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(percent / 100 * len(ordered)) - 1, 0)]
+
+
+def iter_routes(patterns=None, prefix=''):
+    """Yield the full route of every URL pattern, e.g. 'api/transactions/<int:pk>/'."""
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            if route in SKIPPED_ROUTES:
+                yield route
+                continue
+            yield from iter_routes(pattern.url_patterns, route)
+        elif isinstance(pattern, URLPattern):
+            yield route
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a synthetic ledger in a throwaway database and time every endpoint in-process, '
+        'writing latency percentiles, query counts and peak memory to a JSON report'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='Number of users to generate')
+        parser.add_argument('--transactions', type=int, default=1000, help='Transactions per user')
+        parser.add_argument('--days', type=int, default=730, help='Days of history to spread transactions over')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the generated ledger')
+        parser.add_argument('--iterations', type=int, default=30, help='Timed requests per endpoint and cache state')
+        parser.add_argument('--output', help='Report path (default: benchmark-<timestamp>.json)')
+        parser.add_argument('--compare', help='Earlier report to compare p95 latencies against')
+        parser.add_argument(
+            '--keep', action='store_true',
+            help='Generate into the configured database and keep the data instead of using a test database',
+        )
+
+    def handle(self, *args, **options):
+        """Set up the database, generate the ledger, run the scenarios and write the report."""
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as report_file:
+                    baseline = json.load(report_file)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read {options['compare']}: {exc}")
+
+        old_name = None
+        if not options['keep']:
+            old_name = connection.settings_dict['NAME']
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            for alias in settings.CACHES:
+                caches[alias].clear()
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], SINGLE_PROCESS=True):
+                report = self._run(options)
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        output = options['output'] or f"benchmark-{timezone.now():%Y%m%d-%H%M%S}.json"
+        with open(output, 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+        self._print(report, baseline)
+        self.stdout.write(self.style.SUCCESS(f'Report written to {output}'))
+
+    def _run(self, options):
+        started = time.perf_counter()
+        users = generate_ledger(
+            users=options['users'],
+            transactions_per_user=options['transactions'],
+            days=options['days'],
+            seed=options['seed'],
+        )
+        generation_seconds = time.perf_counter() - started
+        self.stdout.write(
+            f"Generated {len(users)} users x {options['transactions']} transactions "
+            f'in {generation_seconds:.1f}s'
+        )
+
+        user = users[0]
+        client = Client(HTTP_AUTHORIZATION=f'Token {user.auth_token.key}')
+        context = {
+            'user': user,
+            'transaction_id': Transaction.objects.filter(user=user).values_list('pk', flat=True).first(),
+            'category_id': Category.objects.values_list('pk', flat=True).first(),
+            'counter': 0,
+        }
+        # A budget per category for this month, as on a dashboard.
+        Budget.objects.bulk_create(
+            Budget(user=user, category_id=category_id, period=year_month(timezone.localdate()), limit_cents=50000)
+            for category_id in Category.objects.values_list('pk', flat=True)
+        )
+        reconcile(Budget.objects.filter(user=user), fix=True)
+        context['budget_id'] = Budget.objects.filter(user=user).values_list('pk', flat=True).first()
+        scenarios = self._scenarios(context)
+
+        endpoints = {}
+        skipped = {}
+        for route in dict.fromkeys(iter_routes()):
+            reason = SKIPPED_ROUTES.get(route)
+            if reason is None and route not in scenarios:
+                reason = 'no scenario defined'
+            if reason is not None:
+                skipped[route] = reason
+                continue
+            for name, method, build in scenarios[route]:
+                endpoints[name] = self._measure(client, method, build, options['iterations'])
+                self.stdout.write(f'  {name}')
+
+        return {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'git_commit': self._git_commit(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'users': options['users'],
+                'transactions_per_user': options['transactions'],
+                'days': options['days'],
+                'seed': options['seed'],
+                'iterations': options['iterations'],
+            },
+            'generation': {
+                'seconds': round(generation_seconds, 2),
+                'transactions': len(users) * options['transactions'],
+            },
+            'endpoints': endpoints,
+            'skipped': skipped,
+        }
+
+    def _scenarios(self, context):
+        """Map each route to (report name, method, request builder) scenarios."""
+        def get(path, **params):
+            return lambda: (path, params)
+
+        def new_user():
+            context['counter'] += 1
+            number = context['counter']
+            return '/api/users/register/', {
+                'username': f'bench_signup_{number}', 'email': f'bench_signup_{number}@example.com',
+                'password': 'Benchmark-pass-123', 'password_confirm': 'Benchmark-pass-123',
+            }
+
+        def login(path):
+            return lambda: (path, {'username': context['user'].username, 'password': BENCHMARK_PASSWORD})
+
+        def new_transaction():
+            return '/api/transactions/', {
+                'amount': '12.50', 'type': 'expense', 'category': context['category_id'],
+                'date': timezone.now().isoformat(), 'description': 'Benchmark coffee',
+            }
+
+        def bulk_import():
+            rows = [
+                {'amount': '3.20', 'type': 'expense', 'category': context['category_id'],
+                 'date': (timezone.now() - timedelta(days=index)).date().isoformat(), 'description': 'Bulk row'}
+                for index in range(100)
+            ]
+            return '/api/transactions/bulk/', rows
+
+        def changes():
+            since = get_changes(context['user'], None)['cursor']
+            return '/api/transactions/changes/', {'since': since}
+
+        transaction_path = f"/api/transactions/{context['transaction_id']}/"
+        category_path = f"/api/categories/{context['category_id']}/"
+        year_ago = (timezone.now() - timedelta(days=365)).date().isoformat()
+        this_month = timezone.localdate().isoformat()
+        return {
+            '': [('GET /', 'get', get('/'))],
+            'login/': [('GET /login/', 'get', get('/login/'))],
+            'register/': [('GET /register/', 'get', get('/register/'))],
+            'dashboard/': [('GET /dashboard/', 'get', get('/dashboard/'))],
+            'profile/': [('GET /profile/', 'get', get('/profile/'))],
+            'api/': [('GET /api/', 'get', get('/api/'))],
+            'api/users/register/': [('POST /api/users/register/', 'post', new_user)],
+            'api/users/me/': [('GET /api/users/me/', 'get', get('/api/users/me/'))],
+            'api/users/login/': [('POST /api/users/login/', 'post', login('/api/users/login/'))],
+            'api/auth/me/': [('GET /api/auth/me/', 'get', get('/api/auth/me/'))],
+            'api/auth/login/': [('POST /api/auth/login/', 'post', login('/api/auth/login/'))],
+            'api/categories/': [('GET /api/categories/', 'get', get('/api/categories/'))],
+            'api/categories/<int:pk>/': [('GET /api/categories/{id}/', 'get', get(category_path))],
+            'api/transactions/': [
+                ('GET /api/transactions/', 'get', get('/api/transactions/')),
+                ('GET /api/transactions/?page=10', 'get', get('/api/transactions/', page=10)),
+                ('POST /api/transactions/', 'post', new_transaction),
+            ],
+            'api/transactions/<int:pk>/': [('GET /api/transactions/{id}/', 'get', get(transaction_path))],
+            'api/transactions/filter/': [
+                ('GET /api/transactions/filter/?type&start_date', 'get',
+                 get('/api/transactions/filter/', type='expense', start_date=year_ago)),
+                ('GET /api/transactions/filter/?search', 'get', get('/api/transactions/filter/', search='coffee')),
+            ],
+            'api/transactions/changes/': [('GET /api/transactions/changes/?since (idle)', 'get', changes)],
+            'api/transactions/search/': [('GET /api/transactions/search/?q', 'get', get('/api/transactions/search/', q='groc'))],
+            'api/transactions/export/': [('GET /api/transactions/export/', 'get', get('/api/transactions/export/'))],
+            'api/transactions/bulk/': [('POST /api/transactions/bulk/ (100 rows)', 'post', bulk_import)],
+            'api/summary/': [
+                ('GET /api/summary/', 'get', get('/api/summary/')),
+                ('GET /api/summary/?start_date&end_date', 'get',
+                 get('/api/summary/', start_date=f'{year_ago}T12:30:00', end_date=timezone.now().date().isoformat())),
+            ],
+            'api/summary/categories/': [('GET /api/summary/categories/', 'get', get('/api/summary/categories/'))],
+            'api/summary/timeseries/': [
+                ('GET /api/summary/timeseries/?granularity=month', 'get',
+                 get('/api/summary/timeseries/', granularity='month')),
+                ('GET /api/summary/timeseries/?granularity=day&by_category', 'get',
+                 get('/api/summary/timeseries/', granularity='day', by_category='true', start_date=year_ago)),
+            ],
+            'api/summary/compare/': [
+                ('GET /api/summary/compare/?period x4', 'get',
+                 get('/api/summary/compare/', period=[year_ago[:4], this_month[:4], year_ago[:7], this_month[:7]])),
+            ],
+            'api/summary/forecast/': [('GET /api/summary/forecast/', 'get', get('/api/summary/forecast/'))],
+            'api/budgets/': [('GET /api/budgets/', 'get', get('/api/budgets/'))],
+            'api/budgets/<int:pk>/': [('GET /api/budgets/{id}/', 'get', get(f"/api/budgets/{context['budget_id']}/"))],
+            'api/summary/stats/percentiles/': [
+                ('GET /api/summary/stats/percentiles/', 'get', get('/api/summary/stats/percentiles/')),
+            ],
+            'api/summary/stats/categories/': [
+                ('GET /api/summary/stats/categories/?type&start_date', 'get',
+                 get('/api/summary/stats/categories/', type='all', start_date=year_ago)),
+            ],
+            'api/summary/stats/largest/': [
+                ('GET /api/summary/stats/largest/?limit', 'get', get('/api/summary/stats/largest/', limit=50)),
+            ],
+        }
+
+    def _request(self, client, method, build):
+        path, data = build()
+        if method == 'get':
+            response = client.get(path, data)
+        else:
+            response = client.post(path, data, content_type='application/json')
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        response.close()
+        return response
+
+    def _measure(self, client, method, build, iterations):
+        """Time cold (caches cleared before each request) and warm requests."""
+        result = {'method': method.upper()}
+        for state in ('cold', 'warm'):
+            latencies = []
+            queries = []
+            statuses = set()
+            for _ in range(iterations):
+                if state == 'cold':
+                    for alias in settings.CACHES:
+                        caches[alias].clear()
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = self._request(client, method, build)
+                    latencies.append((time.perf_counter() - started) * 1000)
+                queries.append(len(captured))
+                statuses.add(response.status_code)
+            result[state] = {
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p95_ms': round(percentile(latencies, 95), 2),
+                'p99_ms': round(percentile(latencies, 99), 2),
+                'mean_ms': round(sum(latencies) / len(latencies), 2),
+                'queries': round(sum(queries) / len(queries), 2),
+                'status': sorted(statuses),
+            }
+
+        for alias in settings.CACHES:
+            caches[alias].clear()
+        tracemalloc.start()
+        self._request(client, method, build)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        reset_queries()
+        result['peak_memory_kib'] = round(peak / 1024)
+        return result
+
+    def _git_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=settings.BASE_DIR,
+            ).stdout.strip() or None
+        except OSError:
+            return None
+
+    def _print(self, report, baseline):
+        previous = (baseline or {}).get('endpoints', {})
+        header = f"{'endpoint':<52} {'cold p95':>9} {'warm p95':>9} {'queries':>8} {'peak KiB':>9}"
+        if baseline:
+            header += f" {'was p95':>9} {'change':>8}"
+        self.stdout.write(header)
+        for name, result in report['endpoints'].items():
+            line = (
+                f"{name:<52} {result['cold']['p95_ms']:>9.2f} {result['warm']['p95_ms']:>9.2f} "
+                f"{result['cold']['queries']:>8.1f} {result['peak_memory_kib']:>9}"
+            )
+            if name in previous:
+                before = previous[name]['cold']['p95_ms']
+                change = (result['cold']['p95_ms'] - before) / before * 100 if before else 0
+                line += f' {before:>9.2f} {change:>+7.0f}%'
+            self.stdout.write(line)
+        for route, reason in report['skipped'].items():
+            self.stdout.write(f'  skipped {route or "/"}: {reason}')
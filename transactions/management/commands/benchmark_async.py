@@ -0,0 +1,188 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from asgiref.sync import ThreadSensitiveContext
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client, override_settings
+from django.utils import timezone
+
+from transactions.synthetic import generate_ledger
+from .benchmark import percentile
+
+
+class QueryLatency:
+    """Execute wrapper that adds a fixed delay to every query, like a database server's round trip."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def __call__(self, execute, sql, params, many, context):
+        time.sleep(self.seconds)
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a synthetic ledger in a throwaway database and compare the throughput of the '
+        'summary and transaction list reads served by WSGI worker threads and by the ASGI application'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='Number of users to generate')
+        parser.add_argument('--transactions', type=int, default=1000, help='Transactions per user')
+        parser.add_argument('--days', type=int, default=730, help='Days of history to spread transactions over')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the generated ledger')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint and server')
+        parser.add_argument('--concurrency', type=int, default=20, help='Clients sending requests at the same time')
+        parser.add_argument('--threads', type=int, default=4, help='Worker threads of the WSGI server')
+        parser.add_argument(
+            '--query-latency', type=float, default=0,
+            help='Milliseconds added to every query, to model a database server over the network',
+        )
+        parser.add_argument(
+            '--cached', action='store_true',
+            help='Keep the response cache on (by default every request reaches the database)',
+        )
+
+    def handle(self, *args, **options):
+        """Set up the database, generate the ledger and time both servers on every endpoint."""
+        if min(options['requests'], options['concurrency'], options['threads']) < 1:
+            raise CommandError('--requests, --concurrency and --threads must be positive')
+        # Queueing and the added latency would flood the slow-query log.
+        overrides = {
+            'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver'],
+            'SLOW_QUERY_THRESHOLD_MS': float('inf'),
+            'SINGLE_PROCESS': True,
+        }
+        if not options['cached']:
+            overrides['CACHES'] = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        latency = QueryLatency(options['query_latency'] / 1000)
+
+        def add_latency(sender, connection, **kwargs):
+            connection.execute_wrappers.append(latency)
+
+        try:
+            users = generate_ledger(
+                users=options['users'], transactions_per_user=options['transactions'],
+                days=options['days'], seed=options['seed'], prefix='async',
+            )
+            tokens = [user.auth_token.key for user in users]
+            if latency.seconds:
+                # Every thread opens its own connection; the main thread's is already open.
+                connection_created.connect(add_latency)
+                connection.execute_wrappers.append(latency)
+            with override_settings(**overrides):
+                results = self._run(tokens, options)
+        finally:
+            connection_created.disconnect(add_latency)
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(
+            f"\n{options['concurrency']} clients, {options['threads']} WSGI threads, {os.cpu_count()} CPUs, "
+            f"{options['query_latency']:g} ms per query, response cache {'on' if options['cached'] else 'off'}"
+        )
+        self.stdout.write(
+            f"{'endpoint':<48} {'server':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'speedup':>8}"
+        )
+        for name, (wsgi, asgi) in results.items():
+            for server, result in (('WSGI', wsgi), ('ASGI', asgi)):
+                speedup = f"{result['rps'] / wsgi['rps']:>7.2f}x" if server == 'ASGI' else ''
+                self.stdout.write(
+                    f"{name if server == 'WSGI' else '':<48} {server:>6} {result['rps']:>8.1f} "
+                    f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {speedup:>8}"
+                )
+        self.stdout.write(self.style.SUCCESS('Benchmark complete.'))
+
+    def _run(self, tokens, options):
+        year_ago = (timezone.now() - timedelta(days=365)).date().isoformat()
+        today = timezone.now().date().isoformat()
+        scenarios = [
+            ('GET /api/transactions/', '/api/transactions/', {}),
+            ('GET /api/transactions/?cursor', '/api/transactions/', {'cursor': ''}),
+            ('GET /api/transactions/filter/?type&start_date', '/api/transactions/filter/',
+             {'type': 'expense', 'start_date': year_ago}),
+            ('GET /api/summary/', '/api/summary/', {}),
+            ('GET /api/summary/?start_date&end_date', '/api/summary/',
+             {'start_date': f'{year_ago}T12:30:00', 'end_date': today}),
+            ('GET /api/summary/categories/', '/api/summary/categories/', {}),
+        ]
+        results = {}
+        for name, path, params in scenarios:
+            results[name] = (
+                self._measure_wsgi(tokens, path, params, options),
+                self._measure_asgi(tokens, path, params, options),
+            )
+            self.stdout.write(f'  {name}')
+        return results
+
+    def _summarize(self, latencies, elapsed):
+        return {
+            'rps': len(latencies) / elapsed,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+        }
+
+    def _measure_wsgi(self, tokens, path, params, options):
+        """Clients in threads, at most ``--threads`` of them inside the handler at once."""
+        workers = threading.BoundedSemaphore(options['threads'])
+        remaining = iter(range(options['requests']))
+        lock = threading.Lock()
+        latencies = []
+
+        def run_client(index):
+            client = Client(HTTP_AUTHORIZATION=f'Token {tokens[index % len(tokens)]}')
+            try:
+                while True:
+                    with lock:
+                        if next(remaining, None) is None:
+                            return
+                    started = time.perf_counter()
+                    with workers:
+                        response = client.get(path, params)
+                    latencies.append(time.perf_counter() - started)
+                    if response.status_code != 200:
+                        raise CommandError(f'WSGI {path} returned {response.status_code}')
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            started = time.perf_counter()
+            for future in [pool.submit(run_client, index) for index in range(options['concurrency'])]:
+                future.result()
+            elapsed = time.perf_counter() - started
+        return self._summarize(latencies, elapsed)
+
+    def _measure_asgi(self, tokens, path, params, options):
+        """Clients as coroutines on one event loop, all served by the ASGI handler."""
+        remaining = iter(range(options['requests']))
+        latencies = []
+
+        async def run_client(index):
+            client = AsyncClient()
+            headers = {'Authorization': f'Token {tokens[index % len(tokens)]}'}
+            while next(remaining, None) is not None:
+                started = time.perf_counter()
+                # As in ASGIHandler, each request's thread-sensitive code gets a thread of its own.
+                async with ThreadSensitiveContext():
+                    response = await client.get(path, params, headers=headers)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    raise CommandError(f'ASGI {path} returned {response.status_code}')
+
+        async def run_clients():
+            await asyncio.gather(*(run_client(index) for index in range(options['concurrency'])))
+
+        started = time.perf_counter()
+        asyncio.run(run_clients())
+        elapsed = time.perf_counter() - started
+        return self._summarize(latencies, elapsed)
@@ -0,0 +1,95 @@
+import random
+import time
+import tracemalloc
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from categories.models import Category
+from transactions.models import Transaction
+from transactions.serializers import TransactionSerializer
+from transactions.views import transaction_export_view
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Measure time and peak memory of the streaming transaction export at several ledger sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+            help='Number of transactions to export in each run',
+        )
+        parser.add_argument(
+            '--file-format', choices=['csv', 'ndjson'], default='csv',
+            help='Export format to benchmark',
+        )
+        parser.add_argument(
+            '--compare-serializer', action='store_true',
+            help='Also measure rendering the same rows through TransactionSerializer',
+        )
+
+    def handle(self, *args, **options):
+        """Seed a throwaway ledger per size, export it and roll everything back."""
+        self.stdout.write(f"{'rows':>10} {'method':>12} {'seconds':>9} {'MiB out':>9} {'peak KiB':>10}")
+        for size in options['sizes']:
+            with transaction.atomic():
+                user = self._seed(size)
+                self._report(size, 'stream', lambda: self._stream(user, options['file_format']))
+                if options['compare_serializer']:
+                    self._report(size, 'serializer', lambda: self._serialize(user))
+                transaction.set_rollback(True)
+
+    def _seed(self, size):
+        suffix = uuid.uuid4().hex[:8]
+        user = User.objects.create_user(f'bench_{suffix}', f'bench_{suffix}@example.com', None)
+        categories = Category.objects.bulk_create(
+            [Category(name=f'bench {suffix} {index}') for index in range(10)]
+        )
+        rng = random.Random(size)
+        now = timezone.now()
+        batch = []
+        for index in range(size):
+            batch.append(Transaction(
+                user=user,
+                amount=Decimal(rng.randint(100, 500000)) / 100,
+                type=rng.choice(['income', 'expense']),
+                category=rng.choice(categories),
+                date=now - timedelta(minutes=rng.randint(0, 60 * 24 * 365 * 5)),
+                description=f'Benchmark transaction {index}',
+            ))
+            if len(batch) == 5000:
+                Transaction.objects.bulk_create(batch)
+                batch = []
+        Transaction.objects.bulk_create(batch)
+        return user
+
+    def _stream(self, user, file_format):
+        request = APIRequestFactory().get('/api/transactions/export/', {'file_format': file_format})
+        force_authenticate(request, user=user)
+        response = transaction_export_view(request)
+        return sum(len(chunk) for chunk in response.streaming_content)
+
+    def _serialize(self, user):
+        queryset = Transaction.objects.filter(user=user).select_related('category', 'user')
+        data = TransactionSerializer(queryset, many=True).data
+        return len(repr(data))
+
+    def _report(self, size, method, func):
+        tracemalloc.start()
+        started = time.perf_counter()
+        output_bytes = func()
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.stdout.write(
+            f'{size:>10} {method:>12} {elapsed:>9.2f} {output_bytes / 2**20:>9.1f} {peak / 1024:>10.0f}'
+        )
@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from transactions.models import TransactionTombstone
+
+
+class Command(BaseCommand):
+    help = 'Delete tombstones of deleted transactions that are older than the sync retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=getattr(settings, 'TRANSACTION_TOMBSTONE_RETENTION_DAYS', 30),
+            help='Keep tombstones from the last this many days',
+        )
+
+    def handle(self, *args, **options):
+        """Delete expired tombstones; clients with older cursors are told to reload."""
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        deleted, _ = TransactionTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} tombstones older than {options['days']} days.")
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from transactions.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index over transaction descriptions'
+
+    def handle(self, *args, **options):
+        """Drop and re-index every transaction with the configured backend."""
+        backend = get_search_backend()
+        count = backend.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt the {backend.name} search index ({count} entries).')
+        )
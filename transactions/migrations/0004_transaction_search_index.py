@@ -0,0 +1,65 @@
+import re
+
+from django.db import OperationalError, migrations
+
+
+# The search index as defined when this migration was written, kept here so
+# later changes to transactions.search cannot alter it.
+FTS_TABLE = 'transactions_transaction_fts'
+TOKEN_RE = re.compile(r'\w+')
+MAX_TOKEN_LENGTH = 64
+
+
+def tokenize(text):
+    return [token[:MAX_TOKEN_LENGTH] for token in TOKEN_RE.findall((text or '').casefold())]
+
+
+def create_search_index(apps, schema_editor):
+    Transaction = apps.get_model('transactions', 'Transaction')
+    TransactionSearchToken = apps.get_model('transactions', 'TransactionSearchToken')
+    connection = schema_editor.connection
+
+    if connection.vendor == 'sqlite':
+        try:
+            schema_editor.execute(
+                f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5('
+                f"description, user_id UNINDEXED, tokenize='unicode61 remove_diacritics 2')"
+            )
+        except OperationalError:
+            # SQLite built without FTS5; use the inverted index instead.
+            pass
+        else:
+            schema_editor.execute(
+                f'INSERT INTO {FTS_TABLE}(rowid, description, user_id) '
+                f'SELECT id, description, user_id FROM {Transaction._meta.db_table}'
+            )
+            return
+
+    batch = []
+    rows = Transaction.objects.values_list('pk', 'user_id', 'description').iterator(chunk_size=2000)
+    for pk, user_id, description in rows:
+        batch.extend(
+            TransactionSearchToken(transaction_id=pk, user_id=user_id, token=token)
+            for token in tokenize(description)
+        )
+        if len(batch) >= 5000:
+            TransactionSearchToken.objects.bulk_create(batch)
+            batch = []
+    TransactionSearchToken.objects.bulk_create(batch)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+    apps.get_model('transactions', 'TransactionSearchToken').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0003_transactionsearchtoken'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0005_transaction_changes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'date', 'created_at', 'id'], name='transaction_user_id_ed3d58_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'type', 'date', 'created_at', 'id'], name='transaction_user_id_417934_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'category', 'date', 'created_at', 'id'], name='transaction_user_id_1402f6_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='transaction_user_id_4685bf_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='transaction_user_id_8af7f1_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='transaction_categor_e3f163_idx',
+        ),
+    ]
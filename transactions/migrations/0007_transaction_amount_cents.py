@@ -0,0 +1,49 @@
+import django.core.validators
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Cast, Round
+
+
+def amounts_to_cents(apps, schema_editor):
+    Transaction = apps.get_model('transactions', 'Transaction')
+    Transaction.objects.update(amount_cents=Cast(Round(F('amount') * 100), models.BigIntegerField()))
+
+
+def cents_to_amounts(apps, schema_editor):
+    Transaction = apps.get_model('transactions', 'Transaction')
+    batch = []
+    for instance in Transaction.objects.only('id', 'amount_cents').iterator(chunk_size=2000):
+        instance.amount = Decimal(instance.amount_cents).scaleb(-2)
+        batch.append(instance)
+        if len(batch) >= 2000:
+            Transaction.objects.bulk_update(batch, ['amount'])
+            batch = []
+    Transaction.objects.bulk_update(batch, ['amount'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0006_composite_listing_indexes'),
+        # Reads ``Transaction.amount``, which this migration removes.
+        ('summary', '0002_populate_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='amount_cents',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.RunPython(amounts_to_cents, cents_to_amounts),
+        migrations.RemoveField(
+            model_name='transaction',
+            name='amount',
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='amount_cents',
+            field=models.BigIntegerField(help_text='Transaction amount in cents (must be positive)', validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+    ]
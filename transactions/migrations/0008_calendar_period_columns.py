@@ -0,0 +1,79 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:53
+
+import zoneinfo
+
+from django.db import migrations, models
+
+
+# The calendar columns as computed when this migration was written, kept
+# here so later changes to the application's helpers cannot alter it.
+def calendar_fields(value, tz):
+    day = value.astimezone(tz).date()
+    year, week, _ = day.isocalendar()
+    return day, day.year * 100 + day.month, year * 100 + week
+
+
+def fill_calendar_columns(apps, schema_editor):
+    Transaction = apps.get_model('transactions', 'Transaction')
+    rows = Transaction.objects.values_list('pk', 'date', 'user__timezone').order_by().iterator(chunk_size=2000)
+    zones = {}
+    batch = []
+    for pk, date, timezone in rows:
+        if timezone not in zones:
+            zones[timezone] = zoneinfo.ZoneInfo(timezone)
+        local_date, year_month, iso_week = calendar_fields(date, zones[timezone])
+        batch.append(Transaction(pk=pk, local_date=local_date, year_month=year_month, iso_week=iso_week))
+        if len(batch) >= 2000:
+            Transaction.objects.bulk_update(batch, ['local_date', 'year_month', 'iso_week'])
+            batch = []
+    Transaction.objects.bulk_update(batch, ['local_date', 'year_month', 'iso_week'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0007_transaction_amount_cents'),
+        ('users', '0002_user_timezone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='iso_week',
+            field=models.PositiveIntegerField(editable=False, help_text='ISO week of the local date, as the ISO year * 100 + week', null=True),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='local_date',
+            field=models.DateField(editable=False, help_text="Calendar day of the date in the user's time zone", null=True),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='year_month',
+            field=models.PositiveIntegerField(editable=False, help_text='Month of the local date, as YYYYMM', null=True),
+        ),
+        migrations.RunPython(fill_calendar_columns, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='transaction',
+            name='iso_week',
+            field=models.PositiveIntegerField(editable=False, help_text='ISO week of the local date, as the ISO year * 100 + week'),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='local_date',
+            field=models.DateField(editable=False, help_text="Calendar day of the date in the user's time zone"),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='year_month',
+            field=models.PositiveIntegerField(editable=False, help_text='Month of the local date, as YYYYMM'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'year_month', 'date', 'created_at', 'id'], name='transaction_user_id_215902_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'iso_week', 'date', 'created_at', 'id'], name='transaction_user_id_edbd02_idx'),
+        ),
+    ]
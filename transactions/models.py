@@ -1,12 +1,53 @@
-from django.db import models
+from collections import namedtuple
+from django.conf import settings
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
-from decimal import Decimal
+
+from budget_tracker.money import from_cents, to_cents
+from budget_tracker.periods import calendar_fields, get_zone
 
 
 User = get_user_model()
 
 
+# The fields that derived data (summary rollups etc.) is keyed on.
+TransactionState = namedtuple('TransactionState', ['user_id', 'category_id', 'type', 'amount_cents', 'local_date'])
+
+
+def stored_timezones(user_ids):
+    """
+    Return the time zones of users as stored in the database, by user id.
+    The ``request.user`` a transaction is written for may be a copy cached
+    before its owner moved, so calendar columns are never computed from it.
+    """
+    rows = User.objects.filter(pk__in=set(user_ids)).values_list('pk', 'timezone')
+    return {pk: get_zone(name or settings.TIME_ZONE) for pk, name in rows}
+
+
+class TransactionQuerySet(models.QuerySet):
+
+    def bulk_create(self, objs, *args, **kwargs):
+        # Bulk inserts skip ``save()``, so the calendar columns are filled here.
+        objs = list(objs)
+        timezones = stored_timezones(instance.user_id for instance in objs)
+        for instance in objs:
+            instance.localize(timezones[instance.user_id])
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def localize(self, tz):
+        """
+        Recompute the calendar columns of the transactions in time zone ``tz``,
+        e.g. after their owner moved. Returns the number of rows changed.
+        """
+        changed = []
+        for pk, date, stored in self.values_list('pk', 'date', 'local_date').order_by().iterator(chunk_size=2000):
+            local_date, year_month, iso_week = calendar_fields(date, tz)
+            if local_date != stored:
+                changed.append(self.model(pk=pk, local_date=local_date, year_month=year_month, iso_week=iso_week))
+        return self.model.objects.bulk_update(changed, ['local_date', 'year_month', 'iso_week'], batch_size=1000)
+
+
 class Transaction(models.Model):
     """
     Model to represent financial transactions (income or expenses).
@@ -17,11 +58,9 @@ class Transaction(models.Model):
     ]
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='transactions')
-    amount = models.DecimalField(
-        max_digits=10, 
-        decimal_places=2, 
-        validators=[MinValueValidator(Decimal('0.01'))],
-        help_text="Transaction amount (must be positive)"
+    amount_cents = models.BigIntegerField(
+        validators=[MinValueValidator(1)],
+        help_text="Transaction amount in cents (must be positive)"
     )
     type = models.CharField(max_length=10, choices=TRANSACTION_TYPES, help_text="Income or Expense")
     category = models.ForeignKey(
@@ -31,17 +70,128 @@ class Transaction(models.Model):
         help_text="Transaction category"
     )
     date = models.DateTimeField(help_text="Transaction date and time")
+    # Calendar periods of ``date`` in the owner's time zone, set on every write.
+    local_date = models.DateField(editable=False, help_text="Calendar day of the date in the user's time zone")
+    year_month = models.PositiveIntegerField(editable=False, help_text="Month of the local date, as YYYYMM")
+    iso_week = models.PositiveIntegerField(
+        editable=False, help_text="ISO week of the local date, as the ISO year * 100 + week"
+    )
     description = models.TextField(blank=True, help_text="Optional transaction description")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TransactionQuerySet.as_manager()
+
     class Meta:
         ordering = ['-date', '-created_at']
+        # Every listing filters on the user, optionally narrows by type or
+        # category and a date range, and returns rows newest first. Ending
+        # each index with the sort columns lets one index range scan both
+        # filter and order them. ``category`` alone is indexed by its FK.
+        # Months and weeks are matched on the precomputed period columns.
         indexes = [
-            models.Index(fields=['user', 'type']),
-            models.Index(fields=['user', 'date']),
-            models.Index(fields=['category']),
+            models.Index(fields=['user', 'date', 'created_at', 'id']),
+            models.Index(fields=['user', 'type', 'date', 'created_at', 'id']),
+            models.Index(fields=['user', 'category', 'date', 'created_at', 'id']),
+            models.Index(fields=['user', 'year_month', 'date', 'created_at', 'id']),
+            models.Index(fields=['user', 'iso_week', 'date', 'created_at', 'id']),
+            models.Index(fields=['user', 'updated_at']),
         ]
 
     def __str__(self):
         return f"{self.type.title()}: {self.amount} - {self.category.name} ({self.user.username})"
+
+    @property
+    def amount(self):
+        """The amount as a ``Decimal`` with two places."""
+        return None if self.amount_cents is None else from_cents(self.amount_cents)
+
+    @amount.setter
+    def amount(self, value):
+        self.amount_cents = None if value is None else to_cents(value)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Deferred loads (e.g. ``.only('id')``) must not trigger extra queries.
+        if set(TransactionState._fields) <= set(field_names):
+            instance._loaded_state = instance.get_state()
+        return instance
+
+    def get_state(self):
+        """Return the current values of the fields derived data depends on."""
+        return TransactionState(self.user_id, self.category_id, self.type, self.amount_cents, self.local_date)
+
+    def localize(self, tz=None):
+        """
+        Set the calendar period columns from ``date``, in the owner's stored
+        time zone unless ``tz`` is given.
+        """
+        if tz is None:
+            tz = stored_timezones([self.user_id])[self.user_id]
+        self.local_date, self.year_month, self.iso_week = calendar_fields(self.date, tz)
+
+    def get_previous_state(self):
+        """
+        Return the state as it was last loaded from or written to the database,
+        or None for a transaction that has not been saved yet.
+        """
+        return getattr(self, '_loaded_state', None)
+
+    def save(self, *args, **kwargs):
+        # Derived data is written by signal handlers; keep it in the same
+        # database transaction as the row itself.
+        update_fields = kwargs.get('update_fields')
+        relocalize = self.date is not None and (update_fields is None or {'date', 'user'} & set(update_fields))
+        if relocalize and update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'local_date', 'year_month', 'iso_week'}
+        with transaction.atomic():
+            if relocalize:
+                self.localize()
+            # Also when constructed with the pk of an existing row: that
+            # save is an update, and the old row must leave its buckets.
+            if self.pk and self.get_previous_state() is None:
+                stored = Transaction.objects.filter(pk=self.pk).first()
+                self._loaded_state = stored.get_state() if stored else None
+            super().save(*args, **kwargs)
+        self._loaded_state = self.get_state()
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
+
+class TransactionSearchToken(models.Model):
+    """
+    One word of a transaction's description, for the inverted-index search
+    backend used when SQLite FTS5 is not available (see ``transactions.search``).
+    """
+    transaction = models.ForeignKey(Transaction, on_delete=models.CASCADE, related_name='search_tokens')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    token = models.CharField(max_length=64)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'token']),
+        ]
+
+    def __str__(self):
+        return self.token
+
+
+class TransactionTombstone(models.Model):
+    """
+    Record of a deleted transaction, so clients syncing through the changes
+    endpoint learn about deletions (see ``transactions.sync``).
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    transaction_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_at']),
+        ]
+
+    def __str__(self):
+        return f"Deleted transaction {self.transaction_id} ({self.deleted_at:%Y-%m-%d %H:%M})"
@@ -0,0 +1,190 @@
+import base64
+import json
+from collections import OrderedDict
+from functools import partial
+
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from budget_tracker.async_views import gather_queries
+from budget_tracker.response_cache import cached_count, normalized_params
+
+
+class TransactionCursorPagination(BasePagination):
+    """
+    Keyset pagination over the (-date, -created_at, -id) ordering.
+
+    Each page is a single index range scan starting right after the row the
+    cursor points at, so deep pages cost the same as the first one. Cursors
+    are opaque base64 tokens. The total ``count`` is computed once per data
+    version and served from the response cache afterwards.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-date', '-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_queryset = self.page_queryset(queryset, request)
+        self.count = self.get_count(queryset)
+        return self.set_page(list(page_queryset))
+
+    async def apaginate_queryset(self, queryset, request):
+        """``paginate_queryset`` for async views; the count and the page are queried concurrently."""
+        page_queryset = self.page_queryset(queryset, request)
+        self.count, rows = await gather_queries(partial(self.get_count, queryset), partial(list, page_queryset))
+        return self.set_page(rows)
+
+    def get_count(self, queryset):
+        return cached_count(
+            queryset, self.request.user.pk, self.request.path,
+            normalized_params(self.request, exclude=(self.cursor_query_param, self.page_size_query_param)),
+        )
+
+    def page_queryset(self, queryset, request):
+        """Return the (unevaluated) queryset of the requested page, plus one row to detect more."""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+
+        self.position, self.reverse = self.decode_cursor(request)
+        ordering = self.ordering
+        if self.reverse:
+            ordering = tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            queryset = queryset.filter(self._after(self.position, self.reverse))
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+            self.has_previous, self.has_next = has_more, self.position is not None
+        else:
+            self.has_next, self.has_previous = has_more, self.position is not None
+
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return api_settings.PAGE_SIZE
+        return max(1, min(page_size, self.max_page_size))
+
+    def _after(self, position, reverse):
+        date, created_at, pk = position
+        if reverse:
+            return (
+                Q(date__gt=date)
+                | Q(date=date, created_at__gt=created_at)
+                | Q(date=date, created_at=created_at, id__gt=pk)
+            )
+        return (
+            Q(date__lt=date)
+            | Q(date=date, created_at__lt=created_at)
+            | Q(date=date, created_at=created_at, id__lt=pk)
+        )
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            position = (parse_datetime(data['d']), parse_datetime(data['c']), int(data['i']))
+            reverse = bool(data.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if None in position:
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, row, reverse=False):
+        data = {'d': row.date.isoformat(), 'c': row.created_at.isoformat(), 'i': row.pk}
+        if reverse:
+            data['r'] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'count': {'type': 'integer'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class AsyncPageNumberPagination(PageNumberPagination):
+    """
+    The default page number pagination, for async views. The count and the
+    page are queried concurrently, then the page number is validated
+    against the count with the same errors as DRF's pagination.
+    """
+
+    async def apaginate_queryset(self, queryset, request):
+        self.request = request
+        page_size = self.get_page_size(request)
+        paginator = self.django_paginator_class(queryset, page_size)
+        page_number = request.query_params.get(self.page_query_param) or 1
+
+        rows = None
+        if page_number in self.last_page_strings:
+            paginator.count, = await gather_queries(queryset.count)
+            page_number = paginator.num_pages
+        else:
+            try:
+                number = int(page_number)
+            except (TypeError, ValueError):
+                number = 0
+            if number >= 1:
+                offset = (number - 1) * page_size
+                paginator.count, rows = await gather_queries(
+                    queryset.count, partial(list, queryset[offset:offset + page_size]),
+                )
+            else:
+                # Invalid whatever the count; the paginator reports why.
+                paginator.count = 0
+
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        if rows is None:
+            rows, = await gather_queries(partial(list, self.page.object_list))
+        self.page.object_list = rows
+        return rows
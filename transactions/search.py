@@ -0,0 +1,191 @@
+"""
+Indexed full-text search over transaction descriptions.
+
+Two backends share one interface:
+
+* ``SQLiteFTSBackend`` queries an FTS5 shadow table keyed by transaction id
+  (created by migration 0003 when SQLite has FTS5 compiled in).
+* ``InvertedIndexBackend`` stores one ``TransactionSearchToken`` row per
+  word; used on other databases.
+
+Either index is kept in sync by the signal handlers in ``transactions.signals``
+(triggers would not survive the table rebuilds SQLite migrations perform).
+Writes that bypass the ORM need ``manage.py rebuild_search_index``.
+
+Both match every query word as a prefix and can rank results by relevance.
+Pick one with the ``TRANSACTION_SEARCH_BACKEND`` setting ('auto', 'fts5' or
+'inverted'); 'auto' uses FTS5 whenever the shadow table exists.
+"""
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.db.models.expressions import RawSQL
+
+
+FTS_TABLE = 'transactions_transaction_fts'
+TOKEN_RE = re.compile(r'\w+')
+MAX_TOKEN_LENGTH = 64
+MAX_QUERY_TOKENS = 8
+
+
+def tokenize(text):
+    """Split text into lower-cased word tokens."""
+    return [token[:MAX_TOKEN_LENGTH] for token in TOKEN_RE.findall((text or '').casefold())]
+
+
+def _query_tokens(query):
+    # Deduplicate while keeping order, and bound the work per request.
+    return list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TOKENS]
+
+
+class SQLiteFTSBackend:
+    name = 'fts5'
+
+    def _match_expression(self, tokens):
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    def matching_ids(self, user, query):
+        """Return a subquery of the ids of the user's transactions matching every word."""
+        tokens = _query_tokens(query)
+        if not tokens:
+            return RawSQL('SELECT NULL WHERE 0', ())
+        return RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND user_id = %s',
+            (self._match_expression(tokens), user.pk),
+        )
+
+    def ranked_ids(self, user, query, limit):
+        tokens = _query_tokens(query)
+        if not tokens:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND user_id = %s '
+                f'ORDER BY rank LIMIT %s',
+                (self._match_expression(tokens), user.pk, limit),
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def index(self, instances):
+        """(Re)index the given transactions."""
+        rows = [(instance.pk, instance.description, instance.user_id) for instance in instances]
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE}(rowid, description, user_id) VALUES (%s, %s, %s)', rows
+            )
+
+    def remove(self, transaction_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(pk,) for pk in transaction_ids])
+
+    def rebuild(self):
+        from .models import Transaction
+        count = 0
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            rows = Transaction.objects.values_list('pk', 'description', 'user_id').iterator(chunk_size=2000)
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= 5000:
+                    cursor.executemany(
+                        f'INSERT INTO {FTS_TABLE}(rowid, description, user_id) VALUES (%s, %s, %s)', batch
+                    )
+                    count += len(batch)
+                    batch = []
+            cursor.executemany(f'INSERT INTO {FTS_TABLE}(rowid, description, user_id) VALUES (%s, %s, %s)', batch)
+            count += len(batch)
+        return count
+
+
+class InvertedIndexBackend:
+    name = 'inverted'
+
+    def _token_filter(self, user, token):
+        from .models import TransactionSearchToken
+        return TransactionSearchToken.objects.filter(user=user, token__startswith=token).values('transaction_id')
+
+    def matching_ids(self, user, query):
+        """Return a subquery of the ids of the user's transactions matching every word."""
+        from .models import Transaction
+        queryset = Transaction.objects.filter(user=user)
+        tokens = _query_tokens(query)
+        if not tokens:
+            return queryset.none().values('id')
+        for token in tokens:
+            queryset = queryset.filter(id__in=self._token_filter(user, token))
+        return queryset.values('id')
+
+    def ranked_ids(self, user, query, limit):
+        from .models import Transaction
+        tokens = _query_tokens(query)
+        if not tokens:
+            return []
+        matches = Q()
+        for token in tokens:
+            matches |= Q(search_tokens__token__startswith=token)
+        queryset = (
+            Transaction.objects.filter(id__in=self.matching_ids(user, query))
+            .annotate(score=Count('search_tokens', filter=matches))
+            .order_by('-score', '-date', '-id')
+        )
+        return list(queryset.values_list('id', flat=True)[:limit])
+
+    def _token_rows(self, transaction_id, user_id, description):
+        from .models import TransactionSearchToken
+        return [
+            TransactionSearchToken(transaction_id=transaction_id, user_id=user_id, token=token)
+            for token in tokenize(description)
+        ]
+
+    def index(self, instances):
+        """(Re)index the given transactions."""
+        from .models import TransactionSearchToken
+        rows = []
+        for instance in instances:
+            rows.extend(self._token_rows(instance.pk, instance.user_id, instance.description))
+        with transaction.atomic():
+            TransactionSearchToken.objects.filter(transaction_id__in=[instance.pk for instance in instances]).delete()
+            TransactionSearchToken.objects.bulk_create(rows, batch_size=1000)
+
+    def remove(self, transaction_ids):
+        from .models import TransactionSearchToken
+        TransactionSearchToken.objects.filter(transaction_id__in=transaction_ids).delete()
+
+    def rebuild(self):
+        from .models import Transaction, TransactionSearchToken
+        count = 0
+        with transaction.atomic():
+            TransactionSearchToken.objects.all().delete()
+            batch = []
+            for pk, user_id, description in Transaction.objects.values_list(
+                'pk', 'user_id', 'description'
+            ).iterator(chunk_size=2000):
+                batch.extend(self._token_rows(pk, user_id, description))
+                if len(batch) >= 5000:
+                    TransactionSearchToken.objects.bulk_create(batch)
+                    count += len(batch)
+                    batch = []
+            TransactionSearchToken.objects.bulk_create(batch)
+            count += len(batch)
+        return count
+
+
+def fts_available():
+    return connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names()
+
+
+@lru_cache(maxsize=None)
+def _backend(name):
+    if name == 'auto':
+        name = 'fts5' if fts_available() else 'inverted'
+    return SQLiteFTSBackend() if name == 'fts5' else InvertedIndexBackend()
+
+
+def get_search_backend():
+    """Return the configured search backend."""
+    return _backend(getattr(settings, 'TRANSACTION_SEARCH_BACKEND', 'auto'))
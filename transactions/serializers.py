@@ -1,13 +1,23 @@
+from decimal import Decimal
 from rest_framework import serializers
 from .models import Transaction
-from categories.serializers import CategorySerializer
+from budget_tracker.money import CentsField
+from categories.serializers import NestedCategorySerializer
+
+
+def amount_field():
+    # Same validation and representation as the decimal column this used to be.
+    return CentsField(
+        source='amount_cents', min_value=Decimal('0.01'), help_text="Transaction amount (must be positive)",
+    )
 
 
 class TransactionSerializer(serializers.ModelSerializer):
     """
     Serializer for Transaction model with detailed category information.
     """
-    category_detail = CategorySerializer(source='category', read_only=True)
+    amount = amount_field()
+    category_detail = NestedCategorySerializer(source='category', read_only=True)
     user_username = serializers.CharField(source='user.username', read_only=True)
 
     class Meta:
@@ -28,6 +38,8 @@ class TransactionCreateUpdateSerializer(serializers.ModelSerializer):
     """
     Serializer for creating and updating transactions (minimal fields).
     """
+    amount = amount_field()
+
     class Meta:
         model = Transaction
         fields = ['amount', 'type', 'category', 'date', 'description']
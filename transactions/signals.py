@@ -0,0 +1,131 @@
+from collections import Counter
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from budget_tracker.periods import user_timezone
+from budget_tracker.response_cache import bump_data_version
+from categories.models import Category
+from .events import publish_change
+from .models import Transaction, TransactionTombstone
+from .search import get_search_backend
+
+
+User = get_user_model()
+
+
+# Sent with ``instances`` after ``bulk_create`` inserted transactions, which
+# bypasses post_save. Receivers run inside the inserting database transaction.
+transactions_bulk_created = Signal()
+
+# Sent with ``user`` after the calendar columns of the user's transactions
+# were recomputed for a new time zone, inside the same database transaction.
+transactions_localized = Signal()
+
+
+def data_changed(user_id):
+    """Invalidate the user's cached responses, then notify their open event streams."""
+    bump_data_version(user_id)
+    publish_change(user_id)
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+def bump_user_data_version(sender, instance, **kwargs):
+    """Invalidate the owner's cached responses and notify their event streams once the write is committed."""
+    user_ids = {instance.user_id}
+    previous = instance.get_previous_state()
+    if previous is not None:
+        user_ids.add(previous.user_id)
+    for user_id in user_ids:
+        transaction.on_commit(lambda user_id=user_id: data_changed(user_id))
+
+
+@receiver(transactions_bulk_created)
+def bump_user_data_version_on_bulk_create(sender, instances, **kwargs):
+    for user_id in {instance.user_id for instance in instances}:
+        transaction.on_commit(lambda user_id=user_id: data_changed(user_id))
+
+
+@receiver(post_save, sender=Transaction)
+def update_category_count_on_save(sender, instance, created, raw=False, **kwargs):
+    """Keep ``Category.transaction_count`` in step with inserts and recategorization."""
+    if raw:
+        return
+    previous = None if created else instance.get_previous_state()
+    if previous is not None and previous.category_id == instance.category_id:
+        return
+    if previous is not None:
+        Category.objects.filter(pk=previous.category_id, transaction_count__gt=0).update(
+            transaction_count=F('transaction_count') - 1
+        )
+    Category.objects.filter(pk=instance.category_id).update(transaction_count=F('transaction_count') + 1)
+
+
+@receiver(post_delete, sender=Transaction)
+def update_category_count_on_delete(sender, instance, **kwargs):
+    previous = instance.get_previous_state()
+    category_id = previous.category_id if previous is not None else instance.category_id
+    Category.objects.filter(pk=category_id, transaction_count__gt=0).update(
+        transaction_count=F('transaction_count') - 1
+    )
+
+
+@receiver(transactions_bulk_created)
+def update_category_counts_on_bulk_create(sender, instances, **kwargs):
+    counts = Counter(instance.category_id for instance in instances)
+    for category_id, count in counts.items():
+        Category.objects.filter(pk=category_id).update(transaction_count=F('transaction_count') + count)
+
+
+@receiver(post_save, sender=Transaction)
+def update_search_index_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not {'description', 'user'} & set(update_fields)):
+        return
+    get_search_backend().index([instance])
+
+
+@receiver(post_delete, sender=Transaction)
+def update_search_index_on_delete(sender, instance, **kwargs):
+    get_search_backend().remove([instance.pk])
+
+
+@receiver(transactions_bulk_created)
+def update_search_index_on_bulk_create(sender, instances, **kwargs):
+    get_search_backend().index(instances)
+
+
+@receiver(post_delete, sender=Transaction)
+def record_tombstone_on_delete(sender, instance, origin=None, **kwargs):
+    """Let syncing clients know the transaction is gone."""
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if issubclass(origin_model, User):
+        # The owner is being deleted along with every tombstone.
+        return
+    previous = instance.get_previous_state()
+    user_id = previous.user_id if previous is not None else instance.user_id
+    TransactionTombstone.objects.create(user_id=user_id, transaction_id=instance.pk)
+
+
+@receiver(post_save, sender=Transaction)
+def record_tombstone_on_reassign(sender, instance, created, raw=False, **kwargs):
+    """A transaction moved to another user disappears from the previous owner's ledger."""
+    previous = None if created or raw else instance.get_previous_state()
+    if previous is not None and previous.user_id != instance.user_id:
+        TransactionTombstone.objects.create(user_id=previous.user_id, transaction_id=instance.pk)
+
+
+@receiver(post_save, sender=User)
+def localize_transactions_on_timezone_change(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Move the user's transactions to the calendar days of their new time zone."""
+    previous = instance.get_previous_timezone()
+    if created or raw or previous is None or previous == instance.timezone:
+        return
+    if update_fields is not None and 'timezone' not in update_fields:
+        return
+    with transaction.atomic():
+        Transaction.objects.filter(user=instance).localize(user_timezone(instance))
+        transactions_localized.send(sender=Transaction, user=instance)
+    transaction.on_commit(lambda: data_changed(instance.pk))
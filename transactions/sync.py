@@ -0,0 +1,102 @@
+"""
+Delta sync for clients that keep a local copy of a user's transactions.
+
+A sync cursor records when the previous sync ran and the user's data version
+at that moment (see ``budget_tracker.response_cache``). While the version is
+unchanged nothing can have been written, so an idle poll costs no queries.
+Otherwise transactions updated since the cursor are read through the
+(user, updated_at) index and deletions through their tombstones. When the
+versions are kept per process they cannot tell whether another worker wrote,
+so cursors carry none and every sync reads the tables.
+
+Cursors reach back ``SYNC_OVERLAP`` before their timestamp to catch rows
+whose ``updated_at`` was set shortly before a slow commit. Clients must apply
+changes idempotently. Writes made with ``QuerySet.update()`` do not touch
+``updated_at`` and are not seen.
+"""
+import base64
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from budget_tracker.response_cache import get_data_version, versions_are_shared
+from .models import Transaction, TransactionTombstone
+
+
+SYNC_OVERLAP = timedelta(seconds=30)
+
+
+class InvalidSyncCursor(ValueError):
+    pass
+
+
+def encode_cursor(timestamp, version):
+    data = {'t': timestamp.isoformat(), 'v': version}
+    return base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(encoded):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+        timestamp = parse_datetime(data['t'])
+        version = data['v']
+    except (TypeError, ValueError, KeyError, UnicodeError):
+        raise InvalidSyncCursor('Invalid cursor')
+    if timestamp is None or timezone.is_naive(timestamp):
+        raise InvalidSyncCursor('Invalid cursor')
+    return timestamp, version
+
+
+def get_changes(user, since=None, limit=200):
+    """
+    Return the changes to ``user``'s transactions since the ``since`` cursor.
+
+    The result holds the new ``cursor``, the ``changed`` transactions (newest
+    update first), the ``deleted`` transaction ids and ``reset``, which is
+    True when the client must reload everything instead (no or expired cursor,
+    or more than ``limit`` changes).
+    """
+    # Read the version before the data, so a write committed in between is
+    # picked up by the next sync rather than lost.
+    version = get_data_version(user.pk) if versions_are_shared() else None
+    now = timezone.now()
+    result = {
+        'cursor': encode_cursor(now, version),
+        'changed': [],
+        'deleted': [],
+        'reset': False,
+    }
+    if since is None:
+        result['reset'] = True
+        return result
+
+    timestamp, since_version = decode_cursor(since)
+    if version is not None and since_version == version:
+        result['cursor'] = since
+        return result
+
+    retention = timedelta(days=getattr(settings, 'TRANSACTION_TOMBSTONE_RETENTION_DAYS', 30))
+    if timestamp < now - retention:
+        result['reset'] = True
+        return result
+
+    window_start = timestamp - SYNC_OVERLAP
+    changed = list(
+        Transaction.objects.filter(user=user, updated_at__gt=window_start)
+        .select_related('category', 'user')
+        .order_by('-updated_at', '-id')[:limit + 1]
+    )
+    if len(changed) > limit:
+        result['reset'] = True
+        return result
+
+    result['changed'] = changed
+    result['deleted'] = list(
+        TransactionTombstone.objects.filter(user=user, deleted_at__gt=window_start)
+        .values_list('transaction_id', flat=True)
+        .distinct()
+    )
+    return result
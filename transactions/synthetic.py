@@ -0,0 +1,153 @@
+"""
+Synthetic ledgers for benchmarks and load tests.
+
+``generate_ledger`` bulk-creates users (with API tokens) and transactions
+whose shape resembles real usage: a few categories dominate spending,
+activity is concentrated in recent months and during the day, amounts are
+log-normally distributed around a per-category median, and income arrives
+as a regular salary plus occasional extras. Everything is derived from one
+seed, so runs are repeatable.
+
+Rows are written with ``bulk_create`` and announced through
+``transactions_bulk_created`` so rollups, category counts and the search
+index stay consistent, exactly as for a bulk import.
+"""
+import math
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from categories.models import Category
+from .models import Transaction
+from .signals import transactions_bulk_created
+
+
+User = get_user_model()
+
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+# Category name -> (median amount, descriptions)
+EXPENSE_PROFILES = {
+    'Food & Dining': (25, ['Coffee at Starbucks', 'Groceries at Shoprite', 'Lunch with team', 'Pizza delivery', 'Suya and drinks']),
+    'Transportation': (15, ['Uber ride', 'Fuel top-up', 'Bus fare', 'Car wash', 'Train ticket']),
+    'Shopping': (60, ['New sneakers', 'Phone accessories', 'Household supplies', 'Online order', 'Gift for a friend']),
+    'Utilities': (80, ['Electricity bill', 'Internet subscription', 'Water bill', 'Mobile data bundle']),
+    'Entertainment': (20, ['Cinema tickets', 'Streaming subscription', 'Concert', 'Video game']),
+    'Rent': (900, ['Monthly rent']),
+    'Healthcare': (45, ['Pharmacy', 'Doctor visit', 'Dental check-up']),
+    'Education': (120, ['Online course', 'Textbooks', 'Exam fee']),
+    'Insurance': (150, ['Health insurance premium', 'Car insurance']),
+    'Savings': (200, ['Transfer to savings', 'Investment top-up']),
+    'Other': (30, ['Miscellaneous', 'Bank charges', 'Donation']),
+}
+INCOME_PROFILES = {
+    'Salary': (3000, ['Monthly salary']),
+    'Freelance': (500, ['Freelance project', 'Consulting invoice']),
+    'Investment': (150, ['Dividend payout', 'Interest earned']),
+    'Gift': (100, ['Birthday gift', 'Family support']),
+}
+
+
+def _ensure_categories():
+    categories = {}
+    for name in list(EXPENSE_PROFILES) + list(INCOME_PROFILES):
+        categories[name], _ = Category.objects.get_or_create(name=name)
+    return categories
+
+
+def _weights(names, rng, skew=1.2):
+    # Zipf-like: the user's favourite category gets most of the activity.
+    order = list(names)
+    rng.shuffle(order)
+    return order, [1 / (rank ** skew) for rank in range(1, len(order) + 1)]
+
+
+def _amount(rng, median):
+    value = median * math.exp(rng.gauss(0, 0.6))
+    return max(Decimal('0.01'), Decimal(f'{value:.2f}'))
+
+
+def _moment(rng, now, days):
+    # Recent activity is denser: exponential decay over the history window.
+    offset = min(rng.expovariate(3 / days), days - 1)
+    day = now - timedelta(days=offset)
+    hour = min(max(int(rng.gauss(14, 4)), 0), 23)
+    return day.replace(hour=hour, minute=rng.randrange(60), second=rng.randrange(60), microsecond=0)
+
+
+def generate_transactions(user, categories, count, rng, days=730):
+    """Yield ``count`` unsaved transactions for one user."""
+    now = timezone.now()
+    expense_names, expense_weights = _weights(EXPENSE_PROFILES, rng)
+    income_names, income_weights = _weights([name for name in INCOME_PROFILES if name != 'Salary'], rng)
+    salary_day = rng.randint(1, 28)
+
+    # Roughly one income per ten transactions, half of it a monthly salary.
+    for index in range(count):
+        if rng.random() < 0.1:
+            if rng.random() < 0.5:
+                name = 'Salary'
+                date = _moment(rng, now, days).replace(day=salary_day, hour=9)
+            else:
+                name = rng.choices(income_names, income_weights)[0]
+                date = _moment(rng, now, days)
+            median, descriptions = INCOME_PROFILES[name]
+            transaction_type = 'income'
+        else:
+            name = rng.choices(expense_names, expense_weights)[0]
+            median, descriptions = EXPENSE_PROFILES[name]
+            date = _moment(rng, now, days)
+            transaction_type = 'expense'
+        yield Transaction(
+            user=user,
+            category=categories[name],
+            type=transaction_type,
+            amount=_amount(rng, median),
+            date=min(date, now),
+            description=rng.choice(descriptions),
+        )
+
+
+def generate_ledger(users=10, transactions_per_user=1000, days=730, seed=0, prefix='bench', batch_size=5000):
+    """
+    Create ``users`` users named ``<prefix>_<n>`` (password
+    ``BENCHMARK_PASSWORD``, each with a token) with ``transactions_per_user``
+    transactions each spread over the last ``days`` days. Returns the users.
+    """
+    rng = random.Random(seed)
+    categories = _ensure_categories()
+    password = make_password(BENCHMARK_PASSWORD)
+    start = User.objects.filter(username__startswith=f'{prefix}_').count()
+
+    with transaction.atomic():
+        created_users = User.objects.bulk_create([
+            User(username=f'{prefix}_{number}', email=f'{prefix}_{number}@example.com', password=password)
+            for number in range(start, start + users)
+        ])
+        if not all(user.pk for user in created_users):
+            # Databases that do not return ids from bulk inserts.
+            created_users = list(User.objects.filter(username__in=[user.username for user in created_users]))
+        Token.objects.bulk_create([Token(user=user, key=Token.generate_key()) for user in created_users])
+
+    for user in created_users:
+        batch = []
+        for instance in generate_transactions(user, categories, transactions_per_user, rng, days=days):
+            batch.append(instance)
+            if len(batch) >= batch_size:
+                _flush(batch)
+                batch = []
+        if batch:
+            _flush(batch)
+    return created_users
+
+
+def _flush(batch):
+    with transaction.atomic():
+        created = Transaction.objects.bulk_create(batch)
+        transactions_bulk_created.send(sender=Transaction, instances=created)
@@ -1,3 +1,389 @@
-from django.test import TestCase
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta, timezone as dt_timezone
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from budget_tracker.money import from_cents
+from budget_tracker.periods import user_timezone
+from budget_tracker.response_cache import get_data_version
+from budget_tracker.testing import SHARED_CACHES, QueryBudgetTestCase
+from categories.models import Category
+from users.authentication import reset_token_cache
+from .events import Broker, get_broker, issue_ticket, redeem_ticket
+from .models import Transaction
+from .search import _backend
+from .sync import encode_cursor, get_changes
+
+
+class TransactionEndpointQueryBudgetTests(QueryBudgetTestCase):
+    """
+    Query counts of the transaction endpoints must not depend on how many
+    transactions the user has.
+    """
+
+    def setUp(self):
+        self.category = Category.objects.get(name='Food & Dining')
+
+    def transaction_payload(self, user=None):
+        return {
+            'amount': '42.50',
+            'type': 'expense',
+            'category': self.category.pk,
+            'date': timezone.now().isoformat(),
+            'description': 'Team lunch',
+        }
+
+    def detail_path(self, user):
+        # An expense on both ledgers: only expenses count towards budgets.
+        return f"/api/transactions/{self.first_transaction_id(user, type='expense')}/"
+
+    def update_payload(self, user):
+        # Same category, type and day, so both ledgers touch the same rollup rows.
+        instance = Transaction.objects.get(pk=self.first_transaction_id(user, type='expense'))
+        return {
+            'amount': str(instance.amount + 1),
+            'type': instance.type,
+            'category': instance.category_id,
+            'date': instance.date.isoformat(),
+            'description': 'Corrected',
+        }
+
+    def recent_start_date(self, user):
+        # Far enough back that the small ledger has matches as well.
+        dates = list(user.transactions.filter(type='expense').order_by('-date').values_list('date', flat=True)[:6])
+        return timezone.localdate(dates[-1]).isoformat()
+
+    def search_term(self, user):
+        return user.transactions.order_by('pk').values_list('description', flat=True)[0].split()[0]
+
+    def test_list(self):
+        response = self.assertQueryBudget('get', '/api/transactions/', max_queries=3)
+        self.assertEqual(response.data['count'], self.LARGE_LEDGER)
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_list_last_page(self):
+        def path(user):
+            return f'/api/transactions/?page={(user.transactions.count() + 19) // 20}'
+
+        self.assertQueryBudget('get', path, max_queries=3)
+
+    def test_list_filtered(self):
+        self.assertQueryBudget(
+            'get', lambda user: f'/api/transactions/?type=expense&start_date={self.recent_start_date(user)}',
+            max_queries=3,
+        )
+
+    def test_list_month(self):
+        # Matched on the precomputed ``year_month`` column, in the user's time zone.
+        month = self.recent_start_date(self.large_user)[:7]
+        response = self.assertQueryBudget(
+            'get', lambda user: f'/api/transactions/?month={self.recent_start_date(user)[:7]}', max_queries=3,
+        )
+        tz = user_timezone(self.large_user)
+        expected = [
+            pk for pk, moment in self.large_user.transactions.values_list('id', 'date')
+            if f'{timezone.localtime(moment, tz):%Y-%m}' == month
+        ]
+        self.assertEqual(response.data['count'], len(expected))
+        self.assertTrue({row['id'] for row in response.data['results']} <= set(expected))
+
+    def test_list_keyset(self):
+        response = self.assertQueryBudget('get', '/api/transactions/?cursor=', max_queries=3)
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_list_async(self):
+        response = self.assertQueryBudget('get', '/api/transactions/', max_queries=3, asgi=True)
+        self.assertEqual(response.json()['count'], self.LARGE_LEDGER)
+
+    def test_list_async_keyset(self):
+        response = self.assertQueryBudget('get', '/api/transactions/?cursor=&type=expense', max_queries=3, asgi=True)
+        self.assertEqual(len(response.json()['results']), 20)
+
+    def test_filter_async(self):
+        self.assertQueryBudget(
+            'get', lambda user: f'/api/transactions/filter/?type=expense&start_date={self.recent_start_date(user)}',
+            max_queries=3, asgi=True,
+        )
+
+    def test_filter_search_async_cold_backend(self):
+        # Resolving the search backend inspects the schema, which must not
+        # happen on the event loop.
+        _backend.cache_clear()
+        term = self.search_term(self.large_user)
+        response = self.request(self.large_user, 'get', f'/api/transactions/filter/?search={term}', asgi=True)[0]
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertTrue(results)
+        self.assertTrue(all(term.lower() in row['description'].lower() for row in results))
+
+    def test_cached_list_has_no_shared_counts(self):
+        # Another user's write changes the category's global count without
+        # touching this user's cached list, so the list must not carry it.
+        path = f'/api/transactions/filter/?category={self.category.pk}'
+        before = self.request(self.small_user, 'get', path)[0].data['results']
+        self.request(self.large_user, 'post', '/api/transactions/', self.transaction_payload())
+        after = self.request(self.small_user, 'get', path)[0].data['results']
+        self.assertEqual(after, before)
+        self.assertNotIn('transaction_count', after[0]['category_detail'])
+        response = self.request(self.small_user, 'get', f'/api/categories/{self.category.pk}/')[0]
+        self.assertEqual(response.data['transaction_count'], Transaction.objects.filter(category=self.category).count())
+
+    def test_create(self):
+        self.assertQueryBudget('post', '/api/transactions/', self.transaction_payload, status=201, max_queries=16)
+
+    def test_retrieve(self):
+        self.assertQueryBudget('get', self.detail_path, max_queries=2)
+
+    def test_update(self):
+        self.assertQueryBudget('put', self.detail_path, self.update_payload, max_queries=13)
+
+    def test_partial_update(self):
+        self.assertQueryBudget('patch', self.detail_path, {'description': 'Renamed'}, max_queries=8)
+
+    def test_delete(self):
+        self.assertQueryBudget('delete', self.detail_path, status=204, max_queries=14)
+
+    def test_filter(self):
+        self.assertQueryBudget(
+            'get', lambda user: f'/api/transactions/filter/?type=expense&start_date={self.recent_start_date(user)}',
+            max_queries=3,
+        )
+
+    def test_filter_by_category_and_type(self):
+        response = self.assertQueryBudget(
+            'get', f'/api/transactions/filter/?category={self.category.pk}&type=expense', max_queries=3
+        )
+        results = response.data['results']
+        self.assertTrue(results)
+        self.assertEqual({(row['category'], row['type']) for row in results}, {(self.category.pk, 'expense')})
+        self.assertEqual(
+            response.data['count'],
+            self.large_user.transactions.filter(category=self.category, type='expense').count(),
+        )
+
+    def test_filter_search(self):
+        response = self.assertQueryBudget(
+            'get', lambda user: f'/api/transactions/filter/?search={self.search_term(user)}', max_queries=3
+        )
+        self.assertTrue(response.data['results'])
+
+    def test_search(self):
+        response = self.assertQueryBudget(
+            'get', lambda user: f'/api/transactions/search/?q={self.search_term(user)}&limit=50', max_queries=3
+        )
+        self.assertGreater(response.data['count'], 0)
+
+    def test_changes_without_cursor(self):
+        response = self.assertQueryBudget('get', '/api/transactions/changes/', max_queries=2)
+        self.assertTrue(response.data['reset'])
+
+    def test_changes_when_idle(self):
+        def path(user):
+            return f"/api/transactions/changes/?since={get_changes(user)['cursor']}"
+
+        response = self.assertQueryBudget('get', path, max_queries=1)
+        self.assertFalse(response.data['reset'])
+        self.assertEqual(response.data['changed'], [])
+
+    def test_changes_since_cursor(self):
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        Transaction.objects.update(updated_at=timezone.now() - timedelta(days=1))
+        for _, user in self.ledgers:
+            Transaction.objects.filter(pk__in=user.transactions.values('pk')[:3]).update(updated_at=timezone.now())
+
+        def path(user):
+            return f"/api/transactions/changes/?since={encode_cursor(an_hour_ago, get_data_version(user.pk) - 1)}"
+
+        response = self.assertQueryBudget('get', path, max_queries=4)
+        self.assertFalse(response.data['reset'])
+        self.assertEqual(len(response.data['changed']), 3)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_changes_with_per_process_cache(self):
+        Transaction.objects.update(updated_at=timezone.now() - timedelta(days=1))
+        cursor = get_changes(self.small_user)['cursor']
+        # A write by another worker, which cannot bump this process's version.
+        Transaction.objects.filter(pk=self.first_transaction_id(self.small_user)).update(
+            updated_at=timezone.now() + timedelta(seconds=1)
+        )
+        response = self.request(self.small_user, 'get', f'/api/transactions/changes/?since={cursor}')[0]
+        self.assertFalse(response.data['reset'])
+        self.assertEqual([row['id'] for row in response.data['changed']], [self.first_transaction_id(self.small_user)])
+
+    def test_export_csv(self):
+        response = self.assertQueryBudget('get', '/api/transactions/export/', max_queries=2)
+        self.assertEqual(response['Content-Type'].split(';')[0], 'text/csv')
+
+    def test_export_ndjson(self):
+        self.assertQueryBudget('get', '/api/transactions/export/?file_format=ndjson', max_queries=2)
+
+    @override_settings(TRANSACTION_EXPORT_CHUNK_SIZE=7)
+    def test_export_contents(self):
+        # Several keyset batches, read by both handlers.
+        expected = [
+            (str(pk), str(from_cents(cents)), transaction_type, category)
+            for pk, cents, transaction_type, category in self.small_user.transactions.order_by(
+                '-date', '-created_at', '-id'
+            ).values_list('id', 'amount_cents', 'type', 'category__name')
+        ]
+        for asgi in (False, True):
+            response = self.request(self.small_user, 'get', '/api/transactions/export/', asgi=asgi)[0]
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.is_async, asgi)
+            rows = list(csv.DictReader(io.StringIO(response.streamed_content.decode())))
+            self.assertEqual([(row['id'], row['amount'], row['type'], row['category']) for row in rows], expected)
+
+            response = self.request(self.small_user, 'get', '/api/transactions/export/?file_format=ndjson', asgi=asgi)[0]
+            rows = [json.loads(line) for line in response.streamed_content.decode().splitlines()]
+            self.assertEqual([(str(row['id']), row['amount'], row['type'], row['category']) for row in rows], expected)
+
+    def test_bulk_import(self):
+        payload = [self.transaction_payload() for _ in range(5)]
+        response = self.assertQueryBudget('post', '/api/transactions/bulk/', payload, status=201, max_queries=16)
+        self.assertEqual(response.data['created'], 5)
+
+    def test_bulk_import_empty_body(self):
+        for content_type in ('application/json', 'text/csv'):
+            response = self.request(
+                self.small_user, 'post', '/api/transactions/bulk/', content_type=content_type
+            )[0]
+            self.assertEqual(response.status_code, 400, content_type)
+            self.assertEqual(response.data, {'error': 'The request body is empty.'})
+
+
+    def test_bulk_import_malformed_values(self):
+        rows = [
+            {**self.transaction_payload(), 'type': []},
+            {**self.transaction_payload(), 'type': {'expense': True}},
+            {**self.transaction_payload(), 'category': True},
+            self.transaction_payload(),
+        ]
+        response = self.request(self.small_user, 'post', '/api/transactions/bulk/', rows)[0]
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 3))
+        self.assertEqual(
+            [(error['row'], sorted(error['errors'])) for error in response.data['errors']],
+            [(1, ['type']), (2, ['type']), (3, ['category'])],
+        )
+
+class TransactionTimezoneTests(TestCase):
+    """Calendar columns follow the owner's time zone as stored, not as cached."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='traveller', email='traveller@example.com', password='x', timezone='Africa/Lagos'
+        )
+        self.category = Category.objects.create(name='Travel')
+        # 22:30 UTC: still Dec 31 in Lagos, already Jan 1 in Auckland.
+        self.moment = datetime(2025, 12, 31, 22, 30, tzinfo=dt_timezone.utc)
+
+    def test_write_with_stale_user_copy(self):
+        # A copy of the user cached (e.g. with its token) before they moved.
+        stale = get_user_model().objects.get(pk=self.user.pk)
+        self.user.timezone = 'Pacific/Auckland'
+        self.user.save()
+        transaction = Transaction.objects.create(
+            user=stale, category=self.category, type='expense', amount='5.00', date=self.moment
+        )
+        self.assertEqual(transaction.local_date, date(2026, 1, 1))
+        self.assertEqual(transaction.year_month, 202601)
+
+    def test_bulk_create_with_stale_user_copy(self):
+        stale = get_user_model().objects.get(pk=self.user.pk)
+        self.user.timezone = 'Pacific/Auckland'
+        self.user.save()
+        transaction, = Transaction.objects.bulk_create([Transaction(
+            user=stale, category=self.category, type='expense', amount='5.00', date=self.moment
+        )])
+        self.assertEqual(transaction.local_date, date(2026, 1, 1))
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class DateFilterTimezoneTests(TestCase):
+    """A bare ``end_date`` covers that whole day in the user's current time zone."""
+
+    def setUp(self):
+        cache.clear()
+        reset_token_cache()
+        self.user = get_user_model().objects.create_user(
+            username='commuter', email='commuter@example.com', password='x', timezone='Africa/Lagos'
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+        # 22:30 UTC: still Dec 31 in Lagos, already Jan 1 in Auckland.
+        self.transaction = Transaction.objects.create(
+            user=self.user, category=Category.objects.create(name='Fares'), type='expense', amount='2.50',
+            date=datetime(2025, 12, 31, 22, 30, tzinfo=dt_timezone.utc),
+        )
+
+    def filtered(self, query):
+        response = self.client.get(f'/api/transactions/filter/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_end_date_is_a_whole_local_day(self):
+        self.assertEqual(self.filtered('end_date=2025-12-31'), [self.transaction.pk])
+        self.assertEqual(self.filtered('start_date=2026-01-01'), [])
+        # A date and time is still an exact bound: 22:00 UTC.
+        self.assertEqual(self.filtered('end_date=2025-12-31T23:00:00%2B01:00'), [])
+
+    def test_time_zone_change_applies_to_the_next_request(self):
+        # The first request caches the token along with the user.
+        self.assertEqual(self.filtered('end_date=2025-12-31'), [self.transaction.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch('/api/users/me/', {'timezone': 'Pacific/Auckland'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.filtered('end_date=2025-12-31'), [])
+        self.assertEqual(self.filtered('start_date=2026-01-01&end_date=2026-01-01'), [self.transaction.pk])
+
+
+class TransactionEventStreamTests(QueryBudgetTestCase):
+    """The events endpoint is opened with single-use stream tickets."""
+
+    def ticket(self, user):
+        response = self.request(user, 'post', '/api/transactions/events/ticket/')[0]
+        self.assertEqual(response.status_code, 200)
+        return response.data['ticket']
+
+    def open_stream(self, query):
+        """Return the status and body of a stream, read to its end."""
+        @async_to_sync
+        async def read():
+            response = await AsyncClient().get(f'/api/transactions/events/?{query}')
+            if not response.streaming:
+                return response.status_code, response.content
+            return response.status_code, b''.join([chunk async for chunk in response.streaming_content])
+
+        return read()
+
+    def test_broker_is_abstract(self):
+        with self.assertRaises(TypeError):
+            Broker()
+
+    def test_ticket_redeems_once(self):
+        ticket, _ = issue_ticket(self.small_user.pk)
+        self.assertEqual(redeem_ticket(ticket), self.small_user.pk)
+        self.assertIsNone(redeem_ticket(ticket))
+        self.assertIsNone(redeem_ticket('made-up'))
+
+    @override_settings(TRANSACTION_EVENTS_MAX_STREAM_SECONDS=0)
+    def test_stream_with_ticket(self):
+        ticket = self.ticket(self.small_user)
+        status, body = self.open_stream(f'ticket={ticket}')
+        self.assertEqual(status, 200)
+        self.assertIn('event: ready', body.decode())
+        # The connection slot is released once the stream ends.
+        self.assertEqual(get_broker().connection_count(self.small_user.pk), 0)
+        self.assertEqual(self.open_stream(f'ticket={ticket}')[0], 401)
+
+    def test_token_in_query_string_is_refused(self):
+        key = self.small_user.auth_token.key
+        self.assertEqual(self.open_stream(f'token={key}')[0], 401)
@@ -7,4 +7,10 @@ urlpatterns = [
     path('', views.TransactionListCreateView.as_view(), name='transaction_list_create'),
     path('<int:pk>/', views.TransactionDetailView.as_view(), name='transaction_detail'),
     path('filter/', views.transaction_filter_view, name='transaction_filter'),
+    path('changes/', views.transaction_changes_view, name='transaction_changes'),
+    path('events/', views.transaction_events_view, name='transaction_events'),
+    path('events/ticket/', views.transaction_events_ticket_view, name='transaction_events_ticket'),
+    path('search/', views.transaction_search_view, name='transaction_search'),
+    path('export/', views.transaction_export_view, name='transaction_export'),
+    path('bulk/', views.transaction_bulk_import_view, name='transaction_bulk_import'),
 ]
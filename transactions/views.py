@@ -1,47 +1,73 @@
+import asyncio
+import csv
+import json
+from asgiref.sync import sync_to_async
 from rest_framework import generics, status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.settings import api_settings
 from django_filters.rest_framework import DjangoFilterBackend
+from django_filters.utils import translate_validation
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db.models import Q
-from datetime import datetime
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from budget_tracker.async_views import async_api_view, drf_request, json_response
+from budget_tracker.money import from_cents
+from budget_tracker.periods import user_timezone
+from budget_tracker.response_cache import cache_json_response, cache_response
+from summary.rollups import totals
+from summary.serializers import SummaryTotalsSerializer
+from users.authentication import CachedTokenAuthentication
+from .events import TooManyConnections, get_broker, issue_ticket, redeem_ticket
+from .filters import filter_date_range, filter_transactions
+from .importers import ImportFormatError, TransactionImporter, iter_csv_rows, iter_json_array
 from .models import Transaction
+from .pagination import AsyncPageNumberPagination, TransactionCursorPagination
+from .search import get_search_backend
+from .sync import InvalidSyncCursor, get_changes
 from .serializers import TransactionSerializer, TransactionCreateUpdateSerializer
 
 
+User = get_user_model()
+
+
 class TransactionListCreateView(generics.ListCreateAPIView):
     """
     View to list user's transactions and create new ones.
     GET: List user's transactions with optional filtering
+         (pass ``cursor`` to use keyset pagination instead of page numbers)
     POST: Create a new transaction
     """
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['type', 'category']
 
+    @property
+    def pagination_class(self):
+        if TransactionCursorPagination.cursor_query_param in self.request.query_params:
+            return TransactionCursorPagination
+        return api_settings.DEFAULT_PAGINATION_CLASS
+
     def get_queryset(self):
         queryset = Transaction.objects.filter(user=self.request.user)
         
-        # Date range filtering
-        start_date = self.request.query_params.get('start_date')
-        end_date = self.request.query_params.get('end_date')
-        
-        if start_date:
-            try:
-                start_date = datetime.fromisoformat(start_date)
-                queryset = queryset.filter(date__gte=start_date)
-            except ValueError:
-                pass
-                
-        if end_date:
-            try:
-                end_date = datetime.fromisoformat(end_date)
-                queryset = queryset.filter(date__lte=end_date)
-            except ValueError:
-                pass
+        # Date range and calendar period filtering, in the user's time zone
+        queryset = filter_date_range(queryset, self.request.query_params, user_timezone(self.request.user))
         
         return queryset.select_related('category', 'user')
 
+    @method_decorator(cache_response('transaction_list'))
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return TransactionCreateUpdateSerializer
@@ -58,7 +84,7 @@ class TransactionDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Transaction.objects.filter(user=self.request.user)
+        return Transaction.objects.filter(user=self.request.user).select_related('category', 'user')
 
     def get_serializer_class(self):
         if self.request.method in ['PUT', 'PATCH']:
@@ -66,59 +92,448 @@ class TransactionDetailView(generics.RetrieveUpdateDestroyAPIView):
         return TransactionSerializer
 
 
+@async_api_view(sync_view=TransactionListCreateView.as_view())
+@cache_json_response('transaction_list')
+async def transaction_list_async_view(request):
+    """
+    ASGI version of ``TransactionListCreateView``'s list (POST is handed to
+    the DRF view). The count and the page are queried concurrently.
+    """
+    request = drf_request(request)
+    queryset = Transaction.objects.filter(user=request.user)
+
+    # The list view's ``type`` and ``category`` filters; validating the category queries it.
+    filterset = DjangoFilterBackend().get_filterset(request, queryset, TransactionListCreateView)
+    if not await sync_to_async(filterset.is_valid)():
+        raise translate_validation(filterset.errors)
+    queryset = filter_date_range(filterset.qs, request.query_params, user_timezone(request.user))
+    queryset = queryset.select_related('category', 'user')
+
+    if TransactionCursorPagination.cursor_query_param in request.query_params:
+        paginator = TransactionCursorPagination()
+    else:
+        paginator = AsyncPageNumberPagination()
+    page = await paginator.apaginate_queryset(queryset, request)
+    serializer = TransactionSerializer(page, many=True)
+    return json_response(paginator.get_paginated_response(serializer.data).data)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cache_response('transaction_filter')
 def transaction_filter_view(request):
     """
     Advanced filtering endpoint for transactions.
-    GET: Filter transactions by multiple criteria
+    GET: Filter transactions by multiple criteria, one keyset-paginated page at a time
     """
-    queryset = Transaction.objects.filter(user=request.user)
+    queryset = filter_transactions(
+        Transaction.objects.filter(user=request.user), request.query_params, request.user
+    )
     
-    # Filter by transaction type
-    transaction_type = request.query_params.get('type')
-    if transaction_type in ['income', 'expense']:
-        queryset = queryset.filter(type=transaction_type)
+    # Page through the results newest first
+    queryset = queryset.select_related('category', 'user')
+    paginator = TransactionCursorPagination()
+    page = paginator.paginate_queryset(queryset, request)
     
-    # Filter by category
-    category_id = request.query_params.get('category')
-    if category_id:
-        try:
-            queryset = queryset.filter(category_id=int(category_id))
-        except (ValueError, TypeError):
-            pass
-    
-    # Filter by date range
-    start_date = request.query_params.get('start_date')
-    end_date = request.query_params.get('end_date')
-    
-    if start_date:
-        try:
-            start_date = datetime.fromisoformat(start_date)
-            queryset = queryset.filter(date__gte=start_date)
-        except ValueError:
-            pass
-            
-    if end_date:
+    serializer = TransactionSerializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
+
+
+@async_api_view()
+@cache_json_response('transaction_filter')
+async def transaction_filter_async_view(request):
+    """
+    ASGI version of ``transaction_filter_view``. The count and the page are
+    queried concurrently.
+    """
+    request = drf_request(request)
+    # Building the queryset may query: the search backend inspects the
+    # schema the first time it is resolved.
+    queryset = await sync_to_async(filter_transactions)(
+        Transaction.objects.filter(user=request.user), request.query_params, request.user
+    )
+    queryset = queryset.select_related('category', 'user')
+    paginator = TransactionCursorPagination()
+    page = await paginator.apaginate_queryset(queryset, request)
+    serializer = TransactionSerializer(page, many=True)
+    return json_response(paginator.get_paginated_response(serializer.data).data)
+
+
+SEARCH_MAX_LIMIT = 100
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@cache_response('transaction_search')
+def transaction_search_view(request):
+    """
+    Full-text search over the user's transaction descriptions.
+    GET: Return up to ``limit`` transactions matching every word of ``q``
+         (as prefixes), most relevant first
+    """
+    query = request.query_params.get('q', '')
+    try:
+        limit = max(1, min(int(request.query_params.get('limit', 20)), SEARCH_MAX_LIMIT))
+    except ValueError:
+        limit = 20
+
+    ids = get_search_backend().ranked_ids(request.user, query, limit)
+    # Ranked below, so the default ordering would only add a sort.
+    transactions = (
+        Transaction.objects.filter(user=request.user, id__in=ids).select_related('category', 'user').order_by()
+    )
+    by_id = {instance.pk: instance for instance in transactions}
+    results = [by_id[pk] for pk in ids if pk in by_id]
+
+    serializer = TransactionSerializer(results, many=True)
+    return Response({
+        'query': query,
+        'count': len(results),
+        'results': serializer.data,
+    })
+
+
+def _changes_payload(user, since):
+    changes = get_changes(user, since)
+    changed = changes['reset'] or changes['changed'] or changes['deleted']
+    return {
+        'cursor': changes['cursor'],
+        'reset': changes['reset'],
+        'changed': TransactionSerializer(changes['changed'], many=True).data,
+        'deleted': changes['deleted'],
+        'summary': SummaryTotalsSerializer(totals(user)).data if changed else None,
+    }
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def transaction_changes_view(request):
+    """
+    Delta sync for clients polling for updates.
+    GET: Return transactions created or updated and ids deleted since the
+         ``since`` cursor, the next cursor and the updated summary totals
+    """
+    try:
+        payload = _changes_payload(request.user, request.query_params.get('since') or None)
+    except InvalidSyncCursor as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(payload)
+
+
+def _sse(event, data, event_id=None):
+    message = f'event: {event}\n'
+    if event_id is not None:
+        message += f'id: {event_id}\n'
+    return message + f'data: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n'
+
+
+def _sse_messages(payload):
+    if payload['reset']:
+        return [_sse('reset', {}, payload['cursor'])]
+    if payload['summary'] is None:
+        return []
+    return [
+        _sse('transactions', {'changed': payload['changed'], 'deleted': payload['deleted']}),
+        _sse('summary', payload['summary'], payload['cursor']),
+    ]
+
+
+async def _event_stream(user, subscription, last_event_id):
+    loop = asyncio.get_running_loop()
+    heartbeat = getattr(settings, 'TRANSACTION_EVENTS_HEARTBEAT_SECONDS', 15)
+    deadline = loop.time() + getattr(settings, 'TRANSACTION_EVENTS_MAX_STREAM_SECONDS', 300)
+    load_changes = sync_to_async(_changes_payload)
+    try:
+        yield f'retry: {getattr(settings, "TRANSACTION_EVENTS_RETRY_MS", 5000)}\n\n'
+        cursor = None
+        if last_event_id:
+            # Reconnected: catch up on what happened while disconnected.
+            try:
+                payload = await load_changes(user, last_event_id)
+            except InvalidSyncCursor:
+                payload = await load_changes(user, None)
+            for message in _sse_messages(payload):
+                yield message
+            cursor = payload['cursor']
+        if cursor is None:
+            payload = await load_changes(user, None)
+            cursor = payload['cursor']
+            yield _sse('ready', {}, cursor)
+
+        # End the stream now and then; the browser reconnects with Last-Event-ID,
+        # which bounds how long a dead connection can go unnoticed.
+        while loop.time() < deadline:
+            events = await subscription.get(timeout=min(heartbeat, max(deadline - loop.time(), 0)))
+            if subscription.overflowed:
+                # The client fell too far behind; make it reload.
+                subscription.overflowed = False
+                payload = await load_changes(user, None)
+                payload['reset'] = True
+            elif events:
+                payload = await load_changes(user, cursor)
+            else:
+                yield ': heartbeat\n\n'
+                continue
+            cursor = payload['cursor']
+            for message in _sse_messages(payload):
+                yield message
+    finally:
+        subscription.close()
+
+
+class _EventStreamContent:
+    """
+    Streaming content of an event stream. The response calls ``close()``
+    when it is closed, which releases the connection slot even if the
+    stream never started.
+    """
+
+    def __init__(self, user, subscription, last_event_id):
+        self.subscription = subscription
+        self.messages = _event_stream(user, subscription, last_event_id)
+
+    def __aiter__(self):
+        return self.messages.__aiter__()
+
+    def close(self):
+        self.subscription.close()
+
+
+def _active_user(user_id):
+    return User.objects.filter(pk=user_id, is_active=True).first()
+
+
+async def _authenticate_event_stream(request):
+    # EventSource cannot send headers, so it brings a stream ticket instead.
+    ticket = request.GET.get('ticket')
+    if ticket:
+        user_id = await sync_to_async(redeem_ticket)(ticket)
+        return None if user_id is None else await sync_to_async(_active_user)(user_id)
+    header = request.headers.get('Authorization', '').split()
+    if len(header) == 2 and header[0] == 'Token':
         try:
-            end_date = datetime.fromisoformat(end_date)
-            queryset = queryset.filter(date__lte=end_date)
-        except ValueError:
-            pass
-    
-    # Search in description
-    search = request.query_params.get('search')
-    if search:
+            user, _ = await sync_to_async(CachedTokenAuthentication().authenticate_credentials)(header[1])
+        except AuthenticationFailed:
+            return None
+        return user
+    user = await sync_to_async(lambda: request.user if request.user.is_authenticated else None)()
+    return user
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def transaction_events_ticket_view(request):
+    """
+    Issue a stream ticket for the events endpoint.
+    POST: Return a single-use ``ticket`` valid for ``expires_in`` seconds;
+          open the stream with ``/api/transactions/events/?ticket=<ticket>``
+    """
+    ticket, timeout = issue_ticket(request.user.pk)
+    return Response({'ticket': ticket, 'expires_in': timeout})
+
+
+async def transaction_events_view(request):
+    """
+    Server-sent events stream of the user's transaction and summary changes.
+    GET: Stream ``transactions`` (changed and deleted rows), ``summary``
+         (updated totals) and ``reset`` events as writes are committed
+         (requires an ASGI server)
+    """
+    if request.method != 'GET':
+        return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({
+            'error': 'Event streams need the ASGI application (budget_tracker.asgi); poll /api/transactions/changes/ instead.'
+        }, status=501)
+    user = await _authenticate_event_stream(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+
+    try:
+        subscription = get_broker().subscribe(user.pk)
+    except TooManyConnections:
+        return JsonResponse({'error': 'Too many open event streams.'}, status=429)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    response = StreamingHttpResponse(
+        _EventStreamContent(user, subscription, last_event_id), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+EXPORT_FIELDS = ['id', 'date', 'type', 'amount', 'category', 'description', 'created_at', 'updated_at']
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class _Echo:
+    """File-like object whose write() hands back the line for streaming."""
+    def write(self, value):
+        return value
+
+
+def _export_batch(queryset, position, chunk_size):
+    """
+    Return up to ``chunk_size`` export rows (plain tuples) of ``queryset``,
+    ordered by (-date, -created_at, -id), after ``position``, and the
+    position of the last one; one index range scan per batch.
+    """
+    if position is not None:
+        date, created_at, pk = position
         queryset = queryset.filter(
-            Q(description__icontains=search) | 
-            Q(category__name__icontains=search)
+            Q(date__lt=date)
+            | Q(date=date, created_at__lt=created_at)
+            | Q(date=date, created_at=created_at, id__lt=pk)
         )
-    
-    # Order by date
-    queryset = queryset.select_related('category', 'user').order_by('-date', '-created_at')
-    
-    serializer = TransactionSerializer(queryset, many=True)
-    return Response({
-        'count': queryset.count(),
-        'results': serializer.data
-    })
+    rows = list(queryset.values_list(
+        'id', 'date', 'type', 'amount_cents', 'category__name', 'description', 'created_at', 'updated_at'
+    )[:chunk_size])
+    if not rows:
+        return [], None
+    last = rows[-1]
+    return [
+        (
+            pk,
+            timezone.localtime(date).isoformat(),
+            transaction_type,
+            str(from_cents(cents)),
+            category,
+            description,
+            timezone.localtime(created_at).isoformat(),
+            timezone.localtime(updated_at).isoformat(),
+        )
+        for pk, date, transaction_type, cents, category, description, created_at, updated_at in rows
+    ], (last[1], last[6], last[0])
+
+
+def _export_batches(queryset, chunk_size):
+    """Yield the export rows of ``queryset`` one keyset batch at a time."""
+    position = None
+    while True:
+        rows, position = _export_batch(queryset, position, chunk_size)
+        if rows:
+            yield rows
+        if len(rows) < chunk_size:
+            return
+
+
+async def _aexport_batches(queryset, chunk_size):
+    """``_export_batches`` for the ASGI handler, which only streams async iterators."""
+    position = None
+    while True:
+        rows, position = await sync_to_async(_export_batch)(queryset, position, chunk_size)
+        if rows:
+            yield rows
+        if len(rows) < chunk_size:
+            return
+
+
+def _csv_chunk(rows, header=False):
+    writer = csv.writer(_Echo())
+    lines = [writer.writerow(EXPORT_FIELDS)] if header else []
+    lines.extend(writer.writerow(row) for row in rows)
+    return ''.join(lines).encode('utf-8')
+
+
+def _ndjson_chunk(rows, header=False):
+    return ''.join(
+        json.dumps(dict(zip(EXPORT_FIELDS, row)), ensure_ascii=False) + '\n' for row in rows
+    ).encode('utf-8')
+
+
+def _stream_export(batches, encode):
+    header = encode([], header=True)
+    if header:
+        yield header
+    for rows in batches:
+        yield encode(rows)
+
+
+async def _astream_export(batches, encode):
+    header = encode([], header=True)
+    if header:
+        yield header
+    async for rows in batches:
+        yield encode(rows)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def transaction_export_view(request):
+    """
+    Export the user's transactions as CSV or NDJSON.
+    GET: Stream every transaction matching the same filters as the filter
+         endpoint; ``file_format`` selects ``csv`` (default) or ``ndjson``
+    """
+    file_format = request.query_params.get('file_format', 'csv')
+    if file_format not in EXPORT_FORMATS:
+        return Response({
+            'error': f"Unsupported file_format. Choose one of: {', '.join(EXPORT_FORMATS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    queryset = filter_transactions(
+        Transaction.objects.filter(user=request.user), request.query_params, request.user
+    )
+    queryset = queryset.order_by('-date', '-created_at', '-id')
+
+    chunk_size = getattr(settings, 'TRANSACTION_EXPORT_CHUNK_SIZE', 2000)
+    encode = _csv_chunk if file_format == 'csv' else _ndjson_chunk
+    if isinstance(request._request, ASGIRequest):
+        # The ASGI handler would read a sync iterator to the end before sending anything.
+        content = _astream_export(_aexport_batches(queryset, chunk_size), encode)
+    else:
+        content = _stream_export(_export_batches(queryset, chunk_size), encode)
+
+    response = StreamingHttpResponse(content, content_type=EXPORT_FORMATS[file_format])
+    filename = f"transactions-{timezone.localdate().isoformat()}.{file_format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@parser_classes([MultiPartParser])
+def transaction_bulk_import_view(request):
+    """
+    Bulk import transactions.
+    POST: A JSON array of transaction objects (``application/json``), a CSV
+          body (``text/csv``) or a CSV upload in the ``file`` field of a
+          multipart form. CSV files need a header row with amount, type,
+          category (id or name), date and optionally description.
+    """
+    content_type = request.content_type.split(';')[0].strip().lower()
+    if content_type in ('application/json', 'text/csv', 'application/csv') and request.stream is None:
+        # DRF leaves no stream for an empty body.
+        return Response({'error': 'The request body is empty.'}, status=status.HTTP_400_BAD_REQUEST)
+    if content_type == 'application/json':
+        rows = iter_json_array(request.stream)
+    elif content_type in ('text/csv', 'application/csv'):
+        rows = iter_csv_rows(request.stream)
+    elif content_type == 'multipart/form-data' and 'file' in request.FILES:
+        rows = iter_csv_rows(request.FILES['file'])
+    else:
+        return Response({
+            'error': 'Send a JSON array, a text/csv body or a CSV file in the "file" field.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    importer = TransactionImporter(
+        request.user,
+        batch_size=getattr(settings, 'TRANSACTION_IMPORT_BATCH_SIZE', 1000),
+    )
+    try:
+        result = importer.run(rows)
+    except ImportFormatError as exc:
+        # Batches written before the malformed input stay imported.
+        return Response({
+            'error': str(exc),
+            'created': importer.created,
+            'failed': importer.failed,
+            'errors': importer.errors,
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    result_status = status.HTTP_201_CREATED if result['created'] else status.HTTP_400_BAD_REQUEST
+    return Response(result, status=result_status)
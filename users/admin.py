@@ -14,6 +14,6 @@ class UserAdmin(BaseUserAdmin):
     ordering = ['-date_joined']
     
     fieldsets = BaseUserAdmin.fieldsets + (
-        ('Additional Info', {'fields': ('created_at', 'updated_at')}),
+        ('Additional Info', {'fields': ('timezone', 'created_at', 'updated_at')}),
     )
     readonly_fields = ['created_at', 'updated_at']
@@ -0,0 +1,218 @@
+"""
+Token authentication that avoids a database query on most requests.
+
+``CachedTokenAuthentication`` is a drop-in replacement for DRF's
+``TokenAuthentication``. Resolved tokens (with their user) are kept in a
+bounded in-process LRU for ``TOKEN_AUTH_CACHE_TIMEOUT`` seconds, so repeated
+requests with the same token skip the ``Token`` JOIN ``User`` lookup.
+
+Entries are also shared through the Django cache ``TOKEN_AUTH_CACHE_ALIAS``,
+which every process must reach (Redis, Memcached, database or file-based).
+Every user has an auth version in that cache. Invalidation bumps the version,
+and each process drops local entries recorded under an older version on their
+next use, so a revoked token stops working everywhere at once. Without an
+alias, or with a per-process backend such as ``LocMemCache`` (unless
+``SINGLE_PROCESS`` is set), nothing is cached: an entry only one process
+could invalidate would keep revoked tokens working in the others.
+
+Entries are invalidated when a token is deleted (logout, password change) and
+when its user is saved (see ``users.signals``).
+"""
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from budget_tracker.response_cache import is_shared_cache
+
+
+def _digest(key):
+    # Never use raw tokens as cache keys.
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def _copy_token(token):
+    # Views may modify request.user; never hand out the cached instances.
+    user = copy.copy(token.user)
+    token = copy.copy(token)
+    token.user = user
+    return token
+
+
+class TokenCache:
+    """Bounded LRU of resolved tokens with a TTL, backed by a shared Django cache."""
+
+    def __init__(self, max_entries=1024, timeout=300, alias=None):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.alias = alias
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # digest -> (expires_at, version, token)
+        self._user_keys = {}  # user id -> set of digests
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches[self.alias] if is_shared_cache(self.alias) else None
+
+    def _version_key(self, user_id):
+        return f'auth-version:user:{user_id}'
+
+    def _token_key(self, digest):
+        return f'auth-token:{digest}'
+
+    def get_version(self, user_id):
+        key = self._version_key(user_id)
+        version = self.shared.get(key)
+        if version is None:
+            # Seed from the clock so a version lost to eviction never repeats.
+            version = time.time_ns()
+            if not self.shared.add(key, version, timeout=None):
+                version = self.shared.get(key, version)
+        return version
+
+    def get(self, key):
+        """Return a copy of the cached token for ``key``, or None."""
+        if self.shared is None:
+            self.misses += 1
+            return None
+        digest = _digest(key)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                self._entries.move_to_end(digest)
+        if entry is not None:
+            expires_at, version, token = entry
+            if expires_at > time.monotonic() and version == self.get_version(token.user_id):
+                self.hits += 1
+                return _copy_token(token)
+            self._discard(digest)
+
+        cached = self.shared.get(self._token_key(digest))
+        if cached is not None:
+            version, token = cached
+            if version == self.get_version(token.user_id):
+                self._store(digest, version, token)
+                self.hits += 1
+                return _copy_token(token)
+
+        self.misses += 1
+        return None
+
+    def set(self, key, token):
+        """Cache a token loaded from the database (with ``token.user`` loaded)."""
+        if self.shared is None:
+            return
+        digest = _digest(key)
+        version = self.get_version(token.user_id)
+        token = _copy_token(token)
+        self._store(digest, version, token)
+        self.shared.set(self._token_key(digest), (version, token), timeout=self.timeout)
+
+    def _store(self, digest, version, token):
+        with self._lock:
+            self._entries[digest] = (time.monotonic() + self.timeout, version, token)
+            self._entries.move_to_end(digest)
+            self._user_keys.setdefault(token.user_id, set()).add(digest)
+            while len(self._entries) > self.max_entries:
+                evicted, (_, _, evicted_token) = self._entries.popitem(last=False)
+                self._forget(evicted, evicted_token.user_id)
+
+    def _forget(self, digest, user_id):
+        keys = self._user_keys.get(user_id)
+        if keys is not None:
+            keys.discard(digest)
+            if not keys:
+                del self._user_keys[user_id]
+
+    def _discard(self, digest):
+        with self._lock:
+            entry = self._entries.pop(digest, None)
+            if entry is not None:
+                self._forget(digest, entry[2].user_id)
+
+    def invalidate(self, key, user_id=None):
+        """Drop the entry for one token, e.g. after it was deleted."""
+        digest = _digest(key)
+        self._discard(digest)
+        if self.shared is not None:
+            self.shared.delete(self._token_key(digest))
+            if user_id is not None:
+                self._bump_version(user_id)
+
+    def invalidate_user(self, user_id):
+        """Drop every entry for a user's tokens, e.g. after the user changed."""
+        with self._lock:
+            digests = self._user_keys.pop(user_id, set())
+            for digest in digests:
+                self._entries.pop(digest, None)
+        if self.shared is not None:
+            # The new version makes every shared entry of the user stale;
+            # the ones this process knows are deleted right away.
+            self.shared.delete_many([self._token_key(digest) for digest in digests])
+            self._bump_version(user_id)
+
+    def _bump_version(self, user_id):
+        try:
+            self.shared.incr(self._version_key(user_id))
+        except ValueError:
+            self.shared.set(self._version_key(user_id), time.time_ns(), timeout=None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._user_keys.clear()
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_token_cache = None
+_token_cache_lock = threading.Lock()
+
+
+def get_token_cache():
+    """Return the process-wide token cache, configured from settings."""
+    global _token_cache
+    if _token_cache is None:
+        with _token_cache_lock:
+            if _token_cache is None:
+                _token_cache = TokenCache(
+                    max_entries=getattr(settings, 'TOKEN_AUTH_CACHE_SIZE', 1024),
+                    timeout=getattr(settings, 'TOKEN_AUTH_CACHE_TIMEOUT', 300),
+                    alias=getattr(settings, 'TOKEN_AUTH_CACHE_ALIAS', 'default'),
+                )
+    return _token_cache
+
+
+def reset_token_cache():
+    """Forget the token cache so it is rebuilt from the current settings."""
+    global _token_cache
+    with _token_cache_lock:
+        _token_cache = None
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    ``TokenAuthentication`` that serves resolved tokens from ``TokenCache``
+    and only queries the database on a miss.
+    """
+
+    def authenticate_credentials(self, key):
+        cache = get_token_cache()
+        token = cache.get(key)
+        if token is None:
+            _, token = super().authenticate_credentials(key)
+            cache.set(key, token)
+        elif not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        return (token.user, token)
@@ -0,0 +1,58 @@
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+
+from users.authentication import CachedTokenAuthentication, get_token_cache
+from users.views import UserProfileView
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Compare requests per second of token authentication with and without the token cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=5000,
+            help='Number of authenticated requests to send per authentication class',
+        )
+
+    def handle(self, *args, **options):
+        """Authenticate a throwaway user's requests against the profile endpoint and roll back."""
+        self.stdout.write(f"{'authentication':>28} {'requests':>9} {'req/s':>9} {'queries/req':>12}")
+        # One process, so the token cache works with any cache backend.
+        with override_settings(SINGLE_PROCESS=True), transaction.atomic():
+            suffix = uuid.uuid4().hex[:8]
+            user = User.objects.create_user(f'bench_{suffix}', f'bench_{suffix}@example.com', None)
+            token = Token.objects.create(user=user)
+            for authentication_class in (TokenAuthentication, CachedTokenAuthentication):
+                self._report(authentication_class, token.key, options['requests'])
+            get_token_cache().invalidate_user(user.pk)
+            transaction.set_rollback(True)
+
+    def _report(self, authentication_class, key, count):
+        view = UserProfileView.as_view(authentication_classes=[authentication_class])
+        factory = APIRequestFactory()
+        requests = [factory.get('/api/auth/me/', HTTP_AUTHORIZATION=f'Token {key}') for _ in range(count)]
+
+        view(factory.get('/api/auth/me/', HTTP_AUTHORIZATION=f'Token {key}'))  # warm up
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for request in requests:
+                response = view(request)
+                assert response.status_code == 200, response.status_code
+            elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f'{authentication_class.__name__:>28} {count:>9} {count / elapsed:>9.0f} '
+            f'{len(queries) / count:>12.2f}'
+        )
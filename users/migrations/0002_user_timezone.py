@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 03:53
+
+import budget_tracker.periods
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='timezone',
+            field=models.CharField(default='Africa/Lagos', help_text="Time zone the user's calendar days, months and weeks are counted in", max_length=64, validators=[budget_tracker.periods.validate_timezone]),
+        ),
+    ]
@@ -1,6 +1,9 @@
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 
+from budget_tracker.periods import validate_timezone
+
 
 class User(AbstractUser):
     """
@@ -8,8 +11,37 @@ class User(AbstractUser):
     For now, we use the default fields but can extend later.
     """
     email = models.EmailField(unique=True, help_text="User's email address")
+    timezone = models.CharField(
+        max_length=64,
+        default=settings.TIME_ZONE,
+        validators=[validate_timezone],
+        help_text="Time zone the user's calendar days, months and weeks are counted in",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.username
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'timezone' in field_names:
+            instance._loaded_timezone = instance.timezone
+        return instance
+
+    def get_previous_timezone(self):
+        """Return the time zone last loaded from or written to the database, if known."""
+        return getattr(self, '_loaded_timezone', None)
+
+    def save(self, *args, **kwargs):
+        if self.pk and not self._state.adding and self.get_previous_timezone() is None:
+            # Not loaded with its time zone (e.g. bulk-created or deferred):
+            # read it, so a change still relocalizes the user's transactions.
+            stored = type(self).objects.filter(pk=self.pk).values_list('timezone', flat=True).first()
+            if stored is not None:
+                self._loaded_timezone = stored
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'timezone' in update_fields:
+            self._loaded_timezone = self.timezone
@@ -15,7 +15,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = User
-        fields = ['username', 'email', 'password', 'password_confirm', 'first_name', 'last_name']
+        fields = ['username', 'email', 'password', 'password_confirm', 'first_name', 'last_name', 'timezone']
 
     def validate(self, attrs):
         if attrs['password'] != attrs['password_confirm']:
@@ -34,7 +34,7 @@ class UserSerializer(serializers.ModelSerializer):
     """
     class Meta:
         model = User
-        fields = ['id', 'username', 'email', 'first_name', 'last_name', 'date_joined', 'created_at']
+        fields = ['id', 'username', 'email', 'first_name', 'last_name', 'timezone', 'date_joined', 'created_at']
         read_only_fields = ['id', 'email', 'date_joined', 'created_at']
 
 
@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import get_token_cache, reset_token_cache
+
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    """Deleted tokens (logout, password change) must stop authenticating at once."""
+    # The key is the token's primary key, which is cleared after deletion.
+    key, user_id = instance.key, instance.user_id
+    invalidate = lambda: get_token_cache().invalidate(key, user_id)  # noqa: E731
+    invalidate()
+    # Again after commit, in case a concurrent request re-cached the old row.
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user_tokens(sender, instance, raw=False, **kwargs):
+    """Cached tokens carry a copy of the user; drop them when it changes."""
+    if raw:
+        return
+    user_id = instance.pk
+    invalidate = lambda: get_token_cache().invalidate_user(user_id)  # noqa: E731
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
+@receiver(setting_changed)
+def reset_token_cache_on_setting_change(setting, **kwargs):
+    if setting.startswith('TOKEN_AUTH_CACHE_'):
+        reset_token_cache()
@@ -1,3 +1,114 @@
-from django.test import TestCase
+from datetime import date, datetime, timezone
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+
+from budget_tracker.testing import SHARED_CACHES, QueryBudgetTestCase
+from categories.models import Category
+from transactions.models import Transaction
+from .authentication import TokenCache
+
+
+class UserEndpointQueryBudgetTests(QueryBudgetTestCase):
+    """
+    Account and authentication endpoints must not touch the user's
+    transactions at all.
+    """
+
+    def test_register(self):
+        def payload(user):
+            return {
+                'username': f'{user.username}_friend',
+                'email': f'{user.username}_friend@example.com',
+                'password': 'friend-pass-4821',
+                'password_confirm': 'friend-pass-4821',
+            }
+
+        self.assertQueryBudget(
+            'post', '/api/users/register/', payload, status=201, max_queries=7, authenticate=False
+        )
+
+    def test_login(self):
+        response = self.assertQueryBudget(
+            'post', '/api/auth/login/', lambda user: {'username': user.username, 'password': self.PASSWORD},
+            max_queries=2, authenticate=False,
+        )
+        self.assertIn('token', response.data)
+
+    def test_logout(self):
+        self.assertQueryBudget('post', '/api/auth/logout/', max_queries=2)
+
+    def test_profile(self):
+        self.assertQueryBudget('get', '/api/users/me/', max_queries=1)
+
+    def test_update_profile(self):
+        self.assertQueryBudget('patch', '/api/users/me/', {'first_name': 'Ada'}, max_queries=2)
+
+    def test_change_password(self):
+        self.assertQueryBudget(
+            'post', '/api/auth/change-password/',
+            {'current_password': self.PASSWORD, 'new_password': 'another-pass-9173'},
+            max_queries=7,
+        )
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class TokenCacheTests(TestCase):
+    """Two ``TokenCache`` instances stand in for two worker processes."""
+
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_user('worker', 'worker@example.com', 'worker-pass-5512')
+        self.token = Token.objects.select_related('user').get(pk=Token.objects.create(user=user).pk)
+        self.workers = [TokenCache(alias='default'), TokenCache(alias='default')]
+        for worker in self.workers:
+            worker.set(self.token.key, self.token)
+
+    def test_token_revocation_reaches_other_workers(self):
+        first, second = self.workers
+        self.assertIsNotNone(second.get(self.token.key))
+        first.invalidate(self.token.key, self.token.user_id)
+        self.assertIsNone(second.get(self.token.key))
+
+    def test_user_change_reaches_other_workers(self):
+        first, second = self.workers
+        first.invalidate_user(self.token.user_id)
+        self.assertIsNone(second.get(self.token.key))
+
+    def test_nothing_cached_without_shared_cache(self):
+        local = TokenCache(alias=None)
+        local.set(self.token.key, self.token)
+        self.assertIsNone(local.get(self.token.key))
+        self.assertEqual(len(local), 0)
+
+    def test_nothing_cached_in_a_per_process_cache(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            local = TokenCache(alias='default')
+            local.set(self.token.key, self.token)
+            self.assertIsNone(local.get(self.token.key))
+            self.assertEqual(len(local), 0)
+
+
+class TimezoneChangeTests(TestCase):
+    """Moving a user moves their transactions to the new calendar days."""
+
+    def test_user_loaded_without_timezone(self):
+        user = get_user_model().objects.create_user(
+            'mover', 'mover@example.com', 'mover-pass-3307', timezone='Africa/Lagos'
+        )
+        # 22:30 UTC: still Dec 31 in Lagos, already Jan 1 in Auckland.
+        transaction = Transaction.objects.create(
+            user=user, category=Category.objects.create(name='Moving'), type='expense', amount='5.00',
+            date=datetime(2025, 12, 31, 22, 30, tzinfo=timezone.utc),
+        )
+        self.assertEqual(transaction.local_date, date(2025, 12, 31))
+
+        user = get_user_model().objects.only('id', 'username').get(pk=user.pk)
+        user.timezone = 'Pacific/Auckland'
+        user.save()
+
+        transaction.refresh_from_db()
+        self.assertEqual(transaction.local_date, date(2026, 1, 1))
+        self.assertEqual(transaction.year_month, 202601)